@@ -0,0 +1,89 @@
+"""
+ANSI解析器吞吐量基准
+仓库中没有附带真实的工具日志，基准使用模拟 sqlmap/nmap/ffuf 典型输出的合成样本，
+按读取大小切块后对比旧实现（整块OSC替换 + CSI正则遍历）与流式解析器。
+
+运行: python tests/bench_ansi_parser.py
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wct_modules.ansi_parser import ANSIParser
+
+
+def sample_tool_output() -> Dict[str, str]:
+    """模拟sqlmap/nmap/ffuf的典型终端输出（含颜色、标题与进度行）"""
+    sqlmap = ''.join(
+        f"[\x1b[36m12:00:{i % 60:02d}\x1b[0m] [\x1b[32mINFO\x1b[0m] testing '\x1b[37mAND boolean-based blind - WHERE or HAVING clause\x1b[0m'\n"
+        f"[\x1b[36m12:00:{i % 60:02d}\x1b[0m] [\x1b[1;33mWARNING\x1b[0m] GET parameter '\x1b[37mid\x1b[0m' does not seem to be injectable\n"
+        for i in range(200)
+    )
+    nmap = "\x1b]0;nmap -sV 10.0.0.0/24\x07Starting Nmap 7.94 ( https://nmap.org )\n" + ''.join(
+        f"Nmap scan report for 10.0.0.{i}\nHost is up (0.00{i % 10}s latency).\n"
+        f"PORT     STATE SERVICE VERSION\n22/tcp   open  ssh     OpenSSH 8.9p1\n80/tcp   open  http    nginx 1.18.0\n\n"
+        for i in range(100)
+    )
+    ffuf = ''.join(
+        f"\r\x1b[2K:: Progress: [{i}/4614] :: Job [1/1] :: 312 req/sec :: Duration: [0:00:{i % 60:02d}] :: Errors: 0 ::"
+        + (f"\r\x1b[2K\x1b[38;5;46madmin{i}\x1b[0m                   [Status: 301, Size: 169, Words: 5, Lines: 8]\n" if i % 20 == 0 else '')
+        for i in range(400)
+    )
+    return {'sqlmap': sqlmap, 'nmap': nmap, 'ffuf': ffuf}
+
+def legacy_parse_text(parser: ANSIParser, text: str) -> List[Tuple[str, int]]:
+    """旧实现（整块OSC替换 + CSI正则遍历），仅供基准对比"""
+    result = []
+    last_end = 0
+    style_id = parser.current_format.style_id()
+    text = parser.ANSI_OSC_RE.sub('', text)
+    for match in parser.ANSI_CSI_RE.finditer(text):
+        if match.start() > last_end:
+            result.append((text[last_end:match.start()], style_id))
+        if match.group(2) == 'm':
+            parser._process_sgr_sequence(match.group(1))
+            style_id = parser.current_format.style_id()
+        last_end = match.end()
+    if last_end < len(text):
+        result.append((text[last_end:], style_id))
+    return result
+
+def benchmark_ansi_parser(total_mb=4, chunk_size=4093):
+    """ANSI解析吞吐量基准：按读取大小切块，对比旧实现与流式解析器的MB/s与跨块乱码"""
+    results = {}
+    for tool, sample in sample_tool_output().items():
+        data = sample * max(1, total_mb * 1024 * 1024 // len(sample.encode('utf-8')))
+        size_mb = len(data.encode('utf-8')) / (1024 * 1024)
+        chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+        expected = ''.join(text for text, _ in ANSIParser().parse_text(data) if text)
+        
+        parser = ANSIParser()
+        start = time.perf_counter()
+        legacy = [text for chunk in chunks for text, _ in legacy_parse_text(parser, chunk)]
+        legacy_time = time.perf_counter() - start
+        
+        parser = ANSIParser()
+        start = time.perf_counter()
+        streaming = [text for chunk in chunks for text, _ in parser.parse_text(chunk) if text]
+        streaming_time = time.perf_counter() - start
+        
+        legacy_text = ''.join(legacy)
+        results[tool] = {
+            'size_mb': size_mb,
+            'legacy_mb_per_second': size_mb / max(legacy_time, 1e-9),
+            'streaming_mb_per_second': size_mb / max(streaming_time, 1e-9),
+            'legacy_garbage': legacy_text.count('\x1b') + abs(len(legacy_text) - len(expected)),
+            'streaming_correct': ''.join(streaming) == expected
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for tool, stats in benchmark_ansi_parser().items():
+        print(f"{tool}: {stats['size_mb']:.1f} MB, 旧实现 {stats['legacy_mb_per_second']:.1f} MB/s "
+              f"(跨块乱码 {stats['legacy_garbage']} 字符), 流式 {stats['streaming_mb_per_second']:.1f} MB/s, "
+              f"结果正确: {stats['streaming_correct']}")
@@ -0,0 +1,21 @@
+"""
+ANSI解析器测试
+"""
+
+from wct_modules.ansi_parser import ANSIParser
+
+
+def test_sequences_split_across_chunks_are_parsed_like_whole_text():
+    """转义序列被读取边界切断时，分块解析与整段解析的结果一致"""
+    text = ("\x1b]0;nmap -sV\x07Starting Nmap\n"
+            + "plain line without escapes\n" * 8
+            + "\x1b[1;31mopen\x1b[0m 22/tcp\r\x1b[2K\x1b[38;5;46mdone\x1b[0m\n")
+    expected = [segment for segment in ANSIParser().parse_text(text) if segment[0] != '']
+
+    for chunk_size in (1, 2, 3, 7, 64):
+        parser = ANSIParser()
+        segments = [segment for start in range(0, len(text), chunk_size)
+                    for segment in parser.parse_text(text[start:start + chunk_size]) if segment[0] != '']
+        assert ''.join(t for t, _ in segments if t) == ''.join(t for t, _ in expected if t)
+        assert [s for _, s in segments if isinstance(s, int)][-1] == expected[-1][1]
+        assert parser.title == 'nmap -sV'
@@ -0,0 +1,37 @@
+"""
+参数文档测试
+"""
+
+from PySide6.QtCore import QCoreApplication
+
+from wct_modules.parameter_document import ParameterDocument
+
+CONFIG_TEXT = "%常用参数\n%%勾选项\n-v=0=详细输出\n"
+
+
+def test_failed_write_keeps_edits_and_reports_error(tmp_path):
+    """写回失败时编辑保留为未写回并报告错误，问题排除后下一次写回成功"""
+    app = QCoreApplication.instance() or QCoreApplication([])
+    config_file = tmp_path / "wct_config.txt"
+    config_file.write_text(CONFIG_TEXT, encoding='utf-8')
+    document = ParameterDocument.for_file(config_file)
+    reported = []
+    document.write_failed.connect(reported.append)
+
+    lines = document.get_lines()
+    lines.append("-q=0=安静模式\n")
+    document.set_lines(lines, ['常用参数'])
+    # 临时文件的位置被目录占用，写入失败
+    blocker = tmp_path / "wct_config.txt.tmp"
+    blocker.mkdir()
+
+    errors = ParameterDocument.flush_all()
+    app.processEvents()
+    assert len(errors) == 1 and reported == errors
+    assert document.dirty
+    assert config_file.read_text(encoding='utf-8') == CONFIG_TEXT
+
+    blocker.rmdir()
+    document.flush().result()
+    assert not document.dirty
+    assert config_file.read_text(encoding='utf-8') == CONFIG_TEXT + "-q=0=安静模式\n"
@@ -0,0 +1,35 @@
+"""
+进程管理测试
+"""
+
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from wct_modules.process import IOReactor
+
+
+@pytest.mark.skipif(not IOReactor.is_supported(), reason="反应器只在非Windows平台使用")
+def test_reactor_reaps_process_without_pidfd_in_its_own_thread():
+    """没有pidfd时，输出关闭后仍在运行的进程由反应器线程回收，不另开等待线程"""
+    reactor = IOReactor()
+    reactor._open_pidfd = lambda process: None
+    process = subprocess.Popen(
+        [sys.executable, '-c', 'import os, time; os.close(1); time.sleep(0.3)'],
+        stdout=subprocess.PIPE)
+
+    exited = threading.Event()
+    results = []
+
+    def on_exit(exit_code):
+        results.append((exit_code, threading.current_thread()))
+        exited.set()
+
+    threads_before = threading.active_count()
+    reactor.watch(process, process.stdout.fileno(), lambda data: None, on_exit)
+    assert exited.wait(5)
+    assert results == [(0, reactor.thread)]
+    assert threading.active_count() == threads_before
+    assert not reactor.reaping
@@ -0,0 +1,31 @@
+"""
+全局搜索测试
+"""
+
+import time
+
+from PySide6.QtCore import QCoreApplication
+
+from wct_modules.search_system import SearchWorker
+
+
+def test_rapid_submissions_end_with_latest_query():
+    """连续提交的查询不阻塞调用方，线程退出期间提交的查询也会被执行"""
+    app = QCoreApplication.instance() or QCoreApplication([])
+    worker = SearchWorker()
+    queries = []
+    worker.search_result.connect(lambda results: queries.append(worker.query))
+
+    for i in range(500):
+        worker.submit(f"q{i}", {}, {})
+        if i % 7 == 0:
+            time.sleep(0.0005)
+        app.processEvents()
+
+    deadline = time.monotonic() + 5
+    while (worker.active or worker.isRunning()) and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    assert not worker.active and worker.wait(1000)
+    app.processEvents()
+    assert queries[-1] == "q499"
@@ -0,0 +1,60 @@
+"""
+终端搜索测试
+"""
+
+import re
+
+import pytest
+from PySide6.QtCore import Qt
+
+from wct_modules.terminal_search import TerminalSearchWorker, SearchJob
+from wct_modules.terminal_view import LineStore
+
+
+def run_search(chunks, pattern, guarded=False):
+    worker = TerminalSearchWorker()
+    found = []
+    worker.matches_found.connect(lambda job, matches: found.extend(matches))
+    worker.execute(SearchJob(1, chunks, pattern, guarded=guarded))
+    return found
+
+
+@pytest.mark.parametrize('guarded', [False, True])
+def test_matches_across_block_boundaries_are_found(guarded):
+    """跨越行块边界的匹配与在整段文本上搜索的结果一致"""
+    store = LineStore()
+    store.append(''.join(f"line {i}\n" for i in range(LineStore.BLOCK_LINES * 3)))
+    chunks = store.text_chunks()
+    assert len(chunks) > 2
+
+    pattern = re.compile(r'\d+\nline 10')
+    expected = [match.span() for match in pattern.finditer(store.plain_text())]
+    assert run_search(chunks, pattern, guarded) == expected
+    assert any(start < chunks[1][0] < end for start, end in expected)
+
+
+def test_worker_is_reused_and_stops_with_pending_jobs():
+    """同一个搜索线程依次执行多个任务，stop() 取消剩余任务并等待线程结束"""
+    store = LineStore()
+    store.append(''.join(f"line {i}\n" for i in range(LineStore.BLOCK_LINES * 3)))
+    pattern = re.compile('line')
+    worker = TerminalSearchWorker()
+    finished = []
+    worker.search_finished.connect(lambda job, cancelled: finished.append((job, cancelled)),
+                                   Qt.DirectConnection)
+
+    first = SearchJob(1, store.text_chunks(), pattern)
+    worker.submit(first)
+    worker.submit(SearchJob(2, [(0, 'line')], pattern, follow=True))
+    while len(finished) < 2:
+        worker.wait(10)
+    assert worker.isRunning()
+    assert finished[0] == (first, False) and first.total == LineStore.BLOCK_LINES * 3
+
+    cancelled = SearchJob(3, store.text_chunks(), pattern)
+    cancelled.cancelled = True
+    worker.submit(cancelled)
+    worker.submit(SearchJob(4, store.text_chunks(), pattern))
+    worker.stop()
+    assert worker.isFinished()
+    assert all(cancelled for _, cancelled in finished[2:])
@@ -0,0 +1,26 @@
+"""
+终端行存储测试
+"""
+
+from wct_modules.ansi_parser import ANSIParser
+from wct_modules.terminal_view import LineStore
+
+
+def test_line_store_accepts_more_than_65536_truecolor_styles():
+    """真彩色输出的样式ID超过 65535 时，封存行块不应溢出"""
+    parser = ANSIParser()
+    store = LineStore()
+    style_count = 70000
+    step = 2048
+    for first in range(0, style_count, step):
+        text = ''.join(f"\x1b[38;2;{i >> 16};{(i >> 8) & 0xff};{i & 0xff}mline {i}\n"
+                       for i in range(first, min(first + step, style_count)))
+        store.append_segments(parser.parse_text(text))
+
+    assert store.line_count() == style_count + 1
+    last_block = store.blocks[-1]
+    assert max(last_block.run_styles) > 0xffff
+    line = last_block.first_line + last_block.line_count() - 1
+    (_, _, style_id), = store.line_runs(line)
+    assert style_id == last_block.run_styles[-1]
+    assert store.line_text(line) == f"line {line}"
@@ -4,8 +4,9 @@ ANSI转义序列解析器模块
 """
 
 import re
+import threading
 from typing import List, Tuple, Dict, Optional
-from PySide6.QtGui import QColor, QTextCharFormat, QFont, QTextCursor
+from PySide6.QtGui import QColor, QTextCharFormat, QTextFormat, QFont, QTextCursor
 from PySide6.QtCore import Qt
 
 class ANSIColor:
@@ -88,35 +89,215 @@ class ANSITextFormat:
         new_format.background_color = self.background_color
         return new_format
     
+    def state_key(self) -> tuple:
+        """返回可哈希的格式状态，用作缓存键"""
+        return (self.bold, self.dim, self.italic, self.underline,
+                self.strikethrough, self.blink, self.reverse, self.hidden,
+                self.foreground_color, self.background_color)
+    
+    def restore_state(self, state: tuple):
+        """从 state_key() 的结果恢复格式状态"""
+        (self.bold, self.dim, self.italic, self.underline,
+         self.strikethrough, self.blink, self.reverse, self.hidden,
+         self.foreground_color, self.background_color) = state
+    
+    def style_key(self) -> tuple:
+        """返回影响绘制的样式元组 (前景, 背景, 粗体, 斜体, 下划线, 删除线, 反显)
+
+        颜色为调色板索引(int)、真彩色"#rrggbb"或None(默认色)。
+        """
+        return (self.foreground_color, self.background_color, self.bold, self.italic,
+                self.underline, self.strikethrough, self.reverse)
+    
+    def style_id(self) -> int:
+        """返回当前样式在共享样式表中的ID"""
+        return shared_style_table.intern_state(self.style_key())
+    
     def to_qt_format(self) -> QTextCharFormat:
-        """转换为Qt文本格式"""
-        format = QTextCharFormat()
-        
+        """转换为Qt文本格式（共享实例，请勿修改）"""
+        return shared_style_table.get_format(self.style_id())
+
+class TerminalStyle:
+    """终端文本样式（颜色已按当前主题解析为QColor）"""
+
+    __slots__ = ('foreground', 'background', 'bold', 'italic', 'underline', 'strikethrough')
 
-        if self.bold:
+    def __init__(self, foreground=None, background=None, bold=False, italic=False,
+                 underline=False, strikethrough=False):
+        self.foreground = foreground
+        self.background = background
+        self.bold = bold
+        self.italic = italic
+        self.underline = underline
+        self.strikethrough = strikethrough
+
+class StyleTable:
+    """样式驻留表
+
+    SGR状态元组映射为紧凑的整数ID，每个ID只解析一次为共享的 TerminalStyle 和
+    QTextCharFormat。16/256色调色板预先构建为QColor表，仅在主题切换时重建；
+    ID本身与主题无关，已存储的输出在主题切换后直接按新调色板重绘。
+    """
+
+    DEFAULT_STYLE = 0
+    DEFAULT_KEY = (None, None, False, False, False, False, False)
+
+    def __init__(self):
+        self.keys = [self.DEFAULT_KEY]
+        self.style_ids = {self.DEFAULT_KEY: self.DEFAULT_STYLE}
+        self.styles: List[TerminalStyle] = []
+        self.formats: List[QTextCharFormat] = []
+        self.rgb_colors: Dict[str, QColor] = {}
+        self.default_foreground = QColor("#ffffff")
+        self.default_background = QColor("#000000")
+        self.theme_name = None
+        self.lock = threading.RLock()
+        self.build_palette()
+
+    def build_palette(self):
+        """构建256色QColor调色板并重新解析所有样式"""
+        with self.lock:
+            self.palette = [QColor(ANSIColor.get_256_color(i)) for i in range(256)]
+            resolved = [self._resolve(key) for key in self.keys]
+            self.styles = [style for style, _ in resolved]
+            self.formats = [format for _, format in resolved]
+
+    def apply_theme(self, theme_manager):
+        """按主题更新默认颜色，主题未变化时不做任何事"""
+        if theme_manager is None or theme_manager.current_theme == self.theme_name:
+            return False
+        self.theme_name = theme_manager.current_theme
+        self.default_foreground = QColor(theme_manager.get_theme_color("terminal_text"))
+        self.default_background = QColor(theme_manager.get_theme_color("terminal_bg"))
+        self.build_palette()
+        return True
+
+    def set_default_colors(self, foreground: str, background: str):
+        """设置反显时使用的默认前景/背景色"""
+        foreground, background = QColor(foreground), QColor(background)
+        if foreground != self.default_foreground or background != self.default_background:
+            self.default_foreground = foreground
+            self.default_background = background
+            self.build_palette()
+
+    def _color(self, spec) -> Optional[QColor]:
+        if spec is None:
+            return None
+        if isinstance(spec, int):
+            return self.palette[spec]
+        color = self.rgb_colors.get(spec)
+        if color is None:
+            color = self.rgb_colors[spec] = QColor(spec)
+        return color
+
+    def _resolve(self, key: tuple):
+        foreground_spec, background_spec, bold, italic, underline, strikethrough, reverse = key
+        foreground = self._color(foreground_spec)
+        background = self._color(background_spec)
+        if reverse:
+            foreground, background = (background or self.default_background,
+                                      foreground or self.default_foreground)
+
+        format = QTextCharFormat()
+        if bold:
             format.setFontWeight(QFont.Bold)
-        if self.italic:
+        if italic:
             format.setFontItalic(True)
-        if self.underline:
+        if underline:
             format.setFontUnderline(True)
-        if self.strikethrough:
+        if strikethrough:
             format.setFontStrikeOut(True)
-        
-
-        if self.foreground_color:
-            format.setForeground(QColor(self.foreground_color))
-        if self.background_color:
-            format.setBackground(QColor(self.background_color))
-            
-
-        if self.reverse and self.foreground_color and self.background_color:
-            format.setForeground(QColor(self.background_color))
-            format.setBackground(QColor(self.foreground_color))
-        
-        return format
+        if foreground is not None:
+            format.setForeground(foreground)
+        if background is not None:
+            format.setBackground(background)
+
+        return TerminalStyle(foreground, background, bold, italic, underline, strikethrough), format
+
+    def intern_state(self, key: tuple) -> int:
+        """把样式元组映射为样式ID（可在渲染线程调用）"""
+        style_id = self.style_ids.get(key)
+        if style_id is None:
+            with self.lock:
+                style_id = self.style_ids.get(key)
+                if style_id is None:
+                    style, format = self._resolve(key)
+                    style_id = len(self.keys)
+                    self.keys.append(key)
+                    self.styles.append(style)
+                    self.formats.append(format)
+
+                    self.style_ids[key] = style_id
+        return style_id
+
+    def intern_format(self, format: Optional[QTextCharFormat]) -> int:
+        """把Qt文本格式转换为样式ID（用于非ANSI的状态输出）"""
+        if format is None:
+            return self.DEFAULT_STYLE
+
+        foreground = None
+        background = None
+        if format.hasProperty(QTextFormat.Property.ForegroundBrush):
+            foreground = format.foreground().color().name()
+        if format.hasProperty(QTextFormat.Property.BackgroundBrush):
+            background = format.background().color().name()
+
+        return self.intern_state((
+            foreground,
+            background,
+            format.fontWeight() >= QFont.Weight.Bold,
+            format.fontItalic(),
+            format.fontUnderline(),
+            format.fontStrikeOut(),
+            False
+        ))
+
+    def get_style(self, style_id: int) -> TerminalStyle:
+        """获取样式ID对应的样式"""
+        return self.styles[style_id]
+
+    def get_format(self, style_id: int) -> QTextCharFormat:
+        """获取样式ID对应的共享Qt文本格式"""
+        return self.formats[style_id]
+
+shared_style_table = StyleTable()
+
+def _build_sgr_table() -> Dict[int, Tuple[Tuple[str, object], ...]]:
+    """构建SGR代码到 (属性名, 值) 修改序列的查找表"""
+    defaults = ANSITextFormat()
+    table = {
+        0: tuple(vars(defaults).items()),
+        1: (('bold', True),),
+        2: (('dim', True),),
+        3: (('italic', True),),
+        4: (('underline', True),),
+        5: (('blink', True),),
+        7: (('reverse', True),),
+        8: (('hidden', True),),
+        9: (('strikethrough', True),),
+        22: (('bold', False), ('dim', False)),
+        23: (('italic', False),),
+        24: (('underline', False),),
+        25: (('blink', False),),
+        27: (('reverse', False),),
+        28: (('hidden', False),),
+        29: (('strikethrough', False),),
+        39: (('foreground_color', None),),
+        49: (('background_color', None),),
+    }
+    for index in range(8):
+        table[30 + index] = (('foreground_color', index),)
+        table[40 + index] = (('background_color', index),)
+        table[90 + index] = (('foreground_color', index + 8),)
+        table[100 + index] = (('background_color', index + 8),)
+    return table
 
 class ANSIParser:
-    """ANSI转义序列解析器"""
+    """ANSI转义序列解析器
+
+    流式单遍扫描：一次正则切分得到交替的文本与序列，SGR参数经状态转移表查表；
+    块末尾不完整的转义序列保留到下一次调用，因此序列跨读取边界也能正确解析。
+    """
     
 
 
@@ -129,63 +310,104 @@ class ANSIParser:
     ANSI_ALL_RE = re.compile(r'(?:'
                             r'\x1b\[[0-?]*[ -/]*[@-~]|'
                             r'\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|'
-                            r'\x1b[@-Z\\-_]'
+                            r'\x1b[()*+][ -~]|'
+                            r'\x1b[0-?@-Z\\^_a-~]'
                             r')')
+
+    ANSI_SEQUENCE_RE = re.compile(r'\x1b(?:'
+                                  r'\[([0-?]*)[ -/]*([@-~])|'
+                                  r'\]([^\x07\x1b]*)(?:\x07|\x1b\\|(?=\x1b[^\\]))|'
+                                  r'[()*+][ -~]|'
+                                  r'[0-?@-Z\\^_a-~]'
+                                  r')')
+
+    ANSI_PARTIAL_RE = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[()*+])?\Z')
+
+    SGR_TABLE = _build_sgr_table()
+
+    SGR_TRANSITIONS: Dict[Tuple[tuple, str], Tuple[tuple, int]] = {}
+
+    MAX_SGR_TRANSITIONS = 4096
+
+    MAX_PENDING = 4096
+
+    SCREEN_COMMANDS = frozenset('ABCDEFGJK')
     
     def __init__(self):
         self.current_format = ANSITextFormat()
         self.default_foreground = "#ffffff"
         self.default_background = "#000000"
+        self.pending = ''
+        self.title = ''
     
-    def parse_text(self, text: str) -> List[Tuple[str, QTextCharFormat]]:
+    def parse_text(self, text: str) -> List[Tuple[str, int]]:
         """
-        解析包含ANSI转义序列的文本
-        返回: [(文本片段, Qt格式), ...]
+        解析包含ANSI转义序列的文本（可按任意边界分块连续调用）
+        返回: [(文本片段, 样式ID), ...]，样式ID见 shared_style_table；
+        光标移动与擦除序列(SCREEN_COMMANDS)以 (None, (命令, 参数)) 控制片段返回
         """
-        result = []
-        last_end = 0
-        
-
-        text = self.ANSI_OSC_RE.sub('', text)
-        
+        if self.pending:
+            text = self.pending + text
+            self.pending = ''
+        if '\x1b' not in text:
+            # 不含转义序列的块（多数工具的大部分输出）无需拆分，也不改变格式状态
+            return [(text, self.current_format.style_id())] if text else []
 
-        for match in self.ANSI_CSI_RE.finditer(text):
+        pieces = self.ANSI_SEQUENCE_RE.split(text)
+        if '\x1b' in pieces[-1]:
+            pieces[-1] = self._hold_partial_escape(pieces[-1])
 
-            if match.start() > last_end:
-                plain_text = text[last_end:match.start()]
-                if plain_text:
-                    result.append((plain_text, self.current_format.to_qt_format()))
-            
+        result = []
+        append = result.append
+        state = self.current_format.state_key()
+        style_id = self.current_format.style_id()
+        transitions = self.SGR_TRANSITIONS
+        
 
-            params = match.group(1)
-            command = match.group(2)
+        for index in range(0, len(pieces), 4):
+            plain = pieces[index]
+            if plain:
+                if '\x1b' in plain:
+                    plain = plain.replace('\x1b', '')
+                if plain:
+                    append((plain, style_id))
+            if index + 1 == len(pieces):
+                break
             
+            command = pieces[index + 2]
             if command == 'm':
-                self._process_sgr_sequence(params)
-            elif command == 'K':
-                pass
-            elif command in 'ABCD':
-                pass
-            elif command in 'HfJ':
-                pass
-            elif command in 'hlST':
-                pass
-            
-            last_end = match.end()
-        
 
-        if last_end < len(text):
-            remaining_text = text[last_end:]
-            if remaining_text:
-                result.append((remaining_text, self.current_format.to_qt_format()))
+                key = (state, pieces[index + 1])
+                transition = transitions.get(key)
+                if transition is None:
+                    self.current_format.restore_state(state)
+                    self._process_sgr_sequence(key[1])
+                    transition = (self.current_format.state_key(), self.current_format.style_id())
+                    if len(transitions) >= self.MAX_SGR_TRANSITIONS:
+                        transitions.clear()
+                    transitions[key] = transition
+                state, style_id = transition
+            elif command in self.SCREEN_COMMANDS:
+                append((None, (command, pieces[index + 1])))
+            elif command is None and pieces[index + 3] is not None:
+                self._process_osc_sequence(pieces[index + 3])
         
+        self.current_format.restore_state(state)
         return result
     
+    def _hold_partial_escape(self, tail: str) -> str:
+        """把块末尾不完整的转义序列留到下一次调用，返回可立即输出的部分"""
+        escape = tail.find('\x1b')
+        while escape >= 0:
+            if self.ANSI_PARTIAL_RE.match(tail, escape):
+                if len(tail) - escape <= self.MAX_PENDING:
+                    self.pending = tail[escape:]
+                return tail[:escape]
+            escape = tail.find('\x1b', escape + 1)
+        return tail
+    
     def _process_sgr_sequence(self, params: str):
-        """处理SGR (Select Graphic Rendition) 序列"""
-        if not params:
-            params = "0"
-        
+        """处理SGR (Select Graphic Rendition) 序列，通过 SGR_TABLE 查表分派"""
         codes = []
         for x in params.split(';'):
             try:
@@ -194,99 +416,67 @@ class ANSIParser:
 
                 continue
         
+        current_format = self.current_format
+        table = self.SGR_TABLE
         i = 0
+        count = len(codes)
         
-        while i < len(codes):
+        while i < count:
             code = codes[i]
-            
-            if code == 0:
-                self.current_format.reset()
-                self.current_format.foreground_color = self.default_foreground
-                self.current_format.background_color = None
-            elif code == 1:
-                self.current_format.bold = True
-            elif code == 2:
-                self.current_format.dim = True
-            elif code == 3:
-                self.current_format.italic = True
-            elif code == 4:
-                self.current_format.underline = True
-            elif code == 5:
-                self.current_format.blink = True
-            elif code == 7:
-                self.current_format.reverse = True
-            elif code == 8:
-                self.current_format.hidden = True
-            elif code == 9:
-                self.current_format.strikethrough = True
-            elif code == 22:
-                self.current_format.bold = False
-                self.current_format.dim = False
-            elif code == 23:
-                self.current_format.italic = False
-            elif code == 24:
-                self.current_format.underline = False
-            elif code == 25:
-                self.current_format.blink = False
-            elif code == 27:
-                self.current_format.reverse = False
-            elif code == 28:
-                self.current_format.hidden = False
-            elif code == 29:
-                self.current_format.strikethrough = False
-            elif 30 <= code <= 37:
-                color_index = code - 30
-                self.current_format.foreground_color = ANSIColor.COLORS_16[color_index]
-            elif code == 38:
-                i = self._process_extended_color(codes, i, True)
-                continue
-            elif code == 39:
-                self.current_format.foreground_color = self.default_foreground
-            elif 40 <= code <= 47:
-                color_index = code - 40
-                self.current_format.background_color = ANSIColor.COLORS_16[color_index]
-            elif code == 48:
-                i = self._process_extended_color(codes, i, False)
+            changes = table.get(code)
+            if changes is not None:
+                for name, value in changes:
+                    setattr(current_format, name, value)
+            elif code == 38 or code == 48:
+                i = self._process_extended_color(codes, i, code == 38)
                 continue
-            elif code == 49:
-                self.current_format.background_color = None
-            elif 90 <= code <= 97:
-                color_index = code - 90 + 8
-                self.current_format.foreground_color = ANSIColor.COLORS_16[color_index]
-            elif 100 <= code <= 107:
-                color_index = code - 100 + 8
-                self.current_format.background_color = ANSIColor.COLORS_16[color_index]
-
             
             i += 1
     
     def _process_extended_color(self, codes: List[int], index: int, is_foreground: bool) -> int:
-        """处理扩展颜色序列 (38;5;n 或 38;2;r;g;b)"""
+        """处理扩展颜色序列 (38;5;n 或 38;2;r;g;b)，返回下一个待处理代码的位置"""
         if index + 1 >= len(codes):
-            return index
+            return index + 1
         
         color_type = codes[index + 1]
+        color = None
         
         if color_type == 5:
-            if index + 2 < len(codes):
-                color_index = codes[index + 2]
-                color = ANSIColor.get_256_color(color_index)
-                if is_foreground:
-                    self.current_format.foreground_color = color
-                else:
-                    self.current_format.background_color = color
-                return index + 2
+            if index + 2 >= len(codes):
+                return len(codes)
+            if 0 <= codes[index + 2] <= 255:
+                color = codes[index + 2]
+            next_index = index + 3
         elif color_type == 2:
-            if index + 4 < len(codes):
-                r, g, b = codes[index + 2], codes[index + 3], codes[index + 4]
-                color = ANSIColor.rgb_to_hex(r, g, b)
-                if is_foreground:
-                    self.current_format.foreground_color = color
-                else:
-                    self.current_format.background_color = color
-                return index + 4
+            if index + 4 >= len(codes):
+                return len(codes)
+            r, g, b = (max(0, min(255, c)) for c in codes[index + 2:index + 5])
+            color = ANSIColor.rgb_to_hex(r, g, b)
+            next_index = index + 5
+        else:
+            return index + 2
         
-        return index + 1
+        if color is not None:
+            if is_foreground:
+                self.current_format.foreground_color = color
+            else:
+                self.current_format.background_color = color
+        return next_index
+    
+    def _process_osc_sequence(self, body: str):
+        """处理OSC序列，目前只识别窗口标题 (OSC 0/2)"""
+        command, _, value = body.partition(';')
+        if command in ('0', '2'):
+            self.title = value
+    
+    def state_key(self) -> tuple:
+        """返回解析器完整状态（格式、未完成的转义序列、标题），用作缓存键"""
+        return (self.current_format.state_key(), self.pending, self.title)
+    
+    def restore_state(self, state: tuple):
+        """从 state_key() 的结果恢复解析器状态"""
+        format_state, self.pending, self.title = state
+        self.current_format.restore_state(format_state)
     
     def strip_ansi(self, text: str) -> str:
         """移除文本中的ANSI转义序列"""
@@ -295,83 +485,87 @@ class ANSIParser:
     def reset_format(self):
         """重置格式状态"""
         self.current_format.reset()
-        self.current_format.foreground_color = self.default_foreground
+        self.pending = ''
     
     def set_default_colors(self, foreground: str, background: str):
         """设置默认颜色"""
         self.default_foreground = foreground
         self.default_background = background
+        shared_style_table.set_default_colors(foreground, background)
 
 class ANSITextRenderer:
-    """ANSI文本渲染器"""
+    """ANSI文本渲染器
+
+    parse_ansi_text 只做解析与样式驻留，不触碰控件，可以在渲染线程调用；
+    append_ansi_text 在GUI线程解析并直接追加到文本控件。
+    """
     
-    def __init__(self, text_widget):
+    def __init__(self, text_widget=None, title_callback=None):
         self.text_widget = text_widget
         self.parser = ANSIParser()
+        self.title_callback = title_callback
+        self.lock = threading.Lock()
         
 
         try:
             from .terminal_performance import ANSICache, performance_monitor
-            self.cache = ANSICache()
+            self.cache = ANSICache(monitor=performance_monitor)
             self.performance_monitor = performance_monitor
             self.cache_enabled = True
         except ImportError:
             self.cache = None
             self.performance_monitor = None
             self.cache_enabled = False
-        
-    def append_ansi_text(self, text: str):
-        """追加ANSI格式的文本到文本控件"""
+    
+    def parse_ansi_text(self, text: str) -> List[Tuple[Optional[str], object]]:
+        """解析ANSI文本为 [(文本片段, 样式ID), ...]，解析失败时退化为去除转义序列的纯文本"""
         if not text:
-            return
+            return []
         
-        try:
-
-            if self.performance_monitor:
-                self.performance_monitor.record_render()
-                
-
-            segments = None
-            if self.cache_enabled and self.cache:
-                segments = self.cache.get(text)
-                if segments:
-                    if self.performance_monitor:
-                        self.performance_monitor.record_cache_hit()
-                else:
-                    if self.performance_monitor:
-                        self.performance_monitor.record_cache_miss()
-                        self.performance_monitor.record_ansi_parse()
-            
+        with self.lock:
+            try:
 
-            if segments is None:
-                segments = self.parser.parse_text(text)
+                if self.performance_monitor:
+                    self.performance_monitor.record_render()
+                    
 
+                segments = None
+                entry_state = None
+                title = self.parser.title
                 if self.cache_enabled and self.cache:
-                    self.cache.put(text, segments)
-            
-
-            cursor = self.text_widget.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-            
+                    entry_state = self.parser.state_key()
+                    cached = self.cache.get(entry_state, text)
+                    if cached is not None:
+                        segments, exit_state = cached
+                        self.parser.restore_state(exit_state)
+                        if self.performance_monitor:
+                            self.performance_monitor.record_cache_hit()
+                    else:
+                        if self.performance_monitor:
+                            self.performance_monitor.record_cache_miss()
+                            self.performance_monitor.record_ansi_parse()
+                
 
-            for text_segment, format in segments:
-                if text_segment:
-                    cursor.setCharFormat(format)
-                    cursor.insertText(text_segment)
-            
+                if segments is None:
+                    segments = self.parser.parse_text(text)
 
-            self.text_widget.setTextCursor(cursor)
-            self.text_widget.ensureCursorVisible()
-            
-        except Exception as e:
+                    if entry_state is not None:
+                        self.cache.put(entry_state, text, segments, self.parser.state_key())
+                
+            except Exception as e:
 
 
-            clean_text = self.parser.strip_ansi(text)
-            cursor = self.text_widget.textCursor()
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-            cursor.insertText(clean_text)
-            self.text_widget.setTextCursor(cursor)
-            self.text_widget.ensureCursorVisible()
+                return [(self.parser.strip_ansi(text), StyleTable.DEFAULT_STYLE)]
+        
+        if self.parser.title != title and self.title_callback:
+            self.title_callback(self.parser.title)
+        return segments
+        
+    def append_ansi_text(self, text: str):
+        """追加ANSI格式的文本到文本控件"""
+        segments = self.parse_ansi_text(text)
+        if segments:
+            self.text_widget.append_segments(segments)
     
     def set_default_colors(self, foreground: str, background: str):
         """设置默认颜色"""
@@ -379,9 +573,10 @@ class ANSITextRenderer:
     
     def clear_and_reset(self):
         """清空文本并重置格式"""
-        self.text_widget.clear()
-        self.parser.reset_format()
-
+        if self.text_widget:
+            self.text_widget.clear()
+        with self.lock:
+            self.parser.reset_format()
 
 def test_ansi_parser():
     """测试ANSI解析器功能"""
@@ -439,9 +634,9 @@ def test_ansi_parser():
             segments = parser.parse_text(test_text)
             print(f"解析结果: {len(segments)} 个片段")
             
-            for j, (text, format) in enumerate(segments):
-                if text.strip():
-                    print(f"  片段 {j+1}: {repr(text)} -> 格式已应用")
+            for j, (text, style_id) in enumerate(segments):
+                if text and text.strip():
+                    print(f"  片段 {j+1}: {repr(text)} -> 样式 {style_id} {shared_style_table.keys[style_id]}")
             
 
             clean_text = parser.strip_ansi(test_text)
@@ -457,6 +652,7 @@ def test_ansi_parser():
     print(f"当前背景色: {parser.current_format.background_color}")
     print(f"粗体: {parser.current_format.bold}")
     print(f"斜体: {parser.current_format.italic}")
+    print(f"样式表条目数: {len(shared_style_table.keys)}")
 
 if __name__ == "__main__":
-    test_ansi_parser()
\ No newline at end of file
+    test_ansi_parser()
@@ -3,6 +3,7 @@ import json
 from pathlib import Path
 from typing import Dict, List, Tuple, Any
 from .utils import get_project_root, get_resource_path, get_app_data_dir, ensure_directory
+from .wct_config import WctConfig, CHECKBOX_KIND, INPUT_KIND, load_wct_config
 
 class ConfigManager:
     def __init__(self):
@@ -127,57 +128,37 @@ class ConfigManager:
         
     def parse_tool_config(self, config_path: Path) -> Dict[str, Any]:
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            return self._parse_config_content(content)
+            wct_config = load_wct_config(config_path)
+            if wct_config is None:
+                print(f"配置文件不存在: {config_path}")
+                return {}
+            return self._config_from_model(wct_config)
         except Exception as e:
             print(f"解析配置文件失败 {config_path}: {e}")
             return {}
             
-    def _parse_config_content(self, content: str) -> Dict[str, Any]:
+    def _config_from_model(self, wct_config: WctConfig) -> Dict[str, Any]:
+        """按 常用参数/全部参数 与 勾选项/输入项 分组，其他段与子段中的参数不计入"""
         config = {
             'common_params': {'checkboxes': [], 'inputs': []},
             'all_params': {'checkboxes': [], 'inputs': []}
         }
-        
-        lines = [line.strip() for line in content.split('\n') if line.strip()]
-        current_section = None
-        current_type = None
-        
-        for line in lines:
-            if line.startswith('%常用参数'):
-                current_section = 'common_params'
-                continue
-            elif line.startswith('%全部参数'):
-                current_section = 'all_params'
-                continue
-            elif line.startswith('%%勾选项'):
-                current_type = 'checkboxes'
-                continue
-            elif line.startswith('%%输入项'):
-                current_type = 'inputs'
-                continue
-            elif line.startswith('%') or line.startswith('%%'):
-                continue
-                
-            if current_section and current_type and '=' in line:
-                param_info = self._parse_param_line(line)
-                if param_info:
-                    config[current_section][current_type].append(param_info)
+        sections = {'常用参数': 'common_params', '全部参数': 'all_params'}
+        kinds = {CHECKBOX_KIND: 'checkboxes', INPUT_KIND: 'inputs'}
+        
+        for parameter in wct_config.parameters:
+            section = sections.get(parameter.section)
+            kind = kinds.get(parameter.kind)
+            if section and kind:
+                config[section][kind].append({
+                    'param': parameter.name,
+                    'display_name': parameter.display_name,
+                    'description': parameter.description,
+                    'required': parameter.required
+                })
                     
         return config
         
-    def _parse_param_line(self, line: str) -> Dict[str, str]:
-        parts = line.split('=')
-        if len(parts) >= 4:
-            return {
-                'param': parts[0].strip(),
-                'display_name': parts[1].strip(),
-                'description': parts[2].strip(),
-                'required': parts[3].strip() == '1'
-            }
-        return None
-        
     def get_tool_command(self, tool_name: str) -> str:
         return self.app_config.get('tool_command', {}).get(tool_name, '')
         
@@ -3,10 +3,11 @@ from PySide6.QtWidgets import (
     QFrame, QSizePolicy, QLabel, QLineEdit, QComboBox,
     QVBoxLayout
 )
-from PySide6.QtCore import Qt, Signal, QSize
+from PySide6.QtCore import Qt, Signal, QSize, QTimer
 from PySide6.QtGui import QFont, QPalette
 from .category_manager import CategoryManager
 from .category_config_dialog import CategoryConfigDialog
+from .terminal_performance import PerformanceConfig
 
 class ToolButton(QPushButton):
     def __init__(self, tool_name, display_name):
@@ -32,6 +33,11 @@ class FloatingToolBar(QFrame):
         self.filtered_tools = []
         self.tool_scanner = None
         self.category_manager = CategoryManager()
+        self.pending_buttons = []
+        self.button_timer = QTimer(self)
+        self.button_timer.setSingleShot(True)
+        self.button_timer.setInterval(0)
+        self.button_timer.timeout.connect(self.add_pending_buttons)
         self.init_ui()
         
     def init_ui(self):
@@ -145,9 +151,9 @@ class FloatingToolBar(QFrame):
         self.scroll_layout.addStretch()
             
     def update_tools(self, tool_infos, tool_scanner=None):
-        self.tools = tool_infos
+        self.tools = list(tool_infos)
         self.tool_scanner = tool_scanner
-        self.filtered_tools = tool_infos.copy()
+        self.filtered_tools = self.tools.copy()
         
 
         self.update_categories()
@@ -176,16 +182,99 @@ class FloatingToolBar(QFrame):
     
     def display_tools(self, tool_infos):
         self.clear_buttons()
+        self.scroll_layout.addStretch()
         
-        for tool_info in tool_infos:
-            display_name = tool_info.display_name or tool_info.name
-            button = ToolButton(tool_info.name, display_name)
-            button.clicked.connect(lambda checked, name=tool_info.name: self.on_tool_clicked(name))
+        self.pending_buttons = list(tool_infos)
+        self.add_pending_buttons()
+        
+    def add_pending_buttons(self):
+        """每轮事件循环只创建 TOOLBAR_BUTTON_BATCH 个按钮，工具再多也能立即完成首次绘制"""
+        batch = self.pending_buttons[:PerformanceConfig.TOOLBAR_BUTTON_BATCH]
+        del self.pending_buttons[:len(batch)]
+        for tool_info in batch:
+            self.add_tool_button(tool_info)
             
-            self.tool_buttons.append(button)
+        if self.pending_buttons:
+            self.button_timer.start()
+        
+    def add_tool_button(self, tool_info):
+        """在末尾的伸缩项之前添加工具按钮"""
+        display_name = tool_info.display_name or tool_info.name
+        button = ToolButton(tool_info.name, display_name)
+        button.setChecked(tool_info.name == self.current_tool)
+        button.clicked.connect(lambda checked, name=tool_info.name: self.on_tool_clicked(name))
+        
+        self.tool_buttons.append(button)
+        count = self.scroll_layout.count()
+        if count and self.scroll_layout.itemAt(count - 1).spacerItem():
+            self.scroll_layout.insertWidget(count - 1, button)
+        else:
             self.scroll_layout.addWidget(button)
             
-        self.scroll_layout.addStretch()
+    def has_active_filter(self):
+        return bool(self.search_input.text()) or (
+            self.category_combo.currentText() != "全部分类" and self.category_combo.currentData())
+        
+    def append_tools(self, tool_infos, tool_scanner=None):
+        """扫描过程中追加新工具或替换配置变化的工具，没有筛选条件时只增量添加按钮"""
+        if tool_scanner is not None:
+            self.tool_scanner = tool_scanner
+            
+        positions = {tool_info.name: i for i, tool_info in enumerate(self.tools)}
+        added = []
+        replaced = {}
+        for tool_info in tool_infos:
+            position = positions.get(tool_info.name)
+            if position is None:
+                positions[tool_info.name] = len(self.tools)
+                self.tools.append(tool_info)
+                added.append(tool_info)
+            else:
+                self.tools[position] = tool_info
+                replaced[tool_info.name] = tool_info
+                
+        if self.has_active_filter():
+            self.filter_tools()
+            return
+            
+        if replaced:
+            self.replace_tool_buttons(replaced)
+        self.filtered_tools.extend(added)
+        self.pending_buttons.extend(added)
+        self.add_pending_buttons()
+        
+    def replace_tool_buttons(self, replaced):
+        """配置变化的工具只更新对应按钮的文字，不重建工具栏"""
+        self.filtered_tools = [replaced.get(tool_info.name, tool_info) for tool_info in self.filtered_tools]
+        self.pending_buttons = [replaced.get(tool_info.name, tool_info) for tool_info in self.pending_buttons]
+        for button in self.tool_buttons:
+            tool_info = replaced.get(button.tool_name)
+            if tool_info is not None:
+                button.display_name = tool_info.display_name or tool_info.name
+                button.setText(button.display_name)
+            
+    def remove_tools(self, tool_names):
+        """移除已不存在的工具，没有筛选条件时只删除对应按钮"""
+        tool_names = set(tool_names)
+        if not tool_names:
+            return
+        self.tools = [tool_info for tool_info in self.tools if tool_info.name not in tool_names]
+        if self.current_tool in tool_names:
+            self.current_tool = None
+        if self.has_active_filter():
+            self.filter_tools()
+            return
+            
+        self.filtered_tools = [tool_info for tool_info in self.filtered_tools if tool_info.name not in tool_names]
+        self.pending_buttons = [tool_info for tool_info in self.pending_buttons if tool_info.name not in tool_names]
+        kept = []
+        for button in self.tool_buttons:
+            if button.tool_name in tool_names:
+                self.scroll_layout.removeWidget(button)
+                button.deleteLater()
+            else:
+                kept.append(button)
+        self.tool_buttons = kept
 
     def on_search_text_changed(self, text):
         self.filter_tools()
@@ -199,25 +288,27 @@ class FloatingToolBar(QFrame):
         selected_category_id = self.category_combo.currentData()
         
 
-        filtered = []
-        for tool_info in self.tools:
-
-            text_match = True
-            if search_text:
-                text_match = (
+        tools = self.tools
+        if search_text:
+            if self.tool_scanner is not None and hasattr(self.tool_scanner, 'search_index'):
+                tools = self.tool_scanner.search_index.search_tools(search_text, self.tools)
+            else:
+                tools = [tool_info for tool_info in self.tools if (
                     search_text in tool_info.name.lower() or
                     search_text in tool_info.display_name.lower() or
                     search_text in tool_info.description.lower() or
                     any(search_text in tag.lower() for tag in tool_info.tags)
-                )
-            
+                )]
+        
+        filtered = []
+        for tool_info in tools:
 
             category_match = True
             if selected_category_display != "全部分类" and selected_category_id:
                 tool_category = self.get_tool_display_category(tool_info)
                 category_match = tool_category == selected_category_id
             
-            if text_match and category_match:
+            if category_match:
                 filtered.append(tool_info)
         
         self.filtered_tools = filtered
@@ -240,6 +331,8 @@ class FloatingToolBar(QFrame):
         self.filter_tools()
             
     def clear_buttons(self):
+        self.button_timer.stop()
+        self.pending_buttons = []
 
         for button in self.tool_buttons:
             button.deleteLater()
@@ -11,7 +11,9 @@ import json
 from .floating_toolbar import FloatingToolBar
 from .tool_operation import ToolOperationWidget
 from .terminal_area import TerminalArea
-from .tool_scanner import ToolScanner
+from .tool_scanner import ToolScanner, ToolScanWorker, TOOL_ADDED, TOOL_UPDATED, TOOL_REMOVED
+from .tool_watcher import ToolDirectoryWatcher
+from .parameter_document import ParameterDocument
 from .config import ConfigManager
 from .utils import get_system_font, get_project_root
 
@@ -38,6 +40,10 @@ class MainWindow(QMainWindow):
         
 
         self.tool_scanner = ToolScanner()
+        self.tool_scan_worker = None
+        self.tool_watcher = ToolDirectoryWatcher(self)
+        self.tool_watcher.tools_changed.connect(self.on_tools_changed)
+        self.pending_tool_changes = set()
         
 
         
@@ -120,6 +126,10 @@ class MainWindow(QMainWindow):
         self.main_tabs.addTab(tool_widget, "工具操作")
         
 
+        self.search_widget = SearchWidget()
+        self.main_tabs.addTab(self.search_widget, "全局搜索")
+        
+
 
 
         
@@ -160,6 +170,8 @@ class MainWindow(QMainWindow):
     def setup_connections(self):
 
         self.tool_operation.tool_execution_requested.connect(self.execute_tool)
+        self.search_widget.search_requested.connect(self.perform_search)
+        self.search_widget.result_selected.connect(self.on_search_result_selected)
         
 
         self.terminal_area.tool_execution_started.connect(self.on_tool_execution_started)
@@ -177,19 +189,113 @@ class MainWindow(QMainWindow):
         self.connect_update_manager()
         
     def load_tools(self):
+        """先显示目录缓存中的工具，再在后台线程中扫描工具目录，扫描到的工具分批加入工具栏"""
         try:
             tools_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tools")
-            self.tool_scanner.scan_tools(tools_dir)
-            
-
-            if hasattr(self, 'floating_toolbar'):
-                self.floating_toolbar.update_tools(self.tool_scanner.get_all_tools(), self.tool_scanner)
+            if self.tool_scanner.load_cached_catalog(tools_dir):
+                self.show_loaded_tools()
+            elif hasattr(self, 'floating_toolbar'):
+                self.floating_toolbar.update_tools([], self.tool_scanner)
                 
-            self.status_bar.showMessage(f"已加载 {len(self.tool_scanner.get_all_tools())} 个工具")
+            self.start_tool_scan(tools_dir)
             
         except Exception as e:
             QMessageBox.warning(self, "警告", f"加载工具时出错: {str(e)}")
             
+    def start_tool_scan(self, tools_dir):
+        if self.tool_scan_worker is not None:
+            self.tool_scan_worker.requestInterruption()
+            
+        self.status_bar.showMessage("正在扫描工具...")
+        worker = ToolScanWorker(self.tool_scanner, tools_dir, self)
+        worker.tools_found.connect(self.on_tools_found)
+        worker.scan_finished.connect(self.on_tool_scan_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.tool_scan_worker = worker
+        self.tool_scanner.begin_scan(tools_dir)
+        worker.start()
+        
+    def on_tools_found(self, results):
+        """合并一批扫描结果，工具栏只追加新增或变化的工具"""
+        if self.sender() is not self.tool_scan_worker:
+            return
+            
+        changed = self.tool_scanner.apply_scan_results(results)
+        if changed and hasattr(self, 'floating_toolbar'):
+            self.floating_toolbar.append_tools(changed, self.tool_scanner)
+        self.status_bar.showMessage(f"正在扫描工具... 已发现 {len(self.tool_scanner.scan_catalog)} 个")
+        
+    def on_tool_scan_finished(self, completed):
+        if self.sender() is not self.tool_scan_worker:
+            return
+            
+        self.tool_scan_worker = None
+        if not completed:
+            self.status_bar.showMessage("扫描工具时出错")
+            return
+            
+        removed = self.tool_scanner.finish_scan()
+        if removed and hasattr(self, 'floating_toolbar'):
+            self.floating_toolbar.remove_tools(removed)
+        self.status_bar.showMessage(f"已加载 {len(self.tool_scanner.get_all_tools())} 个工具")
+        
+        if self.tool_watcher.tools_directory != self.tool_scanner.tools_directory:
+            self.tool_watcher.watch(self.tool_scanner.tools_directory)
+        if self.pending_tool_changes:
+            self.on_tools_changed([])
+            
+    def on_tools_changed(self, tool_names):
+        """工具目录监视器报告变化后逐个重新读取工具，就地更新工具栏与当前打开的参数面板"""
+        if self.tool_scan_worker is not None:
+            # 全量扫描进行中，等扫描完成后再处理
+            self.pending_tool_changes.update(tool_names)
+            return
+        tool_names = sorted(self.pending_tool_changes.union(tool_names))
+        self.pending_tool_changes.clear()
+        
+        changed = []
+        removed = []
+        for tool_name in tool_names:
+            try:
+                event, tool_info = self.tool_scanner.apply_tool_change(tool_name)
+            except Exception as e:
+                print(f"重新读取工具 {tool_name} 时出错: {e}")
+                continue
+                
+            if event in (TOOL_ADDED, TOOL_UPDATED):
+                changed.append(tool_info)
+                print(f"工具已{'添加' if event == TOOL_ADDED else '更新'}: {tool_info.display_name} ({tool_name})")
+            elif event == TOOL_REMOVED:
+                removed.append(tool_name)
+                print(f"工具已移除: {tool_name}")
+                
+        if not changed and not removed:
+            return
+            
+        if hasattr(self, 'floating_toolbar'):
+            if changed:
+                self.floating_toolbar.append_tools(changed, self.tool_scanner)
+            if removed:
+                self.floating_toolbar.remove_tools(removed)
+                
+        current_tool = getattr(self.tool_operation, 'current_tool', None)
+        if current_tool is not None:
+            for tool_info in changed:
+                if tool_info.name == current_tool.name:
+                    self.tool_operation.refresh_tool(tool_info)
+            if current_tool.name in removed:
+                self.tool_operation.run_button.setEnabled(False)
+                self.status_bar.showMessage(f"工具 {current_tool.display_name} 已被移除")
+                return
+                
+        self.status_bar.showMessage(f"已加载 {len(self.tool_scanner.get_all_tools())} 个工具")
+            
+    def show_loaded_tools(self):
+        if hasattr(self, 'floating_toolbar'):
+            self.floating_toolbar.update_tools(self.tool_scanner.get_all_tools(), self.tool_scanner)
+            
+        self.status_bar.showMessage(f"已加载 {len(self.tool_scanner.get_all_tools())} 个工具")
+            
     def execute_tool(self, tool_info, parameters):
         try:
             self.terminal_area.execute_tool(tool_info, parameters)
@@ -262,6 +368,10 @@ class MainWindow(QMainWindow):
             'parameters': self.get_tool_parameters(),
             'outputs': self.get_terminal_outputs()
         }
+        if hasattr(self.tool_scanner, 'search_index'):
+            index = self.tool_scanner.search_index
+            data_sources['tools'] = index.indexed_tools(data_sources['tools'])
+            data_sources['parameters'] = index.indexed_parameters(data_sources['parameters'])
         
         if self.search_widget:
             self.search_widget.perform_search(query, search_options, data_sources)
@@ -283,8 +393,10 @@ class MainWindow(QMainWindow):
                     self.tool_operation.load_tool(tool_info)
                     self.tool_operation.focus_parameter(param_name)
         elif result.type == 'output':
-
-            self.terminal_area.show_output_content(result.metadata.get('full_content', ''))
+            tab_id = result.metadata.get('tab_id')
+            if tab_id and hasattr(self.terminal_area, 'show_output_line'):
+                self.main_tabs.setCurrentIndex(0)
+                self.terminal_area.show_output_line(tab_id, result.metadata.get('line_index', 0))
             
         self.status_bar.showMessage(f"已选择搜索结果: {result.title}")
         
@@ -431,8 +543,14 @@ class MainWindow(QMainWindow):
             self.config_manager.save_app_config()
             
 
+            errors = ParameterDocument.flush_all()
+            if errors:
+                QMessageBox.warning(self, "保存失败", "以下参数配置未能保存：\n" + "\n".join(errors))
+            
+
             if hasattr(self, 'terminal_area'):
                 self.terminal_area.stop_all_processes()
+                self.terminal_area.stop_search_workers()
             
 
             if hasattr(self, 'update_manager'):
@@ -0,0 +1,250 @@
+"""
+输出历史模块
+按标签页记录去除ANSI后的终端输出行，分块紧凑保存，封存的块建立三元组索引，供全局搜索跨标签页检索
+"""
+
+import sys
+import time
+import threading
+from array import array
+from bisect import bisect_right
+from collections import deque
+from typing import List, Optional
+
+from .terminal_performance import PerformanceConfig
+from .output_index import TrigramIndex, required_literals
+
+
+class OutputHistoryChunk:
+    """一段连续的历史行
+
+    整块文本以 '\\n' 拼接为一个字符串，行起点与时间戳分别保存在 array 中。
+    封存后不再修改，可以在搜索线程中直接读取；serial 为封存序号，临时块为 -1。
+    """
+
+    __slots__ = ('source_id', 'source_name', 'tool_name', 'first_line', 'text', 'starts',
+                 'timestamps', 'nbytes', 'serial')
+
+    def __init__(self, source_id: str, source_name: str, tool_name: Optional[str], first_line: int,
+                 lines: List[str], timestamps):
+        self.source_id = source_id
+        self.source_name = source_name
+        self.tool_name = tool_name
+        self.first_line = first_line
+        self.serial = -1
+        self.text = '\n'.join(lines)
+        self.starts = array('I')
+        self.timestamps = array('d', timestamps)
+
+        position = 0
+        for line in lines:
+            self.starts.append(position)
+            position += len(line) + 1
+
+        self.nbytes = (sys.getsizeof(self.text) + self.starts.itemsize * len(self.starts) +
+                       self.timestamps.itemsize * len(self.timestamps))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def line_text(self, index: int) -> str:
+        """块内第index行的文本"""
+        start = self.starts[index]
+        end = self.starts[index + 1] - 1 if index + 1 < len(self.starts) else len(self.text)
+        return self.text[start:end]
+
+    def line_index(self, position: int) -> int:
+        """块文本内的字符位置所在的行"""
+        return bisect_right(self.starts, position) - 1
+
+    def lines(self) -> List[str]:
+        return self.text.split('\n')
+
+
+class OutputSource:
+    """单个标签页的历史：已封存的块与正在累积的行"""
+
+    __slots__ = ('source_id', 'source_name', 'tool_name', 'chunks', 'lines', 'timestamps', 'next_line')
+
+    def __init__(self, source_id: str, source_name: str):
+        self.source_id = source_id
+        self.source_name = source_name
+        self.tool_name = None
+        self.chunks = deque()
+        self.lines = []
+        self.timestamps = []
+        self.next_line = 0
+
+    def open_chunk(self) -> Optional[OutputHistoryChunk]:
+        """把正在累积的行包装为临时块"""
+        if not self.lines:
+            return None
+        return OutputHistoryChunk(self.source_id, self.source_name, self.tool_name,
+                                  self.next_line - len(self.lines), self.lines, self.timestamps)
+
+
+class OutputHistorySnapshot:
+    """某一时刻的历史块列表，可以直接迭代，也可以借助三元组索引只取可能匹配的块"""
+
+    def __init__(self, chunks: List[OutputHistoryChunk], index: TrigramIndex):
+        self.chunks = chunks
+        self.index = index
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def candidates(self, query: str, use_regex: bool = False) -> List[OutputHistoryChunk]:
+        """返回可能包含匹配的块，尚未建立索引的块与临时块总是保留，顺序与快照一致"""
+        serials = self.index.candidate_serials(required_literals(query, use_regex))
+        if serials is None:
+            return self.chunks
+        return [chunk for chunk in self.chunks
+                if chunk.serial in serials or not self.index.is_indexed(chunk)]
+
+
+class OutputHistory:
+    """全局输出历史服务
+
+    每个标签页的输出行按 OUTPUT_HISTORY_CHUNK_LINES 行封存为块，所有标签页共享
+    OUTPUT_HISTORY_BUDGET 内存预算，超出时淘汰最早封存的块。
+    chunks() 返回块列表的快照，搜索线程遍历快照即可，不需要复制任何文本。
+    封存的块交给 TrigramIndex 在后台线程建立索引，snapshot() 返回的快照可据此缩小搜索范围。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """获取全局共享的输出历史"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self, max_bytes: int = None, chunk_lines: int = None):
+        self.max_bytes = max_bytes or PerformanceConfig.OUTPUT_HISTORY_BUDGET
+        self.chunk_lines = chunk_lines or PerformanceConfig.OUTPUT_HISTORY_CHUNK_LINES
+        self.sources = {}
+        self.sealed = deque()
+        self.sealed_bytes = 0
+        self.next_serial = 0
+        self.index = TrigramIndex()
+        self.lock = threading.Lock()
+
+    def append_lines(self, source_id: str, lines: List[str], first_line: int = None,
+                     source_name: str = None, tool_name: str = None, timestamp: float = None):
+        """记录一批已完成的行
+
+        first_line 为第一行在该标签页中的行号，不连续时（例如输出被淘汰）先封存已累积的行。
+        """
+        if not lines:
+            return
+        timestamp = timestamp or time.time()
+
+        with self.lock:
+            source = self.sources.get(source_id)
+            if source is None:
+                source = self.sources[source_id] = OutputSource(source_id, source_name or source_id)
+                if first_line is not None:
+                    source.next_line = first_line
+            if source_name:
+                source.source_name = source_name
+            if tool_name != source.tool_name or (first_line is not None and first_line != source.next_line):
+                self._seal(source)
+                source.tool_name = tool_name
+                if first_line is not None:
+                    source.next_line = first_line
+
+            for line in lines:
+                source.lines.append(line)
+                source.timestamps.append(timestamp)
+                source.next_line += 1
+                if len(source.lines) >= self.chunk_lines:
+                    self._seal(source)
+
+            self._enforce_budget()
+
+    def _seal(self, source: OutputSource):
+        chunk = source.open_chunk()
+        if chunk is None:
+            return
+        source.chunks.append(chunk)
+        source.lines = []
+        source.timestamps = []
+        chunk.serial = self.next_serial
+        self.next_serial += 1
+        self.sealed.append(chunk)
+        self.sealed_bytes += chunk.nbytes
+        self.index.schedule(chunk)
+
+    def _enforce_budget(self):
+        while self.sealed_bytes > self.max_bytes and self.sealed:
+            chunk = self.sealed.popleft()
+            self.sealed_bytes -= chunk.nbytes
+            self.index.discard(chunk)
+            source = self.sources.get(chunk.source_id)
+            if source is not None and source.chunks and source.chunks[0] is chunk:
+                source.chunks.popleft()
+
+    def clear_source(self, source_id: str):
+        """清空标签页的历史，之后的行号重新从0开始"""
+        with self.lock:
+            source = self.sources.get(source_id)
+            if source is None:
+                return
+            self._drop_chunks(source)
+            source.lines = []
+            source.timestamps = []
+            source.next_line = 0
+
+    def remove_source(self, source_id: str):
+        """移除已关闭标签页的历史"""
+        with self.lock:
+            source = self.sources.pop(source_id, None)
+            if source is not None:
+                self._drop_chunks(source)
+
+    def _drop_chunks(self, source: OutputSource):
+        if not source.chunks:
+            return
+        dropped = set(map(id, source.chunks))
+        self.sealed = deque(chunk for chunk in self.sealed if id(chunk) not in dropped)
+        self.sealed_bytes = sum(chunk.nbytes for chunk in self.sealed)
+        for chunk in source.chunks:
+            self.index.discard(chunk)
+        source.chunks.clear()
+
+    def chunks(self, source_id: str = None) -> List[OutputHistoryChunk]:
+        """返回历史块快照，按标签页分组、组内按时间排序；正在累积的行包装为临时块"""
+        with self.lock:
+            sources = [self.sources[source_id]] if source_id in self.sources else (
+                [] if source_id else list(self.sources.values()))
+            result = []
+            for source in sources:
+                result.extend(source.chunks)
+                chunk = source.open_chunk()
+                if chunk is not None:
+                    result.append(chunk)
+            return result
+
+    def snapshot(self, source_id: str = None) -> OutputHistorySnapshot:
+        """返回带索引的历史块快照"""
+        return OutputHistorySnapshot(self.chunks(source_id), self.index)
+
+    def line_count(self) -> int:
+        with self.lock:
+            return sum(sum(len(chunk) for chunk in source.chunks) + len(source.lines)
+                       for source in self.sources.values())
+
+    def memory_usage(self) -> int:
+        """已封存块占用的近似字节数"""
+        return self.sealed_bytes
+
+    def set_max_bytes(self, max_bytes: int):
+        with self.lock:
+            self.max_bytes = max_bytes
+            self._enforce_budget()
@@ -0,0 +1,194 @@
+"""
+输出索引模块
+在后台线程中为输出历史的封存块增量建立三元组倒排索引，搜索时先用索引缩小候选块，再做精确匹配
+"""
+
+import queue
+import threading
+from array import array
+from typing import List, Optional
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+
+def trigrams(text: str) -> set:
+    """文本中所有不同的三字符子串"""
+    return set(map(''.join, zip(text, text[1:], text[2:])))
+
+
+MAX_ALTERNATIVES = 16
+
+
+def _sequence_alternatives(items) -> List[List[str]]:
+    """分析正则序列，返回若干备选组合，匹配至少满足其中一个组合（包含组合内全部子串）
+
+    连续的字面字符拼成子串，分组向内展开，分支展开为多个组合，其余结构直接跳过。
+    """
+    alternatives = [[]]
+    current = []
+
+    def flush():
+        if current:
+            literal = ''.join(current)
+            for alternative in alternatives:
+                alternative.append(literal)
+            current.clear()
+
+    for op, argument in items:
+        if op is sre_parse.LITERAL:
+            current.append(chr(argument))
+            continue
+        flush()
+
+        if op is sre_parse.SUBPATTERN:
+            nested = _sequence_alternatives(argument[-1])
+        elif op is sre_parse.BRANCH:
+            nested = []
+            for branch in argument[1]:
+                nested.extend(_sequence_alternatives(branch))
+        else:
+            continue
+
+        nested = [[literal for literal in alternative if len(literal) >= 3] for alternative in nested]
+        if any(not alternative for alternative in nested):
+            continue
+        if len(alternatives) * len(nested) > MAX_ALTERNATIVES:
+            continue
+        alternatives = [alternative + extra for alternative in alternatives for extra in nested]
+
+    flush()
+    return alternatives
+
+
+def required_literals(query: str, use_regex: bool) -> List[List[str]]:
+    """提取匹配必然包含的字面子串（小写），长度不足3的子串没有过滤作用会被丢弃
+
+    返回备选组合列表，任何匹配至少包含其中一个组合的全部子串；
+    空列表表示无法用索引过滤，例如查询过短或正则无法分析。
+    """
+    if not use_regex:
+        return [[query.lower()]] if len(query) >= 3 else []
+
+    try:
+        parsed = sre_parse.parse(query)
+    except Exception:
+        return []
+
+    result = []
+    for alternative in _sequence_alternatives(parsed):
+        literals = [literal.lower() for literal in alternative if len(literal) >= 3]
+        if not literals:
+            return []
+        result.append(literals)
+    return result
+
+
+class TrigramIndex:
+    """块级三元组倒排索引
+
+    每个三元组对应一个按块序号升序的 array('I')，块按封存顺序建立索引，因此追加即保持有序。
+    索引不区分大小写，只用于排除不可能匹配的块，最终结果由调用方用编译好的模式验证。
+    被淘汰的块只从存活表中移除，失效的倒排项累积到一定数量后在索引线程中统一清理。
+    """
+
+    COMPACT_MIN_DEAD = 64
+
+    def __init__(self):
+        self.postings = {}
+        self.chunks = {}
+        self.discarded = set()
+        self.dead_count = 0
+        self.lock = threading.Lock()
+        self.pending = queue.SimpleQueue()
+        self.thread = None
+
+    def schedule(self, chunk):
+        """把新封存的块交给索引线程"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="wct-output-indexer", daemon=True)
+            self.thread.start()
+        self.pending.put(chunk)
+
+    def _run(self):
+        while True:
+            chunk = self.pending.get()
+            try:
+                self.add(chunk)
+                if self.dead_count >= max(self.COMPACT_MIN_DEAD, len(self.chunks)):
+                    self.compact()
+            except Exception as e:
+                print(f"建立输出索引失败: {e}")
+
+    def add(self, chunk):
+        """为块建立索引，三元组在锁外计算"""
+        grams = trigrams(chunk.text.lower())
+        with self.lock:
+            if chunk.serial in self.discarded:
+                self.discarded.discard(chunk.serial)
+                return
+            serial = chunk.serial
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    self.postings[gram] = array('I', (serial,))
+                else:
+                    posting.append(serial)
+            self.chunks[serial] = chunk
+
+    def discard(self, chunk):
+        """块被淘汰或清空后调用"""
+        with self.lock:
+            if self.chunks.pop(chunk.serial, None) is not None:
+                self.dead_count += 1
+            else:
+                self.discarded.add(chunk.serial)
+
+    def compact(self):
+        """清理已淘汰块的倒排项"""
+        with self.lock:
+            live = self.chunks
+            postings = {}
+            for gram, posting in self.postings.items():
+                kept = array('I', (serial for serial in posting if serial in live))
+                if kept:
+                    postings[gram] = kept
+            self.postings = postings
+            self.dead_count = 0
+
+    def is_indexed(self, chunk) -> bool:
+        return chunk.serial in self.chunks
+
+    def candidate_serials(self, alternatives: List[List[str]]) -> Optional[set]:
+        """返回可能满足任一备选组合的已索引块序号，无法过滤时返回 None"""
+        if not alternatives:
+            return None
+
+        result = set()
+        with self.lock:
+            for literals in alternatives:
+                grams = set()
+                for literal in literals:
+                    grams.update(trigrams(literal))
+                if not grams:
+                    return None
+                result.update(self._intersect(grams))
+        return result
+
+    def _intersect(self, grams: set) -> set:
+        postings = []
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
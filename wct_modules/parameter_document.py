@@ -0,0 +1,153 @@
+"""
+参数文档模块
+工具配置文件在内存中的可编辑副本：编辑只修改内存中的行并发出变化通知，
+短时间内的多次编辑合并后由后台写入线程以"写临时文件再重命名"的方式写回磁盘
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from PySide6.QtCore import Qt, QObject, QTimer, Signal
+
+from .terminal_performance import PerformanceConfig
+from .wct_config import WctConfig, WctConfigCache, load_wct_config, parse_wct_config
+
+
+def split_lines(text: str) -> List[str]:
+    """按换行符拆分并保留换行符，与 readlines() 的结果一致"""
+    lines = [line + '\n' for line in text.split('\n')]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+class ParameterDocument(QObject):
+    """一个 wct_config.txt 的可编辑内存模型
+
+    同一配置文件在进程内只有一个文档，所有 ParameterManager 共享，未写回的编辑不会被其他实例读到旧内容。
+    没有未写回的编辑时，model() 通过共享的解析缓存确认磁盘文件没有被外部修改；
+    有未写回的编辑时以内存内容为准，随后的写回会覆盖外部修改。
+    写回失败时编辑仍保留在内存中并重新标记为未写回，由 write_failed 通知界面，下一次写回时重试。
+    """
+
+    section_changed = Signal(str)
+    write_failed = Signal(str)
+
+    _documents = {}
+    _documents_lock = threading.Lock()
+    _writer = None
+
+    @classmethod
+    def for_file(cls, config_file) -> 'ParameterDocument':
+        """获取配置文件对应的共享文档，首次调用须在GUI线程中"""
+        key = os.fspath(config_file)
+        with cls._documents_lock:
+            document = cls._documents.get(key)
+            if document is None:
+                document = cls._documents[key] = cls(config_file)
+            return document
+
+    @classmethod
+    def writer(cls) -> ThreadPoolExecutor:
+        """单线程写入器，保证同一文件的多次写回按顺序完成"""
+        with cls._documents_lock:
+            if cls._writer is None:
+                cls._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wct-config-writer")
+            return cls._writer
+
+    @classmethod
+    def flush_all(cls) -> List[str]:
+        """立即写回全部文档的编辑并等待写入完成，应用退出前调用，返回写回失败的错误信息"""
+        with cls._documents_lock:
+            documents = list(cls._documents.values())
+        pending = [(document, document.flush()) for document in documents]
+        pending = [(document, future) for document, future in pending if future is not None]
+        wait([future for _, future in pending])
+
+        errors = []
+        for document, future in pending:
+            error = future.result()
+            if error is not None:
+                document.dirty = True
+                errors.append(error)
+        return errors
+
+    def __init__(self, config_file):
+        super().__init__()
+        self.config_file = Path(config_file)
+        self.config: Optional[WctConfig] = None
+        self.lines: Optional[List[str]] = None
+        self.dirty = False
+        self.pending_write = None
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(PerformanceConfig.PARAMETER_WRITE_DEBOUNCE)
+        self.save_timer.timeout.connect(self.flush)
+        # 写入线程中发出，在GUI线程中恢复未写回标记
+        self.write_failed.connect(self._on_write_failed, Qt.QueuedConnection)
+
+    def is_writing(self) -> bool:
+        return self.pending_write is not None and not self.pending_write.done()
+
+    def model(self) -> Optional[WctConfig]:
+        """当前的解析模型，配置文件不存在时返回 None"""
+        if not self.dirty and not self.is_writing():
+            try:
+                config = load_wct_config(self.config_file)
+            except Exception as e:
+                print(f"读取参数配置失败: {e}")
+                config = None
+            if config is not self.config:
+                self.config = config
+                self.lines = split_lines(config.text) if config is not None else None
+        return self.config
+
+    def get_lines(self) -> Optional[List[str]]:
+        """配置文件各行（含换行符）的副本，供编辑方法修改后交回 set_lines"""
+        if self.model() is None:
+            return None
+        return list(self.lines)
+
+    def set_lines(self, lines: List[str], sections: Iterable[str]):
+        """替换内存中的内容，通知受影响的段，并安排延迟写回"""
+        self.lines = list(lines)
+        self.config = parse_wct_config(''.join(self.lines))
+        self.dirty = True
+        self.save_timer.start()
+        for section in dict.fromkeys(sections):
+            self.section_changed.emit(section)
+
+    def flush(self):
+        """把未写回的编辑交给写入线程，返回对应的 Future，没有需要写回的内容时返回 None"""
+        self.save_timer.stop()
+        if not self.dirty:
+            return self.pending_write if self.is_writing() else None
+        self.dirty = False
+        self.pending_write = self.writer().submit(self._write, self.config)
+        return self.pending_write
+
+    def _write(self, config: WctConfig) -> Optional[str]:
+        """在写入线程中写回，成功返回 None，失败返回错误信息并发出 write_failed"""
+        temp_file = self.config_file.with_name(self.config_file.name + '.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(config.text)
+            os.replace(temp_file, self.config_file)
+            # 写入的内容就是当前模型，直接登记到共享缓存，不必重新读取与解析
+            WctConfigCache.instance().store(self.config_file, config)
+        except OSError as e:
+            error = f"写回参数配置 {self.config_file} 失败: {e}"
+            print(error)
+            WctConfigCache.instance().invalidate(self.config_file)
+            self.write_failed.emit(error)
+            return error
+        return None
+
+    def _on_write_failed(self, error: str):
+        """内存中的内容没有写到磁盘，保留为未写回，下一次编辑或退出时重新写回"""
+        self.dirty = True
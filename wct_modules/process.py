@@ -4,22 +4,49 @@ import subprocess
 import threading
 import queue
 import signal
+import selectors
+import heapq
+import itertools
 from pathlib import Path
-from PySide6.QtCore import QObject, Signal, QTimer, QThread
-from .utils import is_windows, is_linux, is_macos, create_startup_info, clean_ansi_codes
+from PySide6.QtCore import Qt, QObject, Signal, QTimer, QThread
+from .utils import (is_windows, is_linux, is_macos, create_startup_info, clean_ansi_codes,
+                    get_configured_process_limits)
+from .terminal_performance import OutputBuffer, BatchRenderer, PerformanceConfig
 
 class ProcessManager(QObject):
     output_received = Signal(str, str)
+    segments_received = Signal(str, object, str)
     process_finished = Signal(str, int)
     process_started = Signal(str)
     error_occurred = Signal(str, str)
+    process_exited = Signal(str, object)
     
     def __init__(self):
         super().__init__()
         self.processes = {}
         self.output_threads = {}
+        self.input_encodings = {}
+        # 退出回调来自反应器或监控线程，进程表只在GUI线程中修改
+        self.process_exited.connect(self._cleanup_process, Qt.QueuedConnection)
         
-    def execute_tool(self, process_id, tool_path, command_parts, working_dir=None):
+
+        self.output_buffer = OutputBuffer()
+        self.batch_renderer = BatchRenderer(self.output_buffer, self)
+        self.batch_renderer.output_ready.connect(self.output_received)
+        self.batch_renderer.segments_ready.connect(self._on_segments_ready)
+        self.batch_renderer.process_finished.connect(self.process_finished)
+        
+    def _on_segments_ready(self, process_id, result, text):
+        try:
+            self.segments_received.emit(process_id, result, text)
+        finally:
+            self.batch_renderer.acknowledge(process_id)
+        
+    def set_output_parser(self, process_id, parser):
+        """设置输出解析器，该进程的输出将在渲染线程中解析后通过 segments_received 交付"""
+        self.batch_renderer.set_parser(process_id, parser)
+        
+    def execute_tool(self, process_id, tool_path, command_parts, working_dir=None, encoding=None):
         try:
             if working_dir is None:
                 working_dir = tool_path
@@ -32,6 +59,9 @@ class ProcessManager(QObject):
             
             if process:
                 self.processes[process_id] = process
+                self.input_encodings[process_id] = encoding or PerformanceConfig.DEFAULT_OUTPUT_ENCODING
+                self.output_buffer.open(process_id, encoding)
+                self.batch_renderer.start()
                 self._start_output_monitoring(process_id, process)
                 self.process_started.emit(process_id)
                 return True
@@ -97,7 +127,6 @@ class ProcessManager(QObject):
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
             bufsize=0,
             startupinfo=startupinfo,
             creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if is_windows() else 0
@@ -152,8 +181,7 @@ class ProcessManager(QObject):
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
+                bufsize=0,
                 startupinfo=startupinfo
             )
             
@@ -164,38 +192,80 @@ class ProcessManager(QObject):
             return None
     
     def _start_output_monitoring(self, process_id, process):
+        output_fd = self._get_output_fd(process)
+        if output_fd is not None and IOReactor.is_supported():
+            IOReactor.instance().watch(
+                process,
+                output_fd,
+                lambda data: self._on_output_data(process_id, data),
+                lambda exit_code: self._on_process_exit(process_id, process, exit_code)
+            )
+            return
+            
         def monitor_output():
             try:
                 if hasattr(process, 'read_output'):
-                    while process.poll() is None:
+                    exited = False
+                    while True:
                         try:
-                            output = process.read_output(1024)
-                            if output:
-                                self.output_received.emit(process_id, output)
+                            output = process.read_output(IOReactor.READ_SIZE)
                         except Exception as e:
                             print(f"读取输出失败: {e}")
                             break
-                else:
-                    for line in iter(process.stdout.readline, ''):
-                        if line:
-                            self.output_received.emit(process_id, line)
-                        if process.poll() is not None:
+                        if output:
+                            if isinstance(output, str):
+                                # winpty 交付的是已解码的文本
+                                self.output_buffer.add(process_id, output)
+                            else:
+                                self.output_buffer.add_bytes(process_id, output)
+                        elif exited:
                             break
+                        elif process.poll() is not None:
+                            # 进程已退出，继续读取直到取走退出前写入的全部输出
+                            exited = True
+                else:
+                    # 管道以二进制无缓冲方式打开，read 有数据即返回，由输出缓冲区按配置的编码增量解码
+                    for data in iter(lambda: process.stdout.read(IOReactor.READ_SIZE), b''):
+                        self.output_buffer.add_bytes(process_id, data)
                             
                 exit_code = process.wait()
-                self.process_finished.emit(process_id, exit_code)
+                self._on_process_exit(process_id, process, exit_code)
                 
             except Exception as e:
                 self.error_occurred.emit(process_id, f"输出监控失败: {str(e)}")
-            finally:
-                if process_id in self.processes:
-                    del self.processes[process_id]
-                if process_id in self.output_threads:
-                    del self.output_threads[process_id]
+                self._on_process_exit(process_id, process, -1)
         
         thread = threading.Thread(target=monitor_output, daemon=True)
         self.output_threads[process_id] = thread
         thread.start()
+        
+    def _get_output_fd(self, process):
+        """获取可被selectors监听的输出文件描述符，winpty等不支持时返回None"""
+        if isinstance(process, PtyProcess):
+            return process.master_fd
+        stdout = getattr(process, 'stdout', None)
+        if stdout is not None and hasattr(stdout, 'fileno'):
+            try:
+                return stdout.fileno()
+            except Exception:
+                return None
+        return None
+        
+    def _on_output_data(self, process_id, data):
+        self.output_buffer.add_bytes(process_id, data)
+        
+    def _on_process_exit(self, process_id, process, exit_code):
+        """进程退出，在反应器或监控线程中调用"""
+        self.process_exited.emit(process_id, process)
+        self.output_buffer.mark_finished(process_id, exit_code)
+        
+    def _cleanup_process(self, process_id, process):
+        """在GUI线程中移除已退出进程的记录，同一ID已经开始的新一次运行不受影响"""
+        if self.processes.get(process_id) is not process:
+            return
+        del self.processes[process_id]
+        self.output_threads.pop(process_id, None)
+        self.input_encodings.pop(process_id, None)
     
     def stop_process(self, process_id):
         if process_id in self.processes:
@@ -220,18 +290,408 @@ class ProcessManager(QObject):
                 print(f"强制终止进程失败: {e}")
     
     def send_input(self, process_id, text):
+        """向进程发送一行输入，管道以二进制方式打开，按该进程的编码编码后写入"""
         if process_id in self.processes:
             try:
                 process = self.processes[process_id]
                 if hasattr(process, 'write'):
-                    process.write(text)
-                elif hasattr(process, 'stdin') and process.stdin:
-                    process.stdin.write(text)
+                    process.write(text + '\r\n')
+                    return True
+                if hasattr(process, 'stdin') and process.stdin:
+                    encoding = self.input_encodings.get(process_id, PerformanceConfig.DEFAULT_OUTPUT_ENCODING)
+                    process.stdin.write((text + '\n').encode(encoding, errors='replace'))
                     process.stdin.flush()
+                    return True
             except Exception as e:
                 print(f"发送输入失败: {e}")
+        return False
+
+class ProcessJob:
+    """等待调度的进程任务"""
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    FINISHED = 'finished'
+    
+    def __init__(self, process_id, tool_name, tool_path, command_parts, working_dir=None,
+                 encoding=None, priority=0):
+        self.process_id = process_id
+        self.tool_name = tool_name
+        self.tool_path = tool_path
+        self.command_parts = command_parts
+        self.working_dir = working_dir
+        self.encoding = encoding
+        self.priority = priority
+        self.state = self.QUEUED
+
+class ProcessSupervisor(QObject):
+    """全局进程调度器
+    
+    持有应用内唯一的ProcessManager，所有进程都以任务形式提交到优先级队列，
+    在全局并发上限与单个工具并发上限之内按优先级启动，进程结束后自动启动排队中的任务。
+    只能在GUI线程中使用。
+    """
+    
+    PRIORITY_LOW = -10
+    PRIORITY_NORMAL = 0
+    PRIORITY_INTERACTIVE = 10
+    
+    job_queued = Signal(str)
+    job_started = Signal(str)
+    job_cancelled = Signal(str)
+    job_failed = Signal(str)
+    queue_changed = Signal(int, int)
+    
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def instance(cls):
+        """获取全局共享的调度器实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
+    def __init__(self):
+        super().__init__()
+        self.manager = ProcessManager()
+        self.queue = []
+        self.sequence = itertools.count()
+        self.jobs = {}
+        self.running = {}
+        self.tool_running = {}
+        self.tool_limits = {}
+        
+        max_concurrent, max_per_tool = get_configured_process_limits()
+        self.max_concurrent = max_concurrent or PerformanceConfig.MAX_CONCURRENT_PROCESSES
+        self.max_per_tool = max_per_tool or PerformanceConfig.MAX_PROCESSES_PER_TOOL
+        
+        self.manager.process_finished.connect(self._on_process_finished)
+        
+    def set_limits(self, max_concurrent=None, max_per_tool=None):
+        """调整全局与单工具默认并发上限，放宽后立即启动可运行的任务"""
+        if max_concurrent:
+            self.max_concurrent = max(1, int(max_concurrent))
+        if max_per_tool:
+            self.max_per_tool = max(1, int(max_per_tool))
+        self._dispatch()
+        
+    def set_tool_limit(self, tool_name, limit):
+        """设置单个工具的并发上限，limit为None时恢复默认值"""
+        if limit:
+            self.tool_limits[tool_name] = max(1, int(limit))
+        else:
+            self.tool_limits.pop(tool_name, None)
+        self._dispatch()
+        
+    def tool_limit(self, tool_name):
+        return self.tool_limits.get(tool_name, self.max_per_tool)
+        
+    def submit(self, process_id, tool_name, tool_path, command_parts, working_dir=None,
+               encoding=None, priority=PRIORITY_NORMAL):
+        """提交任务，有空闲槽位时立即启动，否则进入队列；返回任务对象，可通过state查看结果"""
+        if process_id in self.jobs:
+            raise ValueError(f"进程 {process_id} 已有未完成的任务")
+            
+        job = ProcessJob(process_id, tool_name, tool_path, command_parts, working_dir, encoding, priority)
+        self.jobs[process_id] = job
+        heapq.heappush(self.queue, (-priority, next(self.sequence), job))
+        
+        if not self._dispatch():
+            self.queue_changed.emit(len(self.running), self.queued_count())
+        if job.state == ProcessJob.QUEUED:
+            self.job_queued.emit(process_id)
+        return job
+        
+    def cancel(self, process_id):
+        """取消排队中的任务，已启动的任务不受影响；返回是否取消成功"""
+        job = self.jobs.get(process_id)
+        if job is None or job.state != ProcessJob.QUEUED:
+            return False
+            
+        job.state = ProcessJob.CANCELLED
+        del self.jobs[process_id]
+        self.queue = [entry for entry in self.queue if entry[2] is not job]
+        heapq.heapify(self.queue)
+        
+        self.job_cancelled.emit(process_id)
+        self.queue_changed.emit(len(self.running), self.queued_count())
+        return True
+        
+    def is_queued(self, process_id):
+        job = self.jobs.get(process_id)
+        return job is not None and job.state == ProcessJob.QUEUED
+        
+    def queue_position(self, process_id):
+        """任务在队列中的位置（从1开始），不在队列中时返回0"""
+        for position, (_, _, job) in enumerate(sorted(self.queue), 1):
+            if job.process_id == process_id:
+                return position
+        return 0
+        
+    def queued_count(self):
+        return len(self.queue)
+        
+    def running_count(self):
+        return len(self.running)
+        
+    def queued_jobs(self):
+        """按启动顺序返回排队中的任务"""
+        return [job for _, _, job in sorted(self.queue)]
+        
+    def _dispatch(self):
+        """按优先级启动任务，跳过已达到单工具上限的任务"""
+        started = False
+        skipped = []
+        
+        while self.queue and len(self.running) < self.max_concurrent:
+            entry = heapq.heappop(self.queue)
+            job = entry[2]
+            if self.tool_running.get(job.tool_name, 0) >= self.tool_limit(job.tool_name):
+                skipped.append(entry)
+                continue
+            self._start(job)
+            started = True
+            
+        for entry in skipped:
+            heapq.heappush(self.queue, entry)
+            
+        if started:
+            self.queue_changed.emit(len(self.running), self.queued_count())
+        return started
+            
+    def _start(self, job):
+        job.state = ProcessJob.RUNNING
+        self.running[job.process_id] = job
+        self.tool_running[job.tool_name] = self.tool_running.get(job.tool_name, 0) + 1
+        self.job_started.emit(job.process_id)
+        
+        success = self.manager.execute_tool(
+            job.process_id, job.tool_path, job.command_parts, job.working_dir, job.encoding
+        )
+        if not success:
+            job.state = ProcessJob.FAILED
+            self._release(job.process_id)
+            self.job_failed.emit(job.process_id)
+            
+    def _release(self, process_id):
+        job = self.running.pop(process_id, None)
+        self.jobs.pop(process_id, None)
+        if job is None:
+            return False
+            
+        count = self.tool_running.get(job.tool_name, 0) - 1
+        if count > 0:
+            self.tool_running[job.tool_name] = count
+        else:
+            self.tool_running.pop(job.tool_name, None)
+        return True
+        
+    def _on_process_finished(self, process_id, exit_code):
+        job = self.running.get(process_id)
+        if job is not None:
+            job.state = ProcessJob.FINISHED
+        if self._release(process_id) and not self._dispatch():
+            self.queue_changed.emit(len(self.running), self.queued_count())
+
+class IOReactor:
+    """进程输出I/O反应器
+    
+    由单个后台线程通过selectors（Linux下为epoll）统一监听所有进程的PTY主端与管道，
+    只在数据就绪时大块读取，并借助pidfd感知进程退出，线程数量不随运行中的工具数量增长。
+    不支持pidfd时，输出关闭后仍未退出的进程由反应器循环每隔 PROCESS_REAP_INTERVAL 秒以非阻塞方式回收。
+    """
+    
+    READ_SIZE = 65536
+    
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def instance(cls):
+        """获取全局共享的反应器实例"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
+    @staticmethod
+    def is_supported():
+        """Windows下的管道与winpty无法被select监听"""
+        return not is_windows()
+    
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.read_buffer = bytearray(self.READ_SIZE)
+        self.read_view = memoryview(self.read_buffer)
+        self.pending = queue.SimpleQueue()
+        self.wakeup_r, self.wakeup_w = os.pipe()
+        os.set_blocking(self.wakeup_r, False)
+        os.set_blocking(self.wakeup_w, False)
+        self.selector.register(self.wakeup_r, selectors.EVENT_READ, None)
+        self.reaping = []
+        self.thread = threading.Thread(target=self._run, name="wct-io-reactor", daemon=True)
+        self.thread.start()
+        
+    def watch(self, process, fd, on_data, on_exit):
+        """监听进程输出
+        
+        on_data(memoryview)在数据到达时调用，视图指向复用的读取缓冲区，仅在回调期间有效；
+        on_exit(exit_code)在进程结束后调用一次。
+        """
+        watch = ProcessWatch(process, fd, on_data, on_exit)
+        self.pending.put(watch)
+        try:
+            os.write(self.wakeup_w, b'\0')
+        except OSError:
+            pass
+        return watch
+        
+    def _run(self):
+        while True:
+            timeout = PerformanceConfig.PROCESS_REAP_INTERVAL if self.reaping else None
+            for key, _ in self.selector.select(timeout):
+                try:
+                    if key.data is None:
+                        self._register_pending()
+                    elif key.data[0] == 'output':
+                        self._on_readable(key.data[1])
+                    else:
+                        self._on_process_exit(key.data[1])
+                except Exception as e:
+                    print(f"I/O反应器处理事件失败: {e}")
+            if self.reaping:
+                self._poll_reaping()
+                    
+    def _register_pending(self):
+        try:
+            while os.read(self.wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+            
+        while not self.pending.empty():
+            watch = self.pending.get()
+            try:
+                os.set_blocking(watch.fd, False)
+                self.selector.register(watch.fd, selectors.EVENT_READ, ('output', watch))
+            except Exception as e:
+                print(f"注册进程输出监听失败: {e}")
+                watch.output_open = False
+                
+            watch.pidfd = self._open_pidfd(watch.process)
+            if watch.pidfd is not None:
+                self.selector.register(watch.pidfd, selectors.EVENT_READ, ('exit', watch))
+            elif not watch.output_open:
+                self._reap(watch)
+                
+    def _open_pidfd(self, process):
+        pid = getattr(process, 'pid', None)
+        if pid is None or not hasattr(os, 'pidfd_open'):
+            return None
+        try:
+            return os.pidfd_open(pid)
+        except OSError:
+            return None
+            
+    def _read(self, fd):
+        """读取到复用缓冲区中，避免每次读取分配新的bytes"""
+        return self.read_view[:os.readv(fd, [self.read_buffer])]
+        
+    def _on_readable(self, watch):
+        try:
+            data = self._read(watch.fd)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = None
+            
+        if data:
+            watch.on_data(data)
+            return
+            
+        self._close_output(watch)
+        if watch.pidfd is None:
+            self._reap(watch)
+            
+    def _on_process_exit(self, watch):
+        self.selector.unregister(watch.pidfd)
+        os.close(watch.pidfd)
+        watch.pidfd = None
+        
+        if watch.output_open:
+            while True:
+                try:
+                    data = self._read(watch.fd)
+                except OSError:
+                    break
+                if not data:
+                    break
+                watch.on_data(data)
+            self._close_output(watch)
+        self._reap(watch)
+        
+    def _close_output(self, watch):
+        if not watch.output_open:
+            return
+        watch.output_open = False
+        try:
+            self.selector.unregister(watch.fd)
+        except (KeyError, ValueError):
+            pass
+        if isinstance(watch.process, PtyProcess):
+            try:
+                os.close(watch.fd)
+            except OSError:
+                pass
+                
+    def _reap(self, watch):
+        exit_code = watch.process.poll()
+        if exit_code is not None:
+            watch.on_exit(exit_code)
+            return
+            
+        # 输出已关闭但进程尚未退出（例如关闭了stdout的进程），留给反应器循环定时回收
+        self.reaping.append(watch)
+        
+    def _poll_reaping(self):
+        still_running = []
+        for watch in self.reaping:
+            try:
+                exit_code = watch.process.poll()
+            except Exception as e:
+                print(f"回收进程失败: {e}")
+                exit_code = -1
+            if exit_code is None:
+                still_running.append(watch)
+            else:
+                try:
+                    watch.on_exit(exit_code)
+                except Exception as e:
+                    print(f"I/O反应器处理事件失败: {e}")
+        self.reaping = still_running
+
+class ProcessWatch:
+    """反应器中单个进程的监听状态"""
+    
+    def __init__(self, process, fd, on_data, on_exit):
+        self.process = process
+        self.fd = fd
+        self.on_data = on_data
+        self.on_exit = on_exit
+        self.pidfd = None
+        self.output_open = True
 
 class WinptyWrapper:
+    """winpty 进程包装
+
+    winpty 从控制台读取的是 Unicode 文本，read_output 返回已解码的 str，
+    不经过输出缓冲区的增量解码，因此工具配置的输出编码对 winpty 进程不起作用。
+    """
+    
     def __init__(self, pty_process):
         self.pty_process = pty_process
         
@@ -268,6 +728,10 @@ class PtyProcess:
         self.stdout = master_fd
         self.stderr = None
         
+    @property
+    def pid(self):
+        return self.process.pid
+        
     def poll(self):
         return self.process.poll()
         
@@ -293,13 +757,14 @@ class PtyProcess:
         return self.process.wait()
         
     def read_output(self, size=1024):
+        """读取原始字节，解码交给输出缓冲区按配置的编码增量完成"""
         try:
             import select
             if select.select([self.master_fd], [], [], 0)[0]:
-                return os.read(self.master_fd, size).decode('utf-8', errors='ignore')
+                return os.read(self.master_fd, size)
         except (ImportError, Exception):
             try:
-                return os.read(self.master_fd, size).decode('utf-8', errors='ignore')
+                return os.read(self.master_fd, size)
             except Exception:
                 return None
         return None
@@ -389,139 +854,6 @@ class PtyProcess:
         
         return FallbackProcess(process)
         
-    def _start_output_monitoring(self, process_id, process):
-        def monitor_output():
-            try:
-                while True:
-                    output = None
-                    has_output = False
-                    
-
-                    if hasattr(process, 'read_output'):
-
-                        output = process.read_output(4096)
-                        if output:
-                            has_output = True
-                    elif hasattr(process, 'read'):
-
-                        try:
-
-                            output = process.read(4096)
-                            if output:
-                                if isinstance(output, bytes):
-                                    output = output.decode('utf-8', errors='ignore')
-                                has_output = True
-                        except Exception as e:
-
-                            try:
-                                try:
-                                    import select
-                                    if hasattr(process, 'fileno'):
-                                        ready, _, _ = select.select([process.fileno()], [], [], 0)
-                                        if ready:
-                                            output = process.read(1024)
-                                            if output:
-                                                if isinstance(output, bytes):
-                                                    output = output.decode('utf-8', errors='ignore')
-                                                has_output = True
-                                except ImportError:
-                                    # Fallback without select
-                                    output = process.read(1024)
-                                    if output:
-                                        if isinstance(output, bytes):
-                                            output = output.decode('utf-8', errors='ignore')
-                                        has_output = True
-                            except Exception:
-                                pass
-                    elif hasattr(process, 'read_combined_output'):
-
-                        try:
-                            output = process.read_combined_output(4096)
-                            if output:
-                                has_output = True
-                        except Exception:
-
-                            try:
-                                if hasattr(process, 'stdout') and process.stdout:
-                                    line = process.stdout.readline()
-                                    if line:
-                                        output = line.rstrip()
-                                        has_output = True
-                            except Exception:
-                                pass
-                    elif hasattr(process, 'stdout') and process.stdout:
-
-                        try:
-
-                            lines = []
-                            while True:
-                                line = process.stdout.readline()
-                                if not line:
-                                    break
-                                lines.append(line.rstrip())
-
-                                if len(lines) >= 10:
-                                    break
-                            if lines:
-                                output = '\n'.join(lines)
-                                has_output = True
-                        except Exception:
-                            pass
-                    
-                    if has_output and output:
-                        self.output_received.emit(process_id, output)
-                    
-
-                    if process.poll() is not None:
-
-                        try:
-
-                            for _ in range(5):
-                                remaining_output = None
-                                if hasattr(process, 'read'):
-                                    remaining_output = process.read(8192)
-                                    if remaining_output:
-                                        if isinstance(remaining_output, bytes):
-                                            remaining_output = remaining_output.decode('utf-8', errors='ignore')
-                                elif hasattr(process, 'read_combined_output'):
-
-                                    remaining_output = process.read_combined_output(8192)
-                                elif hasattr(process, 'stdout') and process.stdout:
-                                    remaining_output = process.stdout.read()
-                                    if remaining_output:
-                                        remaining_output = remaining_output.rstrip()
-                                
-                                if remaining_output:
-                                    self.output_received.emit(process_id, remaining_output)
-                                else:
-                                    break
-                                    
-
-                                import time
-                                time.sleep(0.001)
-                        except Exception:
-                            pass
-                        break
-                        
-
-                    import time
-                    time.sleep(0.005)
-                        
-                exit_code = process.wait()
-                self.process_finished.emit(process_id, exit_code)
-                
-                if process_id in self.processes:
-                    del self.processes[process_id]
-                if process_id in self.output_threads:
-                    del self.output_threads[process_id]
-                    
-            except Exception as e:
-                self.error_occurred.emit(process_id, f"输出监控错误: {str(e)}")
-                
-        thread = threading.Thread(target=monitor_output, daemon=True)
-        thread.start()
-        self.output_threads[process_id] = thread
-        
     def send_input(self, process_id, text):
         if process_id in self.processes:
             try:
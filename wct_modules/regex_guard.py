@@ -0,0 +1,212 @@
+"""
+正则保护模块
+在独立的工作进程中对大段文本执行用户输入的正则，超出时间预算时结束进程并返回已完成的部分结果
+"""
+
+import re
+import time
+import threading
+import multiprocessing
+from array import array
+from typing import Callable, Iterable, Tuple
+
+
+SCAN_SPANS = 'spans'
+SCAN_LINES = 'lines'
+
+
+def _serve(connection):
+    """工作进程主循环：接收 (模式, 标志, 扫描方式, 文本)，返回 array('q')，正则无效时返回错误信息"""
+    patterns = {}
+    connection.send(b'')
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+
+        pattern_text, flags, mode, text = request
+        try:
+            pattern = patterns.get((pattern_text, flags))
+            if pattern is None:
+                pattern = patterns[(pattern_text, flags)] = re.compile(pattern_text, flags)
+        except re.error as e:
+            connection.send(str(e))
+            continue
+
+        values = array('q')
+        if mode == SCAN_LINES:
+            search = pattern.search
+            for index, line in enumerate(text.split('\n')):
+                if search(line):
+                    values.append(index)
+        else:
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                if end > start:
+                    values.append(start)
+                    values.append(end)
+        connection.send(values)
+
+
+class RegexScanResult:
+    """一次受保护扫描的结果状态"""
+
+    __slots__ = ('completed', 'timed_out', 'cancelled', 'error', 'scanned')
+
+    def __init__(self):
+        self.completed = False
+        self.timed_out = False
+        self.cancelled = False
+        self.error = None
+        self.scanned = 0
+
+
+class RegexProcess:
+    """一个正则工作进程及其管道"""
+
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_connection,),
+                                       name="wct-regex-worker", daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+
+    def wait_ready(self, cancelled: Callable[[], bool] = None, timeout: float = None) -> bool:
+        """等待工作进程完成启动，启动时间不计入时间预算，超过 timeout 秒仍未就绪时放弃"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while not self.ready:
+            if cancelled is not None and cancelled():
+                return False
+            if not self.process.is_alive():
+                return False
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            if self.connection.poll(0.05):
+                self.connection.recv()
+                self.ready = True
+        return True
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(1)
+        except Exception:
+            pass
+        self.connection.close()
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except Exception:
+            pass
+        self.connection.close()
+
+
+class RegexGuard:
+    """受保护的正则执行服务
+
+    空闲的工作进程会被复用；扫描超出时间预算或被取消时直接结束工作进程，
+    因此任何回溯失控的模式都不会占住应用。工作进程使用 spawn 方式启动，
+    与 Qt 的线程状态无关，在各平台行为一致。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    POLL_INTERVAL = 0.05
+    MAX_IDLE_PROCESSES = 2
+    START_TIMEOUT = 10.0
+
+    @classmethod
+    def instance(cls):
+        """获取全局共享的正则保护服务"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self.context = multiprocessing.get_context('spawn')
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def _acquire(self) -> RegexProcess:
+        with self.lock:
+            while self.idle:
+                worker = self.idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        return RegexProcess(self.context)
+
+    def _release(self, worker: RegexProcess):
+        with self.lock:
+            if len(self.idle) < self.MAX_IDLE_PROCESSES:
+                self.idle.append(worker)
+                return
+        worker.close()
+
+    def warm_up(self):
+        """预先启动一个工作进程，避免第一次搜索等待进程启动"""
+        worker = self._acquire()
+        self._release(worker)
+
+    def scan(self, pattern_text: str, flags: int, texts: Iterable[Tuple[object, str]],
+             on_result: Callable[[object, array], None], mode: str = SCAN_SPANS,
+             budget: float = None, cancelled: Callable[[], bool] = None) -> RegexScanResult:
+        """依次扫描 (键, 文本)，每段文本完成后以 (键, array('q')) 调用 on_result
+
+        SCAN_SPANS 返回非空匹配的 起点,终点 交替序列，SCAN_LINES 返回匹配行的行序号。
+        超出 budget 秒、cancelled() 为真或正则无效时停止，已交付的结果保持有效。
+        """
+        result = RegexScanResult()
+        worker = self._acquire()
+        if not worker.wait_ready(cancelled, self.START_TIMEOUT):
+            if cancelled is not None and cancelled():
+                result.cancelled = True
+            else:
+                result.error = "正则工作进程启动失败"
+            worker.kill()
+            return result
+
+        deadline = time.monotonic() + budget if budget else None
+        try:
+            for key, text in texts:
+                if cancelled is not None and cancelled():
+                    result.cancelled = True
+                    self._release(worker)
+                    return result
+                worker.connection.send((pattern_text, flags, mode, text))
+                while not worker.connection.poll(self.POLL_INTERVAL):
+                    if cancelled is not None and cancelled():
+                        result.cancelled = True
+                        break
+                    if deadline is not None and time.monotonic() > deadline:
+                        result.timed_out = True
+                        break
+                    if not worker.process.is_alive():
+                        result.error = "正则工作进程意外退出"
+                        break
+                if result.cancelled or result.timed_out or result.error:
+                    worker.kill()
+                    return result
+
+                values = worker.connection.recv()
+                if isinstance(values, str):
+                    result.error = values
+                    self._release(worker)
+                    return result
+                result.scanned += 1
+                on_result(key, values)
+        except (OSError, EOFError) as e:
+            result.error = str(e)
+            worker.kill()
+            return result
+
+        result.completed = True
+        self._release(worker)
+        return result
@@ -8,10 +8,16 @@ from PySide6.QtCore import Qt, Signal, QThread, QTimer
 from PySide6.QtGui import QFont, QTextCharFormat, QColor, QTextCursor
 import re
 import json
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
+from .regex_guard import RegexGuard, SCAN_LINES
+from .terminal_performance import PerformanceConfig
+
 @dataclass
 class SearchResult:
     type: str
@@ -27,6 +33,57 @@ class SearchResult:
         if self.metadata is None:
             self.metadata = {}
 
+class QueryMatcher:
+    """编译一次的查询
+
+    普通查询保存小写后的字面串，用子串查找；正则查询保存编译好的模式。
+    正则无效时 valid 为 False，任何文本都不匹配；
+    正则在受保护的工作进程中超出时间预算时 incomplete 置为 True，表示结果不完整。
+    """
+    
+    def __init__(self, query: str, case_sensitive: bool = False, use_regex: bool = False):
+        self.query = query
+        self.case_sensitive = case_sensitive
+        self.use_regex = use_regex
+        self.literal = None
+        self.incomplete = False
+        if not use_regex:
+            self.literal = query if case_sensitive else query.lower()
+            
+        flags = 0 if case_sensitive else re.IGNORECASE
+        try:
+            self.regex = re.compile(query if use_regex else re.escape(query), flags)
+            # 在多行文本块中查找时 ^ 与 $ 按行匹配
+            self.block_regex = re.compile(self.regex.pattern, flags | re.MULTILINE)
+            self.valid = True
+        except re.error:
+            self.regex = None
+            self.block_regex = None
+            self.valid = False
+            
+    def matches(self, text: str) -> bool:
+        if not text or not self.valid:
+            return False
+        if self.literal is not None:
+            return self.literal in (text if self.case_sensitive else text.lower())
+        return self.regex.search(text) is not None
+        
+    def find_starts(self, text: str):
+        """依次产生多行文本中各匹配的起点"""
+        if not self.valid:
+            return
+        if self.literal:
+            haystack = text if self.case_sensitive else text.lower()
+            # 少数字符小写后长度会变，此时位置无法对应，改用正则
+            if len(haystack) == len(text):
+                position = haystack.find(self.literal)
+                while position >= 0:
+                    yield position
+                    position = haystack.find(self.literal, position + 1)
+                return
+        for match in self.block_regex.finditer(text):
+            yield match.start()
+
 class SearchHighlighter:
     def __init__(self, text_edit: QTextEdit, theme_manager=None):
         self.text_edit = text_edit
@@ -161,75 +218,159 @@ class SearchHighlighter:
                 len(self.current_matches))
 
 class SearchWorker(QThread):
+    """全局搜索线程
+
+    同一个线程处理所有查询：submit() 提交的新查询会取代正在执行的查询，
+    旧查询在下一个检查点放弃，不再发出结果。工具、参数与输出在线程池中并行搜索，
+    各自按分数排序后合并。
+    """
+    
     search_progress = Signal(int)
     search_result = Signal(list)
+    search_notice = Signal(str)
     search_finished = Signal()
     
-    def __init__(self, query: str, search_options: Dict[str, Any], 
-                 data_sources: Dict[str, Any]):
+    _pool = None
+    _pool_lock = threading.Lock()
+    
+    @classmethod
+    def pool(cls) -> ThreadPoolExecutor:
+        """各数据源共享的搜索线程池"""
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="wct-search")
+            return cls._pool
+    
+    def __init__(self, query: str = "", search_options: Dict[str, Any] = None, 
+                 data_sources: Dict[str, Any] = None):
         super().__init__()
         self.query = query
-        self.search_options = search_options
-        self.data_sources = data_sources
+        self.search_options = search_options or {}
+        self.data_sources = data_sources or {}
         self.results = []
+        self.generation = 0
+        self.pending = None
+        self.active = False
+        self.lock = threading.Lock()
+        self.finished.connect(self._restart_if_pending)
+        if query:
+            self.pending = (self.generation, query, self.search_options, self.data_sources)
+            
+    def submit(self, query: str, search_options: Dict[str, Any], data_sources: Dict[str, Any]):
+        """提交查询，取代尚未完成的查询"""
+        with self.lock:
+            self.generation += 1
+            self.pending = (self.generation, query, search_options, data_sources)
+            if self.active:
+                return
+            self.active = True
+        # 线程刚退出处理循环、尚未结束时不能再次启动，由 _restart_if_pending 在它结束后启动
+        if not self.isRunning():
+            self.start()
+            
+    def _restart_if_pending(self):
+        """线程结束时如果有在退出期间提交的查询，重新启动处理循环"""
+        with self.lock:
+            restart = self.active
+        if restart and not self.isRunning():
+            self.start()
+        
+    def cancel(self):
+        """放弃正在执行和等待中的查询"""
+        with self.lock:
+            self.generation += 1
+            self.pending = None
+            
+    def is_superseded(self, generation: int) -> bool:
+        return generation != self.generation
         
     def run(self):
+        with self.lock:
+            self.active = True
         try:
-            self.results.clear()
-            total_sources = len(self.data_sources)
+            while True:
+                with self.lock:
+                    request = self.pending
+                    self.pending = None
+                    if request is None:
+                        self.active = False
+                        return
+                self.run_query(*request)
+        finally:
+            self.search_finished.emit()
             
-            for i, (source_name, source_data) in enumerate(self.data_sources.items()):
-                if source_name == 'tools' and self.search_options.get('search_tools', True):
-                    self.search_tools(source_data)
-                elif source_name == 'parameters' and self.search_options.get('search_parameters', True):
-                    self.search_parameters(source_data)
-                elif source_name == 'outputs' and self.search_options.get('search_outputs', True):
-                    self.search_outputs(source_data)
-                    
-                progress = int((i + 1) / total_sources * 100)
-                self.search_progress.emit(progress)
+    def run_query(self, generation: int, query: str, search_options: Dict[str, Any], 
+                  data_sources: Dict[str, Any]):
+        self.query = query
+        self.search_options = search_options
+        self.data_sources = data_sources
+        matcher = QueryMatcher(query, search_options.get('case_sensitive', False),
+                               search_options.get('use_regex', False))
+        
+        tasks = []
+        for source_name, source_data in data_sources.items():
+            if source_name == 'tools' and search_options.get('search_tools', True):
+                tasks.append((self.search_tools, source_data))
+            elif source_name == 'parameters' and search_options.get('search_parameters', True):
+                tasks.append((self.search_parameters, source_data))
+            elif source_name == 'outputs' and search_options.get('search_outputs', True):
+                tasks.append((self.search_outputs, source_data))
                 
-
-            self.results.sort(key=lambda x: x.score, reverse=True)
+        try:
+            pool = self.pool()
+            futures = [pool.submit(task, source_data, matcher, generation) for task, source_data in tasks]
             
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result().sort(key=lambda x: x.score, reverse=True)
+                if not self.is_superseded(generation):
+                    self.search_progress.emit(int(done / max(1, len(tasks)) * 100))
+                    
+            if self.is_superseded(generation):
+                return
+            # 按数据源顺序合并，同分结果保持工具、参数、输出的先后
+            partial_results = [future.result() for future in futures]
+            self.results = list(heapq.merge(*partial_results, key=lambda x: x.score, reverse=True))
+            self.search_progress.emit(100)
+            if matcher.incomplete:
+                self.search_notice.emit("正则表达式过慢，输出搜索已停止，只显示部分结果")
             self.search_result.emit(self.results)
             
         except Exception as e:
             print(f"搜索出错: {e}")
-        finally:
-            self.search_finished.emit()
             
-    def search_tools(self, tools_data):
-        case_sensitive = self.search_options.get('case_sensitive', False)
-        use_regex = self.search_options.get('use_regex', False)
-        
+    def search_tools(self, tools_data, matcher: QueryMatcher, generation: int) -> List[SearchResult]:
+        results = []
+        if hasattr(tools_data, 'candidates'):
+            tools_data = tools_data.candidates(matcher.query, matcher.use_regex)
         for tool_info in tools_data:
+            if self.is_superseded(generation):
+                break
             score = 0
             matches = []
             
 
-            if self.match_text(self.query, tool_info.name, case_sensitive, use_regex):
+            if matcher.matches(tool_info.name):
                 score += 10
                 matches.append('name')
                 
 
-            if self.match_text(self.query, tool_info.display_name, case_sensitive, use_regex):
+            if matcher.matches(tool_info.display_name):
                 score += 8
                 matches.append('display_name')
                 
 
-            if self.match_text(self.query, tool_info.description, case_sensitive, use_regex):
+            if matcher.matches(tool_info.description):
                 score += 5
                 matches.append('description')
                 
 
             for tag in tool_info.tags:
-                if self.match_text(self.query, tag, case_sensitive, use_regex):
+                if matcher.matches(tag):
                     score += 3
                     matches.append('tags')
                     
 
-            if self.match_text(self.query, tool_info.category, case_sensitive, use_regex):
+            if matcher.matches(tool_info.category):
                 score += 4
                 matches.append('category')
                 
@@ -245,31 +386,34 @@ class SearchWorker(QThread):
                         'matches': matches
                     }
                 )
-                self.results.append(result)
+                results.append(result)
+        return results
                 
-    def search_parameters(self, parameters_data):
-        case_sensitive = self.search_options.get('case_sensitive', False)
-        use_regex = self.search_options.get('use_regex', False)
-        
+    def search_parameters(self, parameters_data, matcher: QueryMatcher, generation: int) -> List[SearchResult]:
+        results = []
+        if hasattr(parameters_data, 'candidates'):
+            parameters_data = parameters_data.candidates(matcher.query, matcher.use_regex)
         for tool_name, params in parameters_data.items():
+            if self.is_superseded(generation):
+                break
             for param_name, param_config in params.items():
                 score = 0
                 matches = []
                 
 
-                if self.match_text(self.query, param_name, case_sensitive, use_regex):
+                if matcher.matches(param_name):
                     score += 8
                     matches.append('name')
                     
 
                 description = param_config.get('description', '')
-                if self.match_text(self.query, description, case_sensitive, use_regex):
+                if matcher.matches(description):
                     score += 5
                     matches.append('description')
                     
 
                 default_value = str(param_config.get('default', ''))
-                if self.match_text(self.query, default_value, case_sensitive, use_regex):
+                if matcher.matches(default_value):
                     score += 3
                     matches.append('default')
                     
@@ -287,59 +431,78 @@ class SearchWorker(QThread):
                             'matches': matches
                         }
                     )
-                    self.results.append(result)
-                    
-    def search_outputs(self, outputs_data):
-        case_sensitive = self.search_options.get('case_sensitive', False)
-        use_regex = self.search_options.get('use_regex', False)
-        
-        for output_info in outputs_data:
-            content = output_info.get('content', '')
-            source = output_info.get('source', '')
-            timestamp = output_info.get('timestamp', '')
-            
-            if self.match_text(self.query, content, case_sensitive, use_regex):
+                    results.append(result)
+        return results
+        
 
-                lines = content.split('\n')
-                matching_lines = []
-                
-                for i, line in enumerate(lines):
-                    if self.match_text(self.query, line, case_sensitive, use_regex):
-                        matching_lines.append((i + 1, line.strip()))
-                        
-                for line_num, line_content in matching_lines:
-                    result = SearchResult(
-                        type='output',
-                        title=f"输出匹配 (第{line_num}行)",
-                        content=line_content,
-                        source=f"输出: {source}",
-                        line_number=line_num,
-                        score=2,
-                        context=self.get_context(lines, line_num - 1, 2),
-                        metadata={
-                            'full_content': content,
-                            'timestamp': timestamp,
-                            'source': source
-                        }
-                    )
-                    self.results.append(result)
-                    
-    def match_text(self, query: str, text: str, case_sensitive: bool, use_regex: bool) -> bool:
-        if not text:
-            return False
+    def search_outputs(self, outputs_data, matcher: QueryMatcher, generation: int) -> List[SearchResult]:
+        """搜索输出历史，outputs_data 为 OutputHistoryChunk 的可迭代对象
+
+        带 candidates() 的快照先用三元组索引排除不可能匹配的块，
+        剩余的块在整块文本上查找，再映射回行并逐行确认。
+        """
+        results = []
+        if not matcher.valid:
+            return results
             
-        try:
-            if use_regex:
-                flags = 0 if case_sensitive else re.IGNORECASE
-                return bool(re.search(query, text, flags))
-            else:
-                if case_sensitive:
-                    return query in text
-                else:
-                    return query.lower() in text.lower()
-        except re.error:
-            return False
+        chunks = outputs_data
+        if hasattr(outputs_data, 'candidates'):
+            chunks = outputs_data.candidates(matcher.query, matcher.use_regex)
+            
+        if matcher.use_regex:
+            # 用户输入的正则在工作进程中逐行匹配，超出时间预算时保留已完成的块
+            def on_result(chunk, indexes):
+                for i in indexes:
+                    results.append(self.make_output_result(chunk, i))
+                    
+            outcome = RegexGuard.instance().scan(
+                matcher.regex.pattern, matcher.regex.flags, ((chunk, chunk.text) for chunk in chunks),
+                on_result, mode=SCAN_LINES, budget=PerformanceConfig.REGEX_TIME_BUDGET,
+                cancelled=lambda: self.is_superseded(generation))
+            matcher.incomplete = outcome.timed_out
+            return results
+        
+        for chunk in chunks:
+            if self.is_superseded(generation):
+                break
+            last_index = -1
+            for start in matcher.find_starts(chunk.text):
+                i = chunk.line_index(start)
+                if i == last_index:
+                    continue
+                # 整块匹配可能跨越换行，逐行确认以保持按行匹配的语义
+                if not matcher.matches(chunk.line_text(i)):
+                    continue
+                last_index = i
+                results.append(self.make_output_result(chunk, i))
+        return results
+        
+    def make_output_result(self, chunk, i: int) -> SearchResult:
+        """把历史块中第i行的匹配包装为搜索结果"""
+        source = chunk.source_name
+        if chunk.tool_name:
+            source = f"{source} ({chunk.tool_name})"
             
+        first = max(0, i - 2)
+        lines = [chunk.line_text(j) for j in range(first, min(len(chunk), i + 3))]
+        line_num = chunk.first_line + i + 1
+        return SearchResult(
+            type='output',
+            title=f"输出匹配 (第{line_num}行)",
+            content=lines[i - first].strip(),
+            source=f"输出: {source}",
+            line_number=line_num,
+            score=2,
+            context=self.get_context(lines, i - first, 2),
+            metadata={
+                'tab_id': chunk.source_id,
+                'tool_name': chunk.tool_name,
+                'line_index': line_num - 1,
+                'timestamp': datetime.fromtimestamp(chunk.timestamps[i]).strftime('%Y-%m-%d %H:%M:%S'),
+                'source': source
+            }
+        )
+                    
     def get_context(self, lines: List[str], target_line: int, context_size: int) -> str:
         start = max(0, target_line - context_size)
         end = min(len(lines), target_line + context_size + 1)
@@ -359,6 +522,7 @@ class SearchWidget(QWidget):
         super().__init__(parent)
         self.search_worker = None
         self.current_results = []
+        self.search_notice = ""
         self.init_ui()
         
     def init_ui(self):
@@ -435,20 +599,19 @@ class SearchWidget(QWidget):
         
     def perform_search(self, query: str, search_options: Dict[str, Any], 
                       data_sources: Dict[str, Any]):
-        if self.search_worker and self.search_worker.isRunning():
-            self.search_worker.terminate()
-            self.search_worker.wait()
+        if self.search_worker is None:
+            self.search_worker = SearchWorker()
+            self.search_worker.search_progress.connect(self.progress_bar.setValue)
+            self.search_worker.search_result.connect(self.display_results)
+            self.search_worker.search_notice.connect(self.on_search_notice)
+            self.search_worker.search_finished.connect(self.search_finished)
             
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        self.search_btn.setEnabled(False)
         self.status_label.setText("搜索中...")
         
-        self.search_worker = SearchWorker(query, search_options, data_sources)
-        self.search_worker.search_progress.connect(self.progress_bar.setValue)
-        self.search_worker.search_result.connect(self.display_results)
-        self.search_worker.search_finished.connect(self.search_finished)
-        self.search_worker.start()
+        # 新查询取代正在执行的查询，搜索按钮保持可用
+        self.search_worker.submit(query, search_options, data_sources)
         
     def display_results(self, results: List[SearchResult]):
         self.current_results = results
@@ -468,9 +631,20 @@ class SearchWidget(QWidget):
             item.setToolTip(tooltip)
             self.results_list.addItem(item)
             
-        self.status_label.setText(f"找到 {len(results)} 个结果")
+        status = f"找到 {len(results)} 个结果"
+        if self.search_notice:
+            status += f"（{self.search_notice}）"
+            self.search_notice = ""
+        self.status_label.setText(status)
+        
+    def on_search_notice(self, notice: str):
+        """搜索结果附带的提示，例如正则超时"""
+        self.search_notice = notice
         
     def search_finished(self):
+        # 处理循环结束后又提交了新查询时，进度条保持显示
+        if self.search_worker is not None and self.search_worker.active:
+            return
         self.progress_bar.setVisible(False)
         self.search_btn.setEnabled(True)
         
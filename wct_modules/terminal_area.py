@@ -9,10 +9,15 @@ import json
 import os
 import re
 import shlex
-from .process import ProcessManager
-
-from .utils import get_system_font, clean_ansi_codes
-from .ansi_parser import ANSITextRenderer, ANSIParser
+from .process import ProcessManager, ProcessSupervisor
+
+from .utils import (get_system_font, clean_ansi_codes, get_configured_output_encoding,
+                    get_configured_process_limits)
+from .ansi_parser import ANSITextRenderer, ANSIParser, shared_style_table
+from .terminal_view import TerminalView, SegmentBatch
+from .terminal_search import TerminalSearchWorker, SearchJob, MatchList, SearchResultsModel, compile_search_pattern
+from .terminal_performance import PerformanceConfig
+from .output_history import OutputHistory
 from .draggable_tab_widget import DraggableTabWidget
 import uuid
 from datetime import datetime
@@ -93,22 +98,39 @@ class ProcessTab(QWidget):
 class TerminalTab(QWidget):
     process_finished = Signal(str)
     output_received = Signal(str, str)
+    title_changed = Signal(str, str)
     
     def __init__(self, tab_name="进程", theme_manager=None):
         super().__init__()
         self.tab_name = tab_name
         self.tab_id = str(uuid.uuid4())
         self.theme_manager = theme_manager
-        self.process_manager = ProcessManager()
+        self.supervisor = ProcessSupervisor.instance()
+        self.process_manager = self.supervisor.manager
         self.current_process = None
         self.command_history = []
         self.history_index = -1
         self.output_timer = None
         self.working_directory = os.getcwd()
+        self.output_encoding = None
         
 
-        self.search_matches = []
+        self.search_matches = MatchList()
         self.current_match_index = -1
+        self.search_generation = 0
+        self.search_worker = None
+        self.search_job = None
+        self.follow_job = None
+        self.search_title_term = ''
+        self.search_pattern = None
+        self.search_guarded = False
+        self.search_too_slow = False
+        self.search_stale = False
+        self.follow_position = 0
+        
+
+        self.output_history = OutputHistory.instance()
+        self.history_line = 0
         
 
         self.ansi_renderer = None
@@ -116,7 +138,6 @@ class TerminalTab(QWidget):
         
         self.init_ui()
         self.setup_connections()
-        self.setup_process_connections()
         self.setup_ansi_renderer()
         
     def init_ui(self):
@@ -173,10 +194,16 @@ class TerminalTab(QWidget):
         self.regex_btn.setObjectName("regex_btn")
         self.regex_btn.setFixedSize(24, 24)
         
+        self.follow_search_btn = QPushButton("跟随")
+        self.follow_search_btn.setCheckable(True)
+        self.follow_search_btn.setToolTip("跟随搜索：新输出到达时只对新行进行匹配并更新结果")
+        self.follow_search_btn.setObjectName("follow_search_btn")
+        
 
         search_container_layout.addWidget(self.search_edit)
         search_container_layout.addWidget(self.case_sensitive_btn)
         search_container_layout.addWidget(self.regex_btn)
+        search_container_layout.addWidget(self.follow_search_btn)
         search_container.setObjectName("search_container")
         
         self.search_button = QPushButton("搜索")
@@ -209,25 +236,50 @@ class TerminalTab(QWidget):
         layout.addLayout(toolbar_layout)
         
 
-        from PySide6.QtWidgets import QListWidget, QListWidgetItem
-        self.search_results_area = QListWidget()
-        self.search_results_area.setMaximumHeight(400)
-        self.search_results_area.setVisible(False)
-        self.search_results_area.setObjectName("search_results_area")
+        from PySide6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+        self.search_results_panel = QWidget()
+        self.search_results_panel.setVisible(False)
+        self.search_results_panel.setMaximumHeight(400)
+        panel_layout = QVBoxLayout(self.search_results_panel)
+        panel_layout.setContentsMargins(0, 0, 0, 0)
+        panel_layout.setSpacing(0)
+        
+        self.search_results_title = QLabel()
+        self.search_results_title.setObjectName("search_results_title")
+        self.search_results_title.setStyleSheet(
+            "background-color: #e3f2fd; color: #1976d2; font-weight: bold; padding: 4px;"
+        )
+        panel_layout.addWidget(self.search_results_title)
+        
 
-        self.search_results_area.setWordWrap(True)
+        self.search_results_area = QTableView()
+        self.search_results_area.setObjectName("search_results_area")
+        self.search_results_area.setShowGrid(False)
+        self.search_results_area.setWordWrap(False)
+        self.search_results_area.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.search_results_area.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.search_results_area.horizontalHeader().setVisible(False)
+        self.search_results_area.horizontalHeader().setStretchLastSection(True)
+        self.search_results_area.verticalHeader().setVisible(False)
+        self.search_results_area.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.search_results_area.verticalHeader().setDefaultSectionSize(
+            self.search_results_area.fontMetrics().lineSpacing() + 4
+        )
         self.search_results_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.search_results_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        self.search_results_area.itemClicked.connect(self.on_search_result_clicked)
-        layout.addWidget(self.search_results_area)
+        self.search_results_area.clicked.connect(self.on_search_result_clicked)
+        panel_layout.addWidget(self.search_results_area)
+        layout.addWidget(self.search_results_panel)
         
 
-        self.output_area = QTextEdit()
-        self.output_area.setReadOnly(True)
+        self.output_area = TerminalView()
         self.output_area.setFont(get_system_font())
         self.output_area.setObjectName("output_area")
         layout.addWidget(self.output_area)
         
+        self.search_results_model = SearchResultsModel(self.output_area, self)
+        self.search_results_area.setModel(self.search_results_model)
+        
 
         input_layout = QHBoxLayout()
         
@@ -241,7 +293,7 @@ class TerminalTab(QWidget):
         self.input_line.setObjectName("input_line")
         
         self.send_button = QPushButton("执行")
-        self.send_button.clicked.connect(self.execute_command)
+        self.send_button.clicked.connect(lambda: self.execute_command())
         
         input_layout.addWidget(self.prompt_label)
         input_layout.addWidget(self.input_line)
@@ -252,8 +304,17 @@ class TerminalTab(QWidget):
         self.input_line.returnPressed.connect(self.execute_command)
         
 
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(PerformanceConfig.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.search_text)
+        self.search_edit.textChanged.connect(self.on_search_text_changed)
         self.search_edit.returnPressed.connect(self.search_text)
-        self.search_button.clicked.connect(self.search_text)
+        self.search_button.clicked.connect(lambda: self.search_text())
+        self.follow_search_btn.toggled.connect(self.on_follow_search_toggled)
+        self.output_area.lines_completed.connect(self.follow_new_output)
+        self.output_area.lines_completed.connect(self.record_output_history)
+        self.output_area.positions_shifted.connect(self.on_output_positions_shifted)
 
 
         self.prev_button.clicked.connect(self.find_previous)
@@ -263,7 +324,9 @@ class TerminalTab(QWidget):
     def setup_ansi_renderer(self):
         """设置ANSI渲染器"""
         try:
-            self.ansi_renderer = ANSITextRenderer(self.output_area)
+            self.ansi_renderer = ANSITextRenderer(
+                self.output_area, lambda title: self.title_changed.emit(self.tab_id, title)
+            )
 
             if self.theme_manager:
                 default_fg = self.theme_manager.get_theme_color("terminal_text")
@@ -271,6 +334,9 @@ class TerminalTab(QWidget):
                 self.ansi_renderer.set_default_colors(default_fg, default_bg)
             else:
                 self.ansi_renderer.set_default_colors("#ffffff", "#1e1e1e")
+            
+
+            self.process_manager.set_output_parser(self.tab_id, self.prepare_output)
         except Exception as e:
 
             print(f"ANSI渲染器初始化失败: {e}")
@@ -298,8 +364,8 @@ class TerminalTab(QWidget):
         else:
             self.input_line.clear()
             
-    def execute_command(self):
-        """执行命令"""
+    def execute_command(self, priority=None):
+        """执行命令，命令以任务形式提交到全局调度器，没有空闲槽位时进入队列"""
         command = self.input_line.text().strip()
         if not command:
             return
@@ -311,6 +377,10 @@ class TerminalTab(QWidget):
             self.input_line.clear()
             return
             
+        if self.is_job_queued():
+            self.append_output("当前标签页已有任务在排队，请等待或停止后再执行", "error")
+            return
+            
 
         if command not in self.command_history:
             self.command_history.append(command)
@@ -334,55 +404,81 @@ class TerminalTab(QWidget):
                 return
                 
 
-            success = self.process_manager.execute_tool(
+            if priority is None:
+                priority = ProcessSupervisor.PRIORITY_INTERACTIVE
+                
+            job = self.supervisor.submit(
                 process_id=self.tab_id,
+                tool_name=getattr(self, 'tool_name', None) or os.path.basename(command_parts[0]),
                 tool_path=self.working_directory,
                 command_parts=command_parts,
-                working_dir=self.working_directory
+                working_dir=self.working_directory,
+                encoding=self.output_encoding,
+                priority=priority
             )
             
-            if success:
-                if self.theme_manager:
-                    running_color = self.theme_manager.get_theme_color("warning")
-                    self.update_status("运行中", running_color)
-                else:
-                    self.update_status("运行中", "#d4a853")
+            if self.supervisor.is_queued(job.process_id):
+                position = self.supervisor.queue_position(self.tab_id)
+                self.append_output(f"已达到并发上限，任务排队中（第 {position} 位）", "normal")
+                self.update_status("排队中", "#7f8c8d")
                 self.stop_button.setEnabled(True)
                 self.kill_button.setEnabled(True)
-            else:
-                self.append_output("命令执行失败", "error")
                 
         except Exception as e:
             self.append_output(f"执行错误: {str(e)}", "error")
             
-    def setup_process_connections(self):
-        """设置进程连接"""
-        self.process_manager.output_received.connect(self.on_output_received)
-        self.process_manager.process_finished.connect(self.on_process_finished)
-        self.process_manager.process_started.connect(self.on_process_started)
-        self.process_manager.error_occurred.connect(self.on_error_occurred)
-        
     def on_output_received(self, process_id, text):
         """处理进程输出"""
-        if process_id == self.tab_id:
 
-            self.append_ansi_output(text, "stdout")
-            
+        self.append_ansi_output(text, "stdout")
+        
+    def prepare_output(self, text):
+        """在渲染线程中解析进程输出并按行切分，返回 (片段批次, 纯文本)"""
+        batch = SegmentBatch(self.ansi_renderer.parse_ansi_text(text))
+        return batch, batch.plain_text
+        
+    def on_segments_received(self, process_id, batch, text):
+        """处理渲染线程解析好的进程输出，GUI线程只负责插入"""
+        self.output_area.append_batch(batch)
+        self.output_received.emit(text, "stdout")
+        
     def on_process_finished(self, process_id, exit_code):
         """处理进程完成"""
-        if process_id == self.tab_id:
-            self.handle_process_finished(exit_code)
-            
+        self.handle_process_finished(exit_code)
+        
     def on_process_started(self, process_id):
         """处理进程启动"""
-        if process_id == self.tab_id:
-            pass
-                    
+        if self.theme_manager:
+            running_color = self.theme_manager.get_theme_color("warning")
+            self.update_status("运行中", running_color)
+        else:
+            self.update_status("运行中", "#d4a853")
+        self.stop_button.setEnabled(True)
+        self.kill_button.setEnabled(True)
+        
+    def on_job_cancelled(self, process_id):
+        """处理排队任务被取消"""
+        self.append_output("已取消排队中的任务", "normal")
+        self.update_status("已取消", "#7f8c8d")
+        self.stop_button.setEnabled(False)
+        self.kill_button.setEnabled(False)
+        self.process_finished.emit(self.tab_id)
+        
+    def on_job_failed(self, process_id):
+        """处理任务启动失败"""
+        self.append_output("命令执行失败", "error")
+        if self.theme_manager:
+            self.update_status("错误", self.theme_manager.get_theme_color("error"))
+        else:
+            self.update_status("错误", "#a85454")
+        self.stop_button.setEnabled(False)
+        self.kill_button.setEnabled(False)
+        self.process_finished.emit(self.tab_id)
+                
     def on_error_occurred(self, process_id, error_msg):
         """处理进程错误"""
-        if process_id == self.tab_id:
-            self.append_output(f"错误: {error_msg}", "error")
-            
+        self.append_output(f"错误: {error_msg}", "error")
+        
     def handle_process_finished(self, exit_code=0):
         """处理进程结束"""
 
@@ -425,10 +521,6 @@ class TerminalTab(QWidget):
         
     def append_output(self, text, output_type="normal"):
         """添加输出文本（传统方式，用于非ANSI文本）"""
-        cursor = self.output_area.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        
-
         format = QTextCharFormat()
         
         if output_type == "command":
@@ -458,11 +550,7 @@ class TerminalTab(QWidget):
             else:
                 format.setForeground(QColor("#cccccc"))
             
-        cursor.setCharFormat(format)
-        cursor.insertText(text + "\n")
-        
-        self.output_area.setTextCursor(cursor)
-        self.output_area.ensureCursorVisible()
+        self.output_area.append_text(text + "\n", format)
         
 
         self.output_received.emit(text, output_type)
@@ -507,8 +595,29 @@ class TerminalTab(QWidget):
         self.status_label.setText(status)
 
             
+    def record_output_history(self):
+        """把新完成的行记录到全局输出历史，代价与新输出量成正比
+
+        按行号而不是字符位置记录进度，已完成的行被原位改写导致位置平移时不会重复或漏记。
+        """
+        end_line = self.output_area.last_line()
+        if end_line < self.history_line:
+            self.history_line = 0
+        first_line = max(self.history_line, self.output_area.first_line())
+        if end_line <= first_line:
+            return
+        self.history_line = end_line
+        
+        start = self.output_area.line_position(first_line)
+        lines = self.output_area.text_range(start, self.output_area.completed_position() - 1).split('\n')
+        self.output_history.append_lines(
+            self.tab_id, lines, first_line, self.tab_name, getattr(self, 'tool_name', None)
+        )
+        
     def clear_output(self):
         """清空输出"""
+        self.output_history.clear_source(self.tab_id)
+        self.history_line = 0
         if self.ansi_renderer:
             self.ansi_renderer.clear_and_reset()
         else:
@@ -516,7 +625,10 @@ class TerminalTab(QWidget):
         self.append_output("终端已清空", "normal")
         
     def stop_process(self):
-        """停止进程"""
+        """停止进程，排队中的任务直接取消"""
+        if self.supervisor.cancel(self.tab_id):
+            return
+            
         if self.tab_id in self.process_manager.processes:
             try:
                 process = self.process_manager.processes[self.tab_id]
@@ -556,7 +668,10 @@ class TerminalTab(QWidget):
             self.handle_process_finished(0)
                 
     def kill_process(self):
-        """强制终止进程"""
+        """强制终止进程，排队中的任务直接取消"""
+        if self.supervisor.cancel(self.tab_id):
+            return
+            
         if self.tab_id in self.process_manager.processes:
             try:
                 process = self.process_manager.processes[self.tab_id]
@@ -570,41 +685,11 @@ class TerminalTab(QWidget):
                 self.append_output(f"强制终止失败: {str(e)}", "error")
                 
     def send_input(self, text):
-        """向进程发送输入"""
+        """向进程发送输入，编码与写入统一由 ProcessManager.send_input 完成"""
         if self.tab_id in self.process_manager.processes:
-            try:
-                process = self.process_manager.processes[self.tab_id]
-                
-
-                self.append_output(f"> {text}", "input")
-                
-
-                success = False
-                
-
-                if self.process_manager.send_input(self.tab_id, text):
-                    success = True
-
-                elif hasattr(process, 'write'):
-                    try:
-                        process.write(text + "\r\n")
-                        success = True
-                    except Exception:
-                        pass
-
-                elif hasattr(process, 'stdin') and process.stdin:
-                    try:
-                        process.stdin.write(text + "\n")
-                        process.stdin.flush()
-                        success = True
-                    except Exception:
-                        pass
-                
-                if not success:
-                    self.append_output("发送输入失败: 无法找到有效的输入方法", "error")
-                    
-            except Exception as e:
-                self.append_output(f"发送输入失败: {str(e)}", "error")
+            self.append_output(f"> {text}", "input")
+            if not self.process_manager.send_input(self.tab_id, text):
+                self.append_output("发送输入失败: 进程不接受输入或已经退出", "error")
                 
     def is_process_running(self):
         """检查是否有进程在运行"""
@@ -616,6 +701,10 @@ class TerminalTab(QWidget):
                 return process.process.poll() is None
         return False
         
+    def is_job_queued(self):
+        """检查是否有任务在调度队列中等待"""
+        return self.supervisor.is_queued(self.tab_id)
+        
     def get_process_info(self):
         """获取进程信息"""
         if self.tab_id in self.process_manager.processes:
@@ -625,6 +714,10 @@ class TerminalTab(QWidget):
             }
         return None
         
+    def set_memory_budget(self, max_bytes):
+        """设置该标签页输出的内存预算（字节）"""
+        self.output_area.set_memory_budget(max_bytes)
+        
     def set_working_directory(self, directory):
         """设置工作目录"""
         if os.path.exists(directory):
@@ -633,158 +726,225 @@ class TerminalTab(QWidget):
             return True
         return False
         
+    def on_search_text_changed(self, text):
+        """输入变化时立即取消正在进行的搜索，停顿片刻后重新搜索"""
+        self.cancel_search()
+        self.search_timer.start()
+        
+    def cancel_search(self):
+        """取消后台搜索，已交付的结果保留到下一次搜索开始"""
+        if self.search_job is not None:
+            self.search_job.cancelled = True
+            self.search_job = None
+        if self.follow_job is not None:
+            self.follow_job.cancelled = True
+            self.follow_job = None
+            
+    def is_searching(self):
+        return self.search_job is not None
+        
+    def submit_search_job(self, job):
+        """把搜索任务交给本标签页的搜索线程，线程在第一次搜索时创建，之后一直复用"""
+        if self.search_worker is None:
+            self.search_worker = TerminalSearchWorker(self)
+            self.search_worker.matches_found.connect(self.on_search_matches_found)
+            self.search_worker.pattern_too_slow.connect(self.on_search_too_slow)
+            self.search_worker.search_finished.connect(self.on_search_finished)
+        self.search_worker.submit(job)
+        
+    def stop_search_worker(self):
+        """关闭标签页前停止搜索线程：断开信号、取消任务并等待线程结束"""
+        self.search_timer.stop()
+        self.cancel_search()
+        if self.search_worker is None:
+            return
+        worker = self.search_worker
+        self.search_worker = None
+        worker.matches_found.disconnect(self.on_search_matches_found)
+        worker.pattern_too_slow.disconnect(self.on_search_too_slow)
+        worker.search_finished.disconnect(self.on_search_finished)
+        worker.stop()
+        
     def search_text(self):
-        """搜索文本"""
+        """搜索文本，在后台线程中扫描输出快照，结果分批到达"""
+        self.search_timer.stop()
+        self.cancel_search()
+        self.clear_search_highlights()
+        self.search_matches = MatchList()
+        self.current_match_index = -1
+        self.search_generation += 1
+        self.search_pattern = None
+        self.search_too_slow = False
+        self.search_stale = False
+        self.match_label.setToolTip("")
+        
         search_term = self.search_edit.text()
         if not search_term:
-            self.clear_search_highlights()
-            self.match_label.setText("0/0")
-            self.prev_button.setEnabled(False)
-            self.next_button.setEnabled(False)
-            self.export_button.setEnabled(False)
-            self.search_results_area.setVisible(False)
+            self.reset_search_controls()
             return
             
 
-        self.clear_search_highlights()
-        
-
         case_sensitive = self.case_sensitive_btn.isChecked()
         use_regex = self.regex_btn.isChecked()
         
-
-        matches = self.find_matches(search_term, case_sensitive, use_regex)
+        try:
+            pattern = compile_search_pattern(search_term, case_sensitive, use_regex)
+        except re.error as e:
+            self.reset_search_controls()
+            self.match_label.setText("正则错误")
+            self.match_label.setToolTip(str(e))
+            return
+            
+        self.search_pattern = pattern
+        self.search_guarded = use_regex
+        self.follow_position = self.output_area.completed_position()
+        self.search_job = SearchJob(self.search_generation, self.output_area.text_chunks(), pattern,
+                                    guarded=use_regex)
+        
+        self.reset_search_controls()
+        self.match_label.setText("搜索中...")
+        self.reset_search_results_panel(search_term)
+        self.submit_search_job(self.search_job)
+        
+    def reset_search_controls(self):
+        """无搜索结果时的控件状态"""
+        self.match_label.setText("0/0")
+        self.prev_button.setEnabled(False)
+        self.next_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        self.search_results_panel.setVisible(False)
+        
+    def update_match_label(self):
+        """显示当前匹配序号，搜索仍在进行时在总数后加 +"""
+        suffix = "+" if self.is_searching() else ""
+        if self.search_too_slow:
+            suffix += " (正则过慢)"
+        self.match_label.setText(f"{self.current_match_index + 1}/{len(self.search_matches)}{suffix}")
+        
+    def on_search_matches_found(self, job, matches):
+        """后台搜索交付一批匹配，跟随扫描的匹配不跳转视图"""
+        if job.cancelled or job.generation != self.search_generation:
+            return
+            
+        self.add_search_matches(matches, jump=not job.follow)
         
-        if matches:
-            self.search_matches = matches
+    def on_search_too_slow(self, job):
+        """正则超出时间预算，已交付的匹配保留，不再跟随新输出"""
+        if job.cancelled or job.generation != self.search_generation:
+            return
+            
+        self.search_too_slow = True
+        self.match_label.setToolTip(
+            f"正则表达式执行超过 {PerformanceConfig.REGEX_TIME_BUDGET:g} 秒已停止，只显示了部分结果，"
+            f"请简化表达式（例如避免 (a+)+ 这样的嵌套重复）")
+        
+    def add_search_matches(self, matches, jump=True):
+        """把按位置排序的新匹配追加到结果中，结果模型与高亮增量更新"""
+        first_index = len(self.search_matches)
+        self.search_matches.extend(matches)
+        if first_index == 0:
             self.current_match_index = 0
-            self.highlight_matches()
-            self.show_search_results_summary()
-            self.match_label.setText(f"1/{len(matches)}")
-            self.prev_button.setEnabled(len(matches) > 1)
-            self.next_button.setEnabled(len(matches) > 1)
             self.export_button.setEnabled(True)
+            if jump:
+                self.jump_to_match(0)
             
-
-            self.jump_to_match(0)
-        else:
-            self.search_matches = []
-            self.match_label.setText("0/0")
-            self.prev_button.setEnabled(False)
-            self.next_button.setEnabled(False)
-            self.export_button.setEnabled(False)
-            self.search_results_area.setVisible(False)
+        self.prev_button.setEnabled(len(self.search_matches) > 1)
+        self.next_button.setEnabled(len(self.search_matches) > 1)
+        self.highlight_matches()
+        self.append_search_result_items(first_index)
+        self.update_match_label()
+        
+    def on_search_finished(self, job, cancelled):
+        """后台搜索结束"""
+        if job is self.follow_job:
+            self.on_follow_finished(cancelled)
+            return
+        if job is not self.search_job:
+            return
             
-    def find_matches(self, search_term, case_sensitive, use_regex):
-        """查找匹配项 - 使用QTextDocument查找确保位置准确"""
-        matches = []
-        document = self.output_area.document()
-        
-        try:
-            if use_regex:
-                import re
-
-                text = self.output_area.toPlainText()
-                flags = 0 if case_sensitive else re.IGNORECASE
-                pattern = re.compile(search_term, flags)
-                for match in pattern.finditer(text):
-                    matches.append((match.start(), match.end()))
-            else:
+        self.search_job = None
+        if self.search_matches:
+            self.update_match_label()
+            self.update_search_results_title()
+        elif not cancelled:
+            self.reset_search_controls()
+            if self.search_too_slow:
+                self.match_label.setText("正则过慢")
+            
+        if not cancelled:
+            self.follow_new_output()
+            
+    def on_output_positions_shifted(self, position):
+        """已完成的行被原位改写，其后的字符位置已经平移，已有的匹配与跟随位置失效
 
-                from PySide6.QtGui import QTextDocument
-                
-                find_flags = QTextDocument.FindFlag(0)
-                if case_sensitive:
-                    find_flags |= QTextDocument.FindFlag.FindCaseSensitively
-                
-                cursor = QTextCursor(document)
-                cursor.setPosition(0)
+        取消进行中的扫描并在停顿片刻后重新搜索；连续重绘（例如多行进度条）期间只会搜索一次。
+        """
+        if self.search_pattern is None:
+            return
+        if position >= self.follow_position:
+            # 平移发生在已扫描的范围之后，已有的匹配不受影响
+            return
+        self.cancel_search()
+        self.search_stale = True
+        self.search_timer.start()
+        
+    def on_follow_search_toggled(self, checked):
+        """开启跟随搜索时，如果还没有搜索过当前关键字则先完整搜索一次"""
+        if checked:
+            if self.search_pattern is None and self.search_edit.text():
+                self.search_text()
+            else:
+                self.follow_new_output()
                 
-                while True:
-                    cursor = document.find(search_term, cursor, find_flags)
-                    if cursor.isNull():
-                        break
-                    
-                    start = cursor.selectionStart()
-                    end = cursor.selectionEnd()
-                    matches.append((start, end))
-                    
+    def follow_new_output(self):
+        """跟随搜索：只对上次匹配之后新完成的行应用已编译的模式，代价与新输出量成正比
 
-                    cursor.setPosition(start + 1)
-                    
-        except Exception as e:
-
-            print(f"搜索错误: {e}")
-            
-        return matches
-        
-    def clear_search_highlights(self):
-        """清除搜索高亮，保持ANSI格式"""
-        if not hasattr(self, 'search_highlights') or not self.search_highlights:
+        匹配与完整搜索一样在后台线程中进行；同一时间只有一个跟随扫描，
+        扫描期间到达的新行在它结束后一并处理。
+        """
+        if (not self.follow_search_btn.isChecked() or self.search_pattern is None or
+                self.is_searching() or self.follow_job is not None or self.search_too_slow or
+                self.search_stale):
             return
             
+        end = self.output_area.completed_position()
+        if end < self.follow_position:
 
-        document = self.output_area.document()
-        cursor = QTextCursor(document)
+            self.search_text()
+            return
+            
+        start = max(self.follow_position, self.output_area.first_position())
+        if end <= start:
+            return
+        self.follow_position = end
         
-        for start, end, original_format in self.search_highlights:
-            cursor.setPosition(start)
-            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
 
-            cursor.setCharFormat(original_format)
+        last_end = self.search_matches.ends[-1] if self.search_matches else start
+        self.follow_job = SearchJob(self.search_generation, [(start, self.output_area.text_range(start, end))],
+                                    self.search_pattern, guarded=self.search_guarded,
+                                    budget=PerformanceConfig.REGEX_FOLLOW_BUDGET, min_start=last_end, follow=True)
+        self.submit_search_job(self.follow_job)
         
-
-        self.search_highlights = []
+    def on_follow_finished(self, cancelled):
+        """跟随扫描结束，继续处理扫描期间新完成的行"""
+        self.follow_job = None
+        if cancelled:
+            return
+        if self.search_too_slow:
+            self.update_match_label()
+            return
+        self.follow_new_output()
+        
+    def clear_search_highlights(self):
+        """清除搜索高亮"""
+        self.output_area.clear_highlights()
         
     def highlight_matches(self):
-        """高亮显示匹配项，保持ANSI格式"""
+        """高亮显示匹配项，高亮在绘制时叠加，不改变ANSI格式"""
         if not hasattr(self, 'search_matches') or not self.search_matches:
             return
             
-
-        self.clear_search_highlights()
-        
-
-        self.search_highlights = []
-        
-
-        document = self.output_area.document()
-        cursor = QTextCursor(document)
-        
-
-        for i, (start, end) in enumerate(self.search_matches):
-            cursor.setPosition(start)
-            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
-            
-
-            original_format = cursor.charFormat()
-            
-
-            highlight_format = QTextCharFormat(original_format)
-            
-            if i == self.current_match_index:
-
-                highlight_format.setBackground(QColor("#ff8c00"))
-
-                if self._is_light_color(original_format.foreground().color()):
-                    highlight_format.setForeground(QColor("#000000"))
-                else:
-                    highlight_format.setForeground(QColor("#ffffff"))
-            else:
-
-                highlight_format.setBackground(QColor("#ffff00"))
-
-                highlight_format.setForeground(QColor("#000000"))
-            
-
-            cursor.setCharFormat(highlight_format)
-            
-
-            self.search_highlights.append((start, end, original_format))
-        
-
-        cursor.clearSelection()
-        self.output_area.setTextCursor(cursor)
+        self.output_area.set_highlights(self.search_matches, self.current_match_index)
     
     def _is_light_color(self, color):
         """判断颜色是否为浅色"""
@@ -802,143 +962,74 @@ class TerminalTab(QWidget):
              
          if 0 <= index < len(self.search_matches):
              start, end = self.search_matches[index]
-             cursor = self.output_area.textCursor()
-             cursor.setPosition(start)
-             cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
-             
-             self.output_area.setTextCursor(cursor)
-             self.output_area.ensureCursorVisible()
+             self.output_area.select_range(start, end)
             
     def update_search_results_selection(self):
-        """更新搜索结果列表的选中状态"""
+        """更新搜索结果列表的选中状态，只刷新新旧当前行"""
         if not hasattr(self, 'search_matches') or not self.search_matches:
             return
             
-
-        for i in range(2, self.search_results_area.count()):
-            item = self.search_results_area.item(i)
-            match_index = item.data(Qt.ItemDataRole.UserRole)
-            
-            if match_index == self.current_match_index:
-                item.setBackground(QColor("#fff3e0"))
-                item.setForeground(QColor("#f57c00"))
-                font = item.font()
-                font.setBold(True)
-                item.setFont(font)
-
-                self.search_results_area.setCurrentRow(i)
-            else:
-                item.setBackground(QColor("#ffffff"))
-                item.setForeground(QColor("#333333"))
-                font = item.font()
-                font.setBold(False)
-                item.setFont(font)
+        self.search_results_model.set_current(self.current_match_index)
+        if 0 <= self.current_match_index < self.search_results_model.rowCount():
+            model_index = self.search_results_model.index(self.current_match_index)
+            self.search_results_area.setCurrentIndex(model_index)
+            self.search_results_area.scrollTo(model_index)
             
     def find_previous(self):
         """查找上一个匹配项"""
         if hasattr(self, 'search_matches') and self.search_matches:
             self.current_match_index = (self.current_match_index - 1) % len(self.search_matches)
-            self.highlight_matches()
+            self.output_area.set_current_highlight(self.current_match_index)
             self.jump_to_match(self.current_match_index)
-            self.match_label.setText(f"{self.current_match_index + 1}/{len(self.search_matches)}")
+            self.update_match_label()
             self.update_search_results_selection()
             
     def find_next(self):
         """查找下一个匹配项"""
         if hasattr(self, 'search_matches') and self.search_matches:
             self.current_match_index = (self.current_match_index + 1) % len(self.search_matches)
-            self.highlight_matches()
+            self.output_area.set_current_highlight(self.current_match_index)
             self.jump_to_match(self.current_match_index)
-            self.match_label.setText(f"{self.current_match_index + 1}/{len(self.search_matches)}")
+            self.update_match_label()
             self.update_search_results_selection()
     def show_search_results_summary(self):
         """显示搜索结果汇聚 - 显示所有匹配项"""
         if not hasattr(self, 'search_matches') or not self.search_matches:
-            self.search_results_area.setVisible(False)
+            self.search_results_panel.setVisible(False)
             return
             
-        search_term = self.search_edit.text()
-        text = self.output_area.toPlainText()
-        
-
-        self.search_results_area.clear()
-        
-
-        from PySide6.QtWidgets import QListWidgetItem
-        from PySide6.QtCore import Qt
-        
-        title_item = QListWidgetItem(f"搜索词: '{search_term}' | 匹配数量: {len(self.search_matches)}")
-        title_item.setFlags(Qt.ItemFlag.NoItemFlags)
-        title_item.setBackground(QColor("#e3f2fd"))
-        title_item.setForeground(QColor("#1976d2"))
-        font = title_item.font()
-        font.setBold(True)
-        title_item.setFont(font)
-        self.search_results_area.addItem(title_item)
-        
-
-        separator_item = QListWidgetItem("=" * 80)
-        separator_item.setFlags(Qt.ItemFlag.NoItemFlags)
-        separator_item.setBackground(QColor("#f5f5f5"))
-        self.search_results_area.addItem(separator_item)
-        
-
-        for i, (start, end) in enumerate(self.search_matches):
-
-            line_start = text.rfind('\n', 0, start) + 1
-            line_end = text.find('\n', end)
-            if line_end == -1:
-                line_end = len(text)
-                
-            line_text = text[line_start:line_end].strip()
-            line_number = text[:start].count('\n') + 1
-            match_text = text[start:end]
-            
-
-            display_text = line_text
-            
-
-            highlighted_text = display_text
-            
-
-            item_text = f"匹配 {i+1} (行{line_number}): {highlighted_text}"
-            item = QListWidgetItem(item_text)
-            
-
-            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-            
-
-            item.setData(Qt.ItemDataRole.UserRole, i)
-            
-
-            if i == self.current_match_index:
-                item.setBackground(QColor("#fff3e0"))
-                item.setForeground(QColor("#f57c00"))
-                font = item.font()
-                font.setBold(True)
-                item.setFont(font)
-            else:
-                item.setBackground(QColor("#ffffff"))
-                item.setForeground(QColor("#333333"))
-            
-            self.search_results_area.addItem(item)
-            
-        self.search_results_area.setVisible(True)
-        
-
-        if self.current_match_index >= 0 and self.current_match_index < self.search_results_area.count() - 2:
-
-            self.search_results_area.setCurrentRow(self.current_match_index + 2)
+        self.reset_search_results_panel(self.search_edit.text())
+        self.append_search_result_items(0)
+        
+    def reset_search_results_panel(self, search_term):
+        """让结果模型指向新的匹配列表"""
+        self.search_title_term = search_term
+        self.search_results_model.reset(self.search_matches, self.current_match_index)
+        self.update_search_results_title()
+        
+    def update_search_results_title(self):
+        """更新结果列表标题中的匹配数量"""
+        count = f"{len(self.search_matches)}+" if self.is_searching() else str(len(self.search_matches))
+        self.search_results_title.setText(f"搜索词: '{self.search_title_term}' | 匹配数量: {count}")
+        
+    def append_search_result_items(self, first_index):
+        """通知结果模型 first_index 之后追加了新的匹配，行文本在显示时才生成"""
+        self.search_results_model.rows_appended(first_index)
+        self.update_search_results_title()
+        self.search_results_panel.setVisible(True)
+        
+        if first_index == 0:
+            self.update_search_results_selection()
     
-    def on_search_result_clicked(self, item):
+    def on_search_result_clicked(self, index):
         """处理搜索结果点击事件"""
-        match_index = item.data(Qt.ItemDataRole.UserRole)
+        match_index = index.data(SearchResultsModel.MatchIndexRole)
         if match_index is not None and isinstance(match_index, int):
             if 0 <= match_index < len(self.search_matches):
                 self.current_match_index = match_index
-                self.highlight_matches()
+                self.output_area.set_current_highlight(match_index)
                 self.jump_to_match(match_index)
-                self.match_label.setText(f"{match_index + 1}/{len(self.search_matches)}")
+                self.update_match_label()
                 
 
                 self.update_search_results_selection()
@@ -949,8 +1040,7 @@ class TerminalTab(QWidget):
              return
              
          search_term = self.search_edit.text()
-         text = self.output_area.toPlainText()
-         lines = text.split('\n')
+         first_position = self.output_area.first_position()
          
          results = []
          results.append(f"搜索词: {search_term}")
@@ -961,19 +1051,16 @@ class TerminalTab(QWidget):
          results.append("=" * 60)
          
          for i, (start, end) in enumerate(self.search_matches):
+             if start < first_position:
+                 continue
 
-             line_start = text.rfind('\n', 0, start) + 1
-             line_end = text.find('\n', end)
-             if line_end == -1:
-                 line_end = len(text)
-                 
-             line_text = text[line_start:line_end]
-             line_number = text[:start].count('\n') + 1
+             line, line_start, line_text = self.output_area.line_at(start)
+             line_number = line + 1
              
 
              match_start_in_line = start - line_start
              match_end_in_line = end - line_start
-             match_text = text[start:end]
+             match_text = self.output_area.text_range(start, end)
              
              results.append(f"\n匹配 {i+1}:")
              results.append(f"  行号: {line_number}")
@@ -1002,7 +1089,15 @@ class TerminalArea(QWidget):
         self.tool_processes = {}
         self.current_filter_tool = None
         self.all_tabs = {}
+        self.process_tabs = {}
+        self.supervisor = ProcessSupervisor.instance()
         self.init_ui()
+        self.supervisor.queue_changed.connect(self.on_queue_changed)
+        self.setup_process_dispatch()
+        
+        if self.theme_manager:
+            shared_style_table.apply_theme(self.theme_manager)
+            self.theme_manager.theme_changed.connect(self.on_theme_changed)
         
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -1060,6 +1155,12 @@ class TerminalArea(QWidget):
         
         layout.addWidget(self.tab_widget)
     
+    def on_theme_changed(self, theme_name):
+        """主题切换时重建ANSI调色板并重绘所有终端"""
+        if shared_style_table.apply_theme(self.theme_manager):
+            for tab in self.tabs.values():
+                tab.output_area.viewport().update()
+    
     def toggle_run_mode(self):
         """切换命令执行模式"""
         self.run_in_new_tab = not self.run_in_new_tab
@@ -1072,18 +1173,66 @@ class TerminalArea(QWidget):
             self.run_mode_button.setChecked(False)
             self.update_status_info("命令执行模式：当前标签页")
     
+    def setup_process_dispatch(self):
+        """进程信号只在这里连接一次，按 process_id 直接交给对应的标签页，避免每个标签页都收到全部输出"""
+        manager = self.supervisor.manager
+        self.supervisor.job_cancelled.connect(self.dispatch_job_cancelled)
+        self.supervisor.job_failed.connect(self.dispatch_job_failed)
+        manager.output_received.connect(self.dispatch_output_received)
+        manager.segments_received.connect(self.dispatch_segments_received)
+        manager.process_finished.connect(self.dispatch_process_finished)
+        manager.process_started.connect(self.dispatch_process_started)
+        manager.error_occurred.connect(self.dispatch_error_occurred)
+        
+    def dispatch_output_received(self, process_id, text):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_output_received(process_id, text)
+            
+    def dispatch_segments_received(self, process_id, batch, text):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_segments_received(process_id, batch, text)
+            
+    def dispatch_process_finished(self, process_id, exit_code):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_process_finished(process_id, exit_code)
+            
+    def dispatch_process_started(self, process_id):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_process_started(process_id)
+            
+    def dispatch_job_cancelled(self, process_id):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_job_cancelled(process_id)
+            
+    def dispatch_job_failed(self, process_id):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_job_failed(process_id)
+            
+    def dispatch_error_occurred(self, process_id, error_msg):
+        tab = self.process_tabs.get(process_id)
+        if tab is not None:
+            tab.on_error_occurred(process_id, error_msg)
+            
     def add_terminal_tab(self, name=None):
         """添加新的终端标签页"""
         if name is None:
             name = f"进程{len(self.tabs) + 1}"
             
         tab = TerminalTab(name, self.theme_manager)
+        self.process_tabs[tab.tab_id] = tab
         tab_index = self.tab_widget.addTab(tab, name)
         self.tabs[tab.tab_id] = tab
         
 
         tab.process_finished.connect(self.on_process_finished)
         tab.output_received.connect(self.on_output_received)
+        tab.title_changed.connect(self.on_tab_title_changed)
         
 
         self.tab_widget.setCurrentIndex(tab_index)
@@ -1091,6 +1240,14 @@ class TerminalArea(QWidget):
         self.update_status_info()
         return tab
     
+    def on_tab_title_changed(self, tab_id, title):
+        """进程通过OSC序列设置窗口标题时，显示为标签页提示"""
+        tab = self.tabs.get(tab_id)
+        if tab:
+            index = self.tab_widget.indexOf(tab)
+            if index >= 0:
+                self.tab_widget.setTabToolTip(index, title)
+    
     def on_tab_renamed(self, index, new_name):
         """标签页重命名事件处理"""
         if 0 <= index < self.tab_widget.count():
@@ -1155,6 +1312,13 @@ class TerminalArea(QWidget):
                     return
                     
                 tab.kill_process()
+            elif tab.is_job_queued():
+                tab.stop_process()
+                
+            tab.stop_search_worker()
+            tab.process_manager.set_output_parser(tab.tab_id, None)
+            OutputHistory.instance().remove_source(tab.tab_id)
+            self.process_tabs.pop(tab.tab_id, None)
             
 
             if tab.tab_id in self.all_tabs:
@@ -1259,6 +1423,7 @@ class TerminalArea(QWidget):
         tab_name = f"进程{tool_tab_count + 1}"
         tab = TerminalTab(tab_name, self.theme_manager)
         tab.tool_name = tool_name
+        self.process_tabs[tab.tab_id] = tab
         return tab
         
     def show_all_tabs(self):
@@ -1309,9 +1474,10 @@ class TerminalArea(QWidget):
         if hasattr(main_window, 'tool_selector'):
             main_window.tool_selector.clear_selection()
         
-    def execute_tool(self, tool_info, parameters, working_dir=None):
-        """执行工具"""
+    def execute_tool(self, tool_info, parameters, working_dir=None, priority=ProcessSupervisor.PRIORITY_NORMAL):
+        """执行工具，超出并发上限时任务进入全局队列按优先级等待"""
         tool_name = tool_info.name if hasattr(tool_info, 'name') else 'Unknown Tool'
+        self.supervisor.set_tool_limit(tool_name, get_configured_process_limits(tool_name)[1])
         
 
         run_in_new_tab = self.run_in_new_tab
@@ -1327,6 +1493,7 @@ class TerminalArea(QWidget):
         
 
         tab.tool_name = tool_name
+        tab.output_encoding = get_configured_output_encoding(tool_info)
         
 
         if not working_dir:
@@ -1347,7 +1514,7 @@ class TerminalArea(QWidget):
         
 
         tab.input_line.setText(command)
-        tab.execute_command()
+        tab.execute_command(priority)
         
 
         self.tool_processes[tool_name] = tab.tab_id
@@ -1445,11 +1612,19 @@ class TerminalArea(QWidget):
         for tab in self.tabs.values():
             tab.clear_output()
             
+    def stop_search_workers(self):
+        """应用关闭前停止所有标签页的搜索线程"""
+        for tab in {**self.tabs, **self.all_tabs}.values():
+            if hasattr(tab, 'stop_search_worker'):
+                tab.stop_search_worker()
+                
     def stop_all_processes(self):
         """停止所有进程"""
         running_count = 0
         for tab in self.tabs.values():
-            if tab.is_process_running():
+            if tab.is_job_queued():
+                tab.stop_process()
+            elif tab.is_process_running():
                 tab.stop_process()
                 running_count += 1
                 
@@ -1480,6 +1655,33 @@ class TerminalArea(QWidget):
                     processes.append(process_info)
         return processes
         
+    def on_queue_changed(self, running_count, queued_count):
+        """全局调度队列变化事件"""
+        self.update_status_info()
+        
+    def get_queue_summary(self):
+        """返回调度队列的状态文本，队列为空时返回空字符串"""
+        queued_count = self.supervisor.queued_count()
+        if not queued_count:
+            return ""
+        return f" | 排队: {queued_count} (并发 {self.supervisor.running_count()}/{self.supervisor.max_concurrent})"
+        
+    def update_queue_tooltip(self):
+        """在状态栏提示中列出排队中的任务"""
+        jobs = self.supervisor.queued_jobs()
+        if not jobs:
+            self.status_info.setToolTip("")
+            return
+            
+        lines = [f"排队中的任务 ({len(jobs)}):"]
+        for position, job in enumerate(jobs[:20], 1):
+            tab = self.tabs.get(job.process_id)
+            tab_name = tab.tab_name if tab else job.process_id[:8]
+            lines.append(f"{position}. {job.tool_name} - {tab_name}")
+        if len(jobs) > 20:
+            lines.append(f"... 还有 {len(jobs) - 20} 个任务")
+        self.status_info.setToolTip("\n".join(lines))
+        
     def update_status_info(self, message=None):
         """更新状态信息"""
         if message:
@@ -1502,17 +1704,36 @@ class TerminalArea(QWidget):
         current_tool_running_count = len(current_tool_processes)
         
 
+        queue_summary = self.get_queue_summary()
+        self.update_queue_tooltip()
+        
+
         if current_tool_name:
             if current_tool_running_count > 0:
-                self.status_info.setText(f"工具: {current_tool_name} | 运行中: {current_tool_running_count} | 总终端: {total_tabs}")
+                self.status_info.setText(f"工具: {current_tool_name} | 运行中: {current_tool_running_count} | 总终端: {total_tabs}{queue_summary}")
             else:
-                self.status_info.setText(f"工具: {current_tool_name} | 就绪 | 总终端: {total_tabs}")
+                self.status_info.setText(f"工具: {current_tool_name} | 就绪 | 总终端: {total_tabs}{queue_summary}")
         else:
             if all_running_count > 0:
-                self.status_info.setText(f"终端: {total_tabs} | 运行中: {all_running_count}")
+                self.status_info.setText(f"终端: {total_tabs} | 运行中: {all_running_count}{queue_summary}")
             else:
-                self.status_info.setText(f"终端: {total_tabs} | 就绪")
+                self.status_info.setText(f"终端: {total_tabs} | 就绪{queue_summary}")
+            
+    def get_output_history(self):
+        """返回全局输出历史的带索引快照，供全局搜索在后台线程中遍历"""
+        return OutputHistory.instance().snapshot()
+        
+    def show_output_line(self, tab_id, line):
+        """切换到输出所在的标签页并选中该行"""
+        tab = self.tabs.get(tab_id)
+        if not tab:
+            self.update_status_info("该输出所在的终端已关闭")
+            return False
             
+        self.tab_widget.setCurrentIndex(self.tab_widget.indexOf(tab))
+        tab.output_area.select_line(line)
+        return True
+        
     def send_input_to_tab(self, tab_id, text):
         """向指定标签页发送输入"""
         if tab_id in self.tabs:
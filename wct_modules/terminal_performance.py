@@ -3,11 +3,13 @@
 提供终端渲染和ANSI处理的性能优化功能
 """
 
-from PySide6.QtCore import QTimer, QThread, Signal, QMutex, QMutexLocker
+from PySide6.QtCore import QObject, Signal, QMutex, QMutexLocker
 from PySide6.QtWidgets import QTextEdit
 from PySide6.QtGui import QTextCursor
+import os
 import time
-from collections import deque
+import codecs
+from collections import OrderedDict
 from typing import List, Tuple
 import threading
 
@@ -16,8 +18,35 @@ class PerformanceConfig:
     
 
     MAX_OUTPUT_LINES = 10000
-    BATCH_SIZE = 100
-    RENDER_DELAY = 50
+    FRAME_RATE = 30
+    PARSE_CHUNK_SIZE = 32 * 1024
+    TERMINAL_MEMORY_BUDGET = 128 * 1024 * 1024
+    DEFAULT_OUTPUT_ENCODING = 'utf-8'
+    
+
+    MAX_CONCURRENT_PROCESSES = max(2, os.cpu_count() or 2)
+    MAX_PROCESSES_PER_TOOL = 4
+    PROCESS_REAP_INTERVAL = 0.05
+    
+
+    SEARCH_FIRST_RESULTS = 200
+    SEARCH_BATCH_INTERVAL = 0.1
+    SEARCH_DEBOUNCE_MS = 200
+    SEARCH_CHUNK_OVERLAP = 4096
+    REGEX_TIME_BUDGET = 3.0
+    REGEX_FOLLOW_BUDGET = 0.5
+    
+
+    OUTPUT_HISTORY_BUDGET = 64 * 1024 * 1024
+    OUTPUT_HISTORY_CHUNK_LINES = 1024
+    
+
+    TOOL_SCAN_WORKERS = 8
+    TOOL_SCAN_FIRST_BATCH = 0.05
+    TOOL_SCAN_BATCH_INTERVAL = 0.2
+    TOOLBAR_BUTTON_BATCH = 50
+    TOOL_WATCH_DEBOUNCE = 300
+    PARAMETER_WRITE_DEBOUNCE = 500
     
 
     ANSI_CACHE_SIZE = 1000
@@ -27,111 +56,377 @@ class PerformanceConfig:
     AUTO_CLEANUP_THRESHOLD = 50000
     CLEANUP_KEEP_LINES = 5000
 
+class OutputStream:
+    """单个进程的输出流：原始字节累积在bytearray中，交付时才增量解码"""
+    
+    __slots__ = ('pending', 'texts', 'decoder')
+    
+    def __init__(self, encoding=None):
+        self.pending = bytearray()
+        self.texts = []
+        self.decoder = self.create_decoder(encoding or PerformanceConfig.DEFAULT_OUTPUT_ENCODING)
+        
+    @staticmethod
+    def create_decoder(encoding):
+        """创建增量解码器，跨读取边界的多字节字符会被保留到下一次解码"""
+        try:
+            decoder_class = codecs.getincrementaldecoder(encoding)
+        except LookupError:
+            print(f"未知的输出编码 {encoding}，使用 {PerformanceConfig.DEFAULT_OUTPUT_ENCODING}")
+            decoder_class = codecs.getincrementaldecoder(PerformanceConfig.DEFAULT_OUTPUT_ENCODING)
+        return decoder_class(errors='replace')
+
 class OutputBuffer:
-    """输出缓冲区"""
+    """按进程聚合的输出缓冲区
     
-    def __init__(self, max_size=1000):
-        self.buffer = deque(maxlen=max_size)
+    读取线程只负责追加，GUI线程按帧一次性取走，每个进程每帧只解码并产生一段文本。
+    同一个键重新打开时，上一次运行尚未取走的输出与结束事件先单独交付一帧，再交付新一次运行的输出。
+    """
+    
+    def __init__(self):
+        self.streams = {}
+        self.finished = {}
+        # (键, 被替换的输出流, 退出码或None)，按打开顺序排列
+        self.retired = []
         self.mutex = QMutex()
         
-    def add(self, text, format_info=None):
-        """添加文本到缓冲区"""
+    def open(self, key, encoding=None):
+        """登记一个会持续产生输出的进程及其输出编码"""
         with QMutexLocker(self.mutex):
-            self.buffer.append((text, format_info, time.time()))
+            stream = self.streams.get(key)
+            if stream is not None and (stream.pending or stream.texts or key in self.finished):
+                self.retired.append((key, stream, self.finished.pop(key, None)))
+            self.streams[key] = OutputStream(encoding)
+            
+    def _get_stream(self, key):
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = OutputStream()
+        return stream
+        
+    def add_bytes(self, key, data):
+        """追加原始字节输出，data可以是读取线程复用缓冲区的memoryview"""
+        with QMutexLocker(self.mutex):
+            self._get_stream(key).pending += data
+        
+    def add(self, key, text):
+        """追加已解码的文本输出"""
+        with QMutexLocker(self.mutex):
+            self._get_stream(key).texts.append(text)
+    
+    def mark_finished(self, key, exit_code):
+        """记录进程结束，在其剩余输出交付之后再通知"""
+        with QMutexLocker(self.mutex):
+            self.finished[key] = exit_code
     
-    def get_all(self):
-        """获取所有缓冲的文本"""
+    def take_all(self):
+        """取走所有缓冲的输出和结束事件，仅在GUI线程调用"""
+        taken = []
+        retired = []
         with QMutexLocker(self.mutex):
-            items = list(self.buffer)
-            self.buffer.clear()
-            return items
+            # 每个键每帧最多交付一次运行，被替换的运行优先
+            retired_keys = set()
+            remaining = []
+            for entry in self.retired:
+                if entry[0] in retired_keys:
+                    remaining.append(entry)
+                else:
+                    retired_keys.add(entry[0])
+                    retired.append(entry)
+            self.retired = remaining
+            
+            for key, stream in self.streams.items():
+                if key in retired_keys:
+                    continue
+                if stream.pending or stream.texts or key in self.finished:
+                    taken.append((key, stream, stream.pending, stream.texts))
+                    stream.pending = bytearray()
+                    stream.texts = []
+            finished = {key: code for key, code in self.finished.items() if key not in retired_keys}
+            self.finished = {key: code for key, code in self.finished.items() if key in retired_keys}
+            for key in finished:
+                self.streams.pop(key, None)
+                
+        outputs = {}
+        for key, stream, exit_code in retired:
+            text = ''.join(stream.texts) + stream.decoder.decode(stream.pending, final=True)
+            if text:
+                outputs[key] = text
+        for key, stream, pending, texts in taken:
+            text = ''.join(texts)
+            if pending or key in finished:
+                text += stream.decoder.decode(pending, final=key in finished)
+            if text:
+                outputs[key] = text
+        finished.update((key, exit_code) for key, _, exit_code in retired if exit_code is not None)
+        return outputs, finished
     
     def size(self):
-        """获取缓冲区大小"""
+        """获取有待交付输出的进程数量"""
         with QMutexLocker(self.mutex):
-            return len(self.buffer)
+            return (sum(1 for stream in self.streams.values() if stream.pending or stream.texts) +
+                    len(self.finished) + len(self.retired))
+    
+    def is_idle(self):
+        """没有待交付内容且没有运行中的进程"""
+        with QMutexLocker(self.mutex):
+            return not self.streams and not self.finished and not self.retired
 
-class BatchRenderer(QThread):
-    """批量渲染器"""
+class RenderWorker:
+    """共享渲染线程
+
+    按固定帧率轮询所有活动的 BatchRenderer，在后台完成解码与ANSI解析，
+    GUI线程只接收解析好的片段并负责插入与绘制。一个线程服务所有标签页。
+    """
+    
+    _instance = None
+    _instance_lock = threading.Lock()
     
-    render_batch = Signal(list)
+    @classmethod
+    def instance(cls):
+        """获取全局共享的渲染线程"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
     
-    def __init__(self, output_buffer):
-        super().__init__()
+    def __init__(self):
+        self.interval = 1.0 / PerformanceConfig.FRAME_RATE
+        self.active = set()
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.kick = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="wct-render-worker", daemon=True)
+        self.thread.start()
+    
+    def schedule(self, renderer):
+        """开始为渲染器按帧交付输出"""
+        with self.lock:
+            self.active.add(renderer)
+        self.wakeup.set()
+    
+    def unschedule(self, renderer):
+        with self.lock:
+            self.active.discard(renderer)
+            
+    def poke(self):
+        """不等本帧剩余时间，立即开始下一轮（GUI确认了一片解析结果时调用）"""
+        self.kick.set()
+    
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            frame_start = time.monotonic()
+            with self.lock:
+                renderers = list(self.active)
+            
+            for renderer in renderers:
+                try:
+                    idle = renderer.process_buffer()
+                except Exception as e:
+                    print(f"渲染线程处理输出失败: {e}")
+                    idle = True
+                if idle:
+                    with self.lock:
+
+                        if renderer.is_idle():
+                            self.active.discard(renderer)
+            
+            with self.lock:
+                if not self.active:
+                    self.wakeup.clear()
+            self.kick.wait(max(0.0, self.interval - (time.monotonic() - frame_start)))
+            self.kick.clear()
+
+class BatchRenderer(QObject):
+    """按固定帧率把OutputBuffer中的输出交付给GUI，渲染开销随帧数而不是数据块数量增长
+
+    解码与解析在共享的 RenderWorker 线程中进行：设置了解析器的输出按 PARSE_CHUNK_SIZE
+    分片解析，以 segments_ready(键, 解析结果, 纯文本) 交付，否则以 output_ready(键, 文本) 交付。
+    信号跨线程排队到GUI线程，交付顺序与输出顺序一致；每个键同时只有一片在途，
+    GUI插入一片后调用 acknowledge(键)，该键的下一片才会发出，避免大量分片积压在事件队列中阻塞输入与绘制。
+    等待确认时渲染线程不阻塞，继续交付其他键的输出，一个标签页的大量输出不会拖慢其他标签页。
+    尚未发出的文本保留在 backlog 中，进程结束通知在该键的剩余文本全部发出后才发出；
+    结束通知发出之前同一个键再次运行产生的输出暂存在 deferred 中，不会插到上一次运行的结束通知之前。
+    """
+    
+    ACK_TIMEOUT = 1.0
+    
+    output_ready = Signal(str, str)
+    segments_ready = Signal(str, object, str)
+    process_finished = Signal(str, int)
+    
+    def __init__(self, output_buffer, parent=None):
+        super().__init__(parent)
         self.output_buffer = output_buffer
-        self.running = True
-        self.render_timer = QTimer()
-        self.render_timer.timeout.connect(self.process_buffer)
-        self.render_timer.moveToThread(self)
+        self.parsers = {}
+        # 键 -> [文本, 已发出的偏移]，只在渲染线程中访问
+        self.backlog = {}
+        self.pending_finished = {}
+        # 键 -> [(文本, 退出码或None), ...]，等待上一次运行的结束通知发出
+        self.deferred = {}
+        # 键 -> 发出时间，GUI线程确认后移除
+        self.in_flight = {}
+        self.in_flight_lock = threading.Lock()
+    
+    def set_parser(self, key, parser):
+        """为输出设置解析器：parser(text) -> (解析结果, 纯文本)，将在渲染线程中调用"""
+        if parser is None:
+            self.parsers.pop(key, None)
+        else:
+            self.parsers[key] = parser
         
-    def run(self):
-        """运行批量渲染器"""
-        self.render_timer.start(PerformanceConfig.RENDER_DELAY)
-        self.exec()
+    def start(self):
+        """开始按帧交付"""
+        RenderWorker.instance().schedule(self)
         
     def process_buffer(self):
-        """处理缓冲区"""
-        if self.output_buffer.size() > 0:
-            items = self.output_buffer.get_all()
-            if items:
-
-                for i in range(0, len(items), PerformanceConfig.BATCH_SIZE):
-                    batch = items[i:i + PerformanceConfig.BATCH_SIZE]
-                    self.render_batch.emit(batch)
+        """交付一帧内累积的输出，返回是否已没有待交付的内容"""
+        outputs, finished = self.output_buffer.take_all()
+        for key in list(outputs) + [key for key in finished if key not in outputs]:
+            self._accept(key, outputs.get(key, ''), finished.get(key))
+        
+        # 各键轮流发出一片，等待确认的键直接跳过
+        chunk_size = PerformanceConfig.PARSE_CHUNK_SIZE
+        for key in list(self.backlog):
+            if self.is_in_flight(key):
+                continue
+            text, offset = self.backlog[key]
+            chunk = text[offset:offset + chunk_size]
+            offset += len(chunk)
+            if offset >= len(text):
+                del self.backlog[key]
+            else:
+                self.backlog[key][1] = offset
+                
+            parser = self.parsers.get(key)
+            if parser:
+                result, plain_text = parser(chunk)
+                with self.in_flight_lock:
+                    self.in_flight[key] = time.monotonic()
+                self.segments_ready.emit(key, result, plain_text)
+            else:
+                self.output_ready.emit(key, chunk)
+                
+        for key in list(self.pending_finished):
+            if key not in self.backlog:
+                self.process_finished.emit(key, self.pending_finished.pop(key))
+                self._resume_deferred(key)
+            
+        return self.is_idle()
+    
+    def _accept(self, key, text, exit_code):
+        """接收一个键一帧的输出与结束事件"""
+        if key in self.pending_finished:
+            # 上一次运行的结束通知还没有发出
+            self.deferred.setdefault(key, []).append((text, exit_code))
+            return
+        if text:
+            if key in self.parsers or key in self.backlog:
+                entry = self.backlog.get(key)
+                if entry is None:
+                    self.backlog[key] = [text, 0]
+                else:
+                    entry[0] = entry[0][entry[1]:] + text
+                    entry[1] = 0
+            else:
+                self.output_ready.emit(key, text)
+        if exit_code is not None:
+            self.pending_finished[key] = exit_code
+            
+    def _resume_deferred(self, key):
+        """结束通知发出后，按顺序接收该键暂存的输出，直到遇到下一次结束"""
+        queued = self.deferred.pop(key, [])
+        while queued:
+            self._accept(key, *queued.pop(0))
+            if key in self.pending_finished:
+                if queued:
+                    self.deferred[key] = queued
+                break
+    
+    def is_in_flight(self, key):
+        """该键是否有一片解析结果尚未被GUI确认，超过 ACK_TIMEOUT 视为已确认"""
+        with self.in_flight_lock:
+            sent = self.in_flight.get(key)
+            if sent is None:
+                return False
+            if time.monotonic() - sent > self.ACK_TIMEOUT:
+                del self.in_flight[key]
+                return False
+            return True
+    
+    def is_idle(self):
+        return (not self.backlog and not self.pending_finished and not self.deferred and
+                self.output_buffer.is_idle())
+    
+    def acknowledge(self, key):
+        """GUI线程处理完一片解析结果后调用，允许渲染线程交付该键的下一片"""
+        with self.in_flight_lock:
+            self.in_flight.pop(key, None)
+        if self.backlog:
+            RenderWorker.instance().poke()
     
     def stop(self):
-        """停止渲染器"""
-        self.running = False
-        if self.render_timer.isActive():
-            self.render_timer.stop()
-        self.quit()
-        self.wait()
+        """停止交付并清空剩余内容"""
+        RenderWorker.instance().unschedule(self)
+        while True:
+            with self.in_flight_lock:
+                self.in_flight.clear()
+            self.process_buffer()
+            if not self.backlog and not self.pending_finished and not self.deferred:
+                break
 
 class ANSICache:
-    """ANSI解析缓存"""
+    """ANSI解析缓存(O(1) LRU)
+
+    键为 (进入时的格式状态, 文本块)，值为 (解析片段, 退出时的格式状态)。
+    解析结果依赖解析器的当前格式，仅以文本为键会回放过期格式并跳过状态迁移。
+    """
     
-    def __init__(self, max_size=1000):
-        self.cache = {}
-        self.access_order = deque(maxlen=max_size)
-        self.max_size = max_size
+    def __init__(self, max_size=None, monitor=None):
+        self.cache = OrderedDict()
+        self.max_size = max_size or PerformanceConfig.ANSI_CACHE_SIZE
+        self.monitor = monitor
         self.mutex = QMutex()
     
-    def get(self, text):
-        """获取缓存的解析结果"""
+    def get(self, state, text):
+        """获取缓存的解析结果，返回 (片段, 退出状态) 或 None"""
         if not PerformanceConfig.ENABLE_ANSI_CACHE:
             return None
             
+        key = (state, text)
         with QMutexLocker(self.mutex):
-            if text in self.cache:
-
-                if text in self.access_order:
-                    self.access_order.remove(text)
-                self.access_order.append(text)
-                return self.cache[text]
-        return None
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+            return entry
     
-    def put(self, text, result):
-        """缓存解析结果"""
+    def put(self, state, text, segments, exit_state):
+        """缓存解析结果及其退出状态"""
         if not PerformanceConfig.ENABLE_ANSI_CACHE:
             return
             
+        key = (state, text)
+        evicted = 0
         with QMutexLocker(self.mutex):
-
-            if len(self.cache) >= self.max_size and text not in self.cache:
-                if self.access_order:
-                    oldest = self.access_order.popleft()
-                    if oldest in self.cache:
-                        del self.cache[oldest]
-            
-            self.cache[text] = result
-            if text not in self.access_order:
-                self.access_order.append(text)
+            self.cache[key] = (segments, exit_state)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+                evicted += 1
+        
+        if evicted and self.monitor:
+            self.monitor.record_cache_eviction(evicted)
+    
+    def size(self):
+        """当前缓存条目数"""
+        with QMutexLocker(self.mutex):
+            return len(self.cache)
     
     def clear(self):
         """清空缓存"""
         with QMutexLocker(self.mutex):
             self.cache.clear()
-            self.access_order.clear()
 
 class PerformanceOptimizedTextEdit(QTextEdit):
     """性能优化的文本编辑器"""
@@ -197,6 +492,7 @@ class PerformanceMonitor:
         self.ansi_parse_count = 0
         self.cache_hit_count = 0
         self.cache_miss_count = 0
+        self.cache_eviction_count = 0
     
     def record_render(self):
         """记录渲染操作"""
@@ -214,6 +510,10 @@ class PerformanceMonitor:
         """记录缓存未命中"""
         self.cache_miss_count += 1
     
+    def record_cache_eviction(self, count=1):
+        """记录缓存淘汰"""
+        self.cache_eviction_count += count
+    
     def get_stats(self):
         """获取性能统计"""
         runtime = time.time() - self.start_time
@@ -225,6 +525,9 @@ class PerformanceMonitor:
             'render_count': self.render_count,
             'ansi_parse_count': self.ansi_parse_count,
             'cache_hit_rate': cache_hit_rate,
+            'cache_hits': self.cache_hit_count,
+            'cache_misses': self.cache_miss_count,
+            'cache_evictions': self.cache_eviction_count,
             'renders_per_second': self.render_count / max(1, runtime),
             'parses_per_second': self.ansi_parse_count / max(1, runtime)
         }
@@ -236,7 +539,8 @@ class PerformanceMonitor:
         print(f"运行时间: {stats['runtime']:.2f}秒")
         print(f"渲染次数: {stats['render_count']}")
         print(f"ANSI解析次数: {stats['ansi_parse_count']}")
-        print(f"缓存命中率: {stats['cache_hit_rate']:.1f}%")
+        print(f"缓存命中率: {stats['cache_hit_rate']:.1f}% "
+              f"(命中 {stats['cache_hits']}, 未命中 {stats['cache_misses']}, 淘汰 {stats['cache_evictions']})")
         print(f"渲染速率: {stats['renders_per_second']:.1f}/秒")
         print(f"解析速率: {stats['parses_per_second']:.1f}/秒")
 
@@ -248,7 +552,7 @@ def optimize_terminal_performance():
     recommendations = [
         "1. 启用ANSI缓存以减少重复解析",
         "2. 设置合适的最大输出行数限制",
-        "3. 使用批量渲染减少UI更新频率",
+        "3. 按帧率合并输出以减少UI更新频率",
         "4. 定期清理旧的输出内容",
         "5. 禁用不必要的文本编辑功能",
         "6. 使用性能优化的文本控件"
@@ -256,27 +560,84 @@ def optimize_terminal_performance():
     
     return recommendations
 
+def benchmark_output_pipeline(total_mb=16, frame_reads=16):
+    """输出管线微基准：对比逐块1KB解码与字节缓冲+增量解码的吞吐量(MB/s)"""
+    import io
+    
+    line = "[*] 目标 http://example.com/?id=1 参数 'id' 可能存在注入 \x1b[32m[INFO]\x1b[0m\n".encode('utf-8')
+    data = line * (total_mb * 1024 * 1024 // len(line))
+    size_mb = len(data) / (1024 * 1024)
+    expected = data.decode('utf-8')
+    
+
+    start = time.perf_counter()
+    texts = []
+    for offset in range(0, len(data), 1024):
+        texts.append(data[offset:offset + 1024].decode('utf-8', errors='ignore'))
+    before = ''.join(texts)
+    before_time = time.perf_counter() - start
+    
+
+    start = time.perf_counter()
+    source = io.BytesIO(data)
+    read_buffer = bytearray(65536)
+    read_view = memoryview(read_buffer)
+    output_buffer = OutputBuffer()
+    output_buffer.open('bench')
+    texts = []
+    reads = 0
+    while True:
+        count = source.readinto(read_buffer)
+        if not count:
+            break
+        output_buffer.add_bytes('bench', read_view[:count])
+        reads += 1
+        if reads % frame_reads == 0:
+            texts.extend(output_buffer.take_all()[0].values())
+    output_buffer.mark_finished('bench', 0)
+    texts.extend(output_buffer.take_all()[0].values())
+    after = ''.join(texts)
+    after_time = time.perf_counter() - start
+    
+    return {
+        'size_mb': size_mb,
+        'before_mb_per_second': size_mb / max(before_time, 1e-9),
+        'after_mb_per_second': size_mb / max(after_time, 1e-9),
+        'before_lost_chars': len(expected) - len(before),
+        'after_lost_chars': len(expected) - len(after),
+        'after_correct': after == expected
+    }
+
 if __name__ == "__main__":
 
     print("终端性能优化模块测试")
     
 
-    cache = ANSICache(100)
+    cache = ANSICache(100, performance_monitor)
     test_text = "\x1b[31m红色文本\x1b[0m"
+    state = ()
     
 
-    result = cache.get(test_text)
+    result = cache.get(state, test_text)
     if result is None:
         print("缓存未命中，进行解析...")
-        result = "解析结果"
-        cache.put(test_text, result)
+        cache.put(state, test_text, "解析结果", state)
     
 
-    result = cache.get(test_text)
+    result = cache.get(state, test_text)
     if result is not None:
         print("缓存命中！")
     
+    if cache.get(("bold",), test_text) is None:
+        print("不同进入状态不共享缓存")
+    
 
     print("\n性能优化建议:")
     for rec in optimize_terminal_performance():
-        print(rec)
\ No newline at end of file
+        print(rec)
+    
+
+    stats = benchmark_output_pipeline()
+    print(f"\n输出管线基准 ({stats['size_mb']:.1f} MB):")
+    print(f"逐块解码: {stats['before_mb_per_second']:.1f} MB/s, 丢失字符 {stats['before_lost_chars']}")
+    print(f"增量解码: {stats['after_mb_per_second']:.1f} MB/s, 丢失字符 {stats['after_lost_chars']}, 结果正确: {stats['after_correct']}")
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""
+终端搜索模块
+在后台线程中对终端行存储的快照执行搜索，分批流式交付匹配结果，可随时取消
+"""
+
+import re
+import time
+import queue
+from array import array
+from typing import List, Tuple
+from PySide6.QtCore import Qt, QThread, Signal, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QColor, QFont
+
+from .terminal_performance import PerformanceConfig
+from .regex_guard import RegexGuard
+
+
+def compile_search_pattern(search_term: str, case_sensitive: bool, use_regex: bool):
+    """编译搜索模式，正则无效时抛出 re.error"""
+    flags = 0 if case_sensitive else re.IGNORECASE
+    if use_regex:
+        return re.compile(search_term, flags)
+    return re.compile(re.escape(search_term), flags)
+
+
+class MatchList:
+    """紧凑的匹配区间列表，起止绝对位置分别保存在 array('q') 中，按下标返回 (起点, 终点)"""
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Tuple[int, int]:
+        return self.starts[index], self.ends[index]
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def append(self, start: int, end: int):
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def extend(self, other: 'MatchList'):
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+
+    def clear(self):
+        del self.starts[:]
+        del self.ends[:]
+
+
+class SearchResultsModel(QAbstractListModel):
+    """搜索结果列表模型
+
+    只保存对 MatchList 的引用，行文本、颜色与字体都在 data() 中按需生成，
+    视图只会为可见行调用 data()，因此任意数量的匹配都能立即显示。
+    """
+
+    MatchIndexRole = Qt.ItemDataRole.UserRole
+
+    def __init__(self, terminal_view, parent=None):
+        super().__init__(parent)
+        self.terminal_view = terminal_view
+        self.matches = MatchList()
+        self.current_index = -1
+        self.bold_font = QFont()
+        self.bold_font.setBold(True)
+
+    def reset(self, matches: MatchList, current_index: int = -1):
+        """切换到新的匹配列表"""
+        self.beginResetModel()
+        self.matches = matches
+        self.current_index = current_index
+        self.endResetModel()
+
+    def rows_appended(self, first_index: int):
+        """通知视图匹配列表在 first_index 之后追加了新行"""
+        last_index = len(self.matches) - 1
+        if last_index < first_index:
+            return
+        self.beginInsertRows(QModelIndex(), first_index, last_index)
+        self.endInsertRows()
+
+    def set_current(self, index: int):
+        """设置当前匹配，只刷新新旧两行"""
+        previous = self.current_index
+        self.current_index = index
+        for row in (previous, index):
+            if 0 <= row < len(self.matches):
+                model_index = self.index(row)
+                self.dataChanged.emit(model_index, model_index)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.matches)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.matches):
+            return None
+
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            start, _ = self.matches[row]
+            if start < self.terminal_view.first_position():
+                return f"匹配 {row + 1}: (已超出保留范围)"
+            line, _, line_text = self.terminal_view.line_at(start)
+            return f"匹配 {row + 1} (行{line + 1}): {line_text.strip()}"
+        if role == self.MatchIndexRole:
+            return row
+        if row == self.current_index:
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return QColor("#fff3e0")
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return QColor("#f57c00")
+            if role == Qt.ItemDataRole.FontRole:
+                return self.bold_font
+        return None
+
+
+class SearchJob:
+    """一次终端搜索的参数与进度
+
+    chunks 为 TerminalView.text_chunks() 返回的快照 [(起始绝对位置, 文本), ...]，
+    其中的字符串不可变，搜索期间终端继续追加输出也不会影响结果。
+    guarded 为真时（用户输入的正则）在 RegexGuard 的工作进程中匹配，超出 budget 秒时停止。
+    跟随搜索（follow 为真）只扫描新完成的行，并以 min_start 丢弃起点落在已有匹配之前的结果。
+    cancelled 只由GUI线程置位，扫描线程在匹配之间检查。
+    """
+
+    __slots__ = ('generation', 'chunks', 'pattern', 'guarded', 'budget', 'min_start', 'follow',
+                 'cancelled', 'total', 'pending', 'last_end', 'next_emit')
+
+    def __init__(self, generation: int, chunks: List[Tuple[int, str]], pattern, guarded: bool = False,
+                 budget: float = None, min_start: int = 0, follow: bool = False):
+        self.generation = generation
+        self.chunks = chunks
+        self.pattern = pattern
+        self.guarded = guarded
+        self.budget = budget if budget is not None else PerformanceConfig.REGEX_TIME_BUDGET
+        self.min_start = min_start
+        self.follow = follow
+        self.cancelled = False
+        self.total = 0
+        self.pending = MatchList()
+        self.last_end = 0
+        self.next_emit = 0.0
+
+
+class TerminalSearchWorker(QThread):
+    """终端搜索线程
+
+    每个标签页一个常驻线程，完整搜索与跟随搜索都以 SearchJob 交给 submit() 依次执行。
+    先尽快交付前 SEARCH_FIRST_RESULTS 个匹配，之后按 SEARCH_BATCH_INTERVAL 分批交付；
+    把任务的 cancelled 置为真即可取消，取消后不再发出匹配信号。
+    guarded 任务超出时间预算时发出 pattern_too_slow，已交付的匹配仍然有效。
+    相邻的块之间以换行相接，每块扫描时前面接上一块最后一个匹配之后的末尾部分
+    （最多 SEARCH_CHUNK_OVERLAP 个字符），跨越块边界的匹配与整段搜索一样能被找到。
+    标签页关闭时调用 stop()，取消剩余任务并等待线程结束。
+    """
+
+    matches_found = Signal(object, object)
+    pattern_too_slow = Signal(object)
+    search_finished = Signal(object, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.SimpleQueue()
+
+    def submit(self, job: SearchJob):
+        """排入一个搜索任务，线程尚未启动时先启动"""
+        self.jobs.put(job)
+        if not self.isRunning():
+            self.start()
+
+    def stop(self):
+        """取消排队中的任务并等待线程结束，之后不再发出任何信号"""
+        self.requestInterruption()
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None or self.isInterruptionRequested():
+                return
+            self.execute(job)
+
+    def is_cancelled(self, job: SearchJob) -> bool:
+        return job.cancelled or self.isInterruptionRequested()
+
+    def execute(self, job: SearchJob):
+        """执行一个搜索任务"""
+        job.next_emit = time.monotonic() + PerformanceConfig.SEARCH_BATCH_INTERVAL
+        timed_out = False
+
+        try:
+            if job.guarded:
+                timed_out = self.scan_guarded(job)
+            else:
+                self.scan_local(job)
+
+            cancelled = self.is_cancelled(job)
+            if job.pending and not cancelled:
+                job.total += len(job.pending)
+                self.matches_found.emit(job, job.pending)
+        except Exception as e:
+            print(f"搜索错误: {e}")
+            cancelled = self.is_cancelled(job)
+        finally:
+            job.chunks = None
+            job.pending = MatchList()
+
+        if timed_out and not cancelled:
+            self.pattern_too_slow.emit(job)
+        self.search_finished.emit(job, cancelled)
+
+    def overlapped_chunks(self, job: SearchJob):
+        """依次给出 (起始绝对位置, 文本)，与上一块相连的块前面接上上一块的末尾部分与两块之间的换行
+
+        接上的部分从上一块最后一个匹配的终点开始，与整段文本上 finditer 的行为一致，
+        因此不会重复交付已有的匹配。
+        """
+        previous_base = previous_text = None
+        for base, text in job.chunks:
+            if previous_text is not None and base == previous_base + len(previous_text) + 1:
+                carry_start = max(job.last_end - previous_base,
+                                  len(previous_text) - PerformanceConfig.SEARCH_CHUNK_OVERLAP, 0)
+                carry = previous_text[carry_start:]
+                text = carry + '\n' + text
+                base -= len(carry) + 1
+            yield base, text
+            previous_base, previous_text = base, text
+
+    @staticmethod
+    def add_match(job: SearchJob, start: int, end: int):
+        job.last_end = end
+        if start >= job.min_start:
+            job.pending.append(start, end)
+
+    def scan_local(self, job: SearchJob):
+        for base, text in self.overlapped_chunks(job):
+            if self.is_cancelled(job):
+                break
+            for match in job.pattern.finditer(text):
+                start, end = match.span()
+                if end > start:
+                    self.add_match(job, base + start, base + end)
+
+                if len(job.pending) & 0xff == 0 and self.is_cancelled(job):
+                    break
+            self.deliver(job)
+
+    def scan_guarded(self, job: SearchJob) -> bool:
+        """在工作进程中匹配，返回是否超出时间预算"""
+
+        def on_result(base, values):
+            for i in range(0, len(values), 2):
+                self.add_match(job, base + values[i], base + values[i + 1])
+            self.deliver(job)
+
+        # RegexGuard 在交付上一块的结果之后才取下一块，接上的部分能用到最新的 last_end
+        result = RegexGuard.instance().scan(
+            job.pattern.pattern, job.pattern.flags, self.overlapped_chunks(job), on_result,
+            budget=job.budget, cancelled=lambda: self.is_cancelled(job))
+        return result.timed_out
+
+    def deliver(self, job: SearchJob):
+        """首批凑够 SEARCH_FIRST_RESULTS 个或到达间隔时交付累积的匹配"""
+        if not job.pending or self.is_cancelled(job):
+            return
+        now = time.monotonic()
+        if now < job.next_emit and (job.total or len(job.pending) < PerformanceConfig.SEARCH_FIRST_RESULTS):
+            return
+        job.total += len(job.pending)
+        self.matches_found.emit(job, job.pending)
+        job.pending = MatchList()
+        job.next_emit = now + PerformanceConfig.SEARCH_BATCH_INTERVAL
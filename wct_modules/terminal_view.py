@@ -0,0 +1,1058 @@
+"""
+虚拟化终端视图模块
+使用紧凑的行存储保存终端输出，只绘制可见行，支持ANSI颜色、搜索高亮与复制
+"""
+
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import List, Optional, Tuple
+from PySide6.QtWidgets import QAbstractScrollArea, QApplication, QMenu
+from PySide6.QtGui import (
+    QColor, QFont, QFontMetrics, QPainter, QTextCharFormat, QKeySequence
+)
+from PySide6.QtCore import Qt, Signal, QPoint
+
+from .terminal_performance import PerformanceConfig
+from .ansi_parser import StyleTable, shared_style_table
+
+
+class LineBlock:
+    """已封存的行块：整块文本为一个字符串，行起点与样式游程保存在array中"""
+
+    __slots__ = ('first_line', 'offset', 'text', 'starts', 'run_offsets', 'run_styles', 'nbytes')
+
+    def __init__(self, first_line: int, offset: int, lines: List[str], runs: List[list]):
+        self.first_line = first_line
+        self.offset = offset
+        self.text = '\n'.join(lines)
+        self.starts = array('I')
+        self.run_offsets = array('I')
+        self.run_styles = array('I')
+
+        position = 0
+        for line, line_runs in zip(lines, runs):
+            self.starts.append(position)
+            for column, style_id in line_runs:
+                self.run_offsets.append(position + column)
+                self.run_styles.append(style_id)
+            position += len(line) + 1
+
+        self.nbytes = (sys.getsizeof(self.text) + self.starts.itemsize * len(self.starts) +
+                       self.run_offsets.itemsize * len(self.run_offsets) +
+                       self.run_styles.itemsize * len(self.run_styles))
+
+    def line_count(self) -> int:
+        return len(self.starts)
+
+    def end_offset(self) -> int:
+        """块之后下一行的起始位置"""
+        return self.offset + len(self.text) + 1
+
+    def line_bounds(self, index: int) -> Tuple[int, int]:
+        """块内第index行的起止位置（相对块起点）"""
+        start = self.starts[index]
+        if index + 1 < len(self.starts):
+            return start, self.starts[index + 1] - 1
+        return start, len(self.text)
+
+    def line_text(self, index: int) -> str:
+        start, end = self.line_bounds(index)
+        return self.text[start:end]
+
+    def line_runs(self, index: int) -> List[Tuple[int, int, int]]:
+        """块内第index行的样式游程 [(起始列, 结束列, 样式ID), ...]"""
+        start, end = self.line_bounds(index)
+        runs = []
+        k = bisect_left(self.run_offsets, start)
+        while k < len(self.run_offsets) and self.run_offsets[k] < end:
+            run_end = self.run_offsets[k + 1] if k + 1 < len(self.run_offsets) else end
+            runs.append((self.run_offsets[k] - start, min(run_end, end) - start, self.run_styles[k]))
+            k += 1
+        return runs
+
+
+def _splice_runs(runs: list, length: int, start: int, end: int, style_id, new_length: int) -> list:
+    """把行内样式游程 [(起始列, 样式ID), ...] 的 [start, end) 区间替换为 style_id，并截断到 new_length"""
+    segments = []
+    for k, (column, run_style) in enumerate(runs):
+        run_end = runs[k + 1][0] if k + 1 < len(runs) else length
+        if column < start:
+            segments.append((column, min(run_end, start), run_style))
+    if end > start and style_id is not None:
+        segments.append((start, end, style_id))
+    for k, (column, run_style) in enumerate(runs):
+        run_end = runs[k + 1][0] if k + 1 < len(runs) else length
+        if run_end > end:
+            segments.append((max(column, end), run_end, run_style))
+
+    result = []
+    for column, run_end, run_style in segments:
+        run_end = min(run_end, new_length)
+        if column >= run_end:
+            continue
+        if result and result[-1][1] == run_style:
+            continue
+        result.append((column, run_style))
+    return result
+
+
+class SegmentBatch:
+    """在渲染线程中预先按行切分好的片段批次
+
+    lines[0] 接在当前最后一行之后，lines[1:] 各自另起一行，lines[-1] 成为新的最后一行；
+    runs 为对应行的样式游程。含控制片段或 \r、\b 时不切分（lines 为 None），
+    GUI线程退回逐段写入屏幕模型。
+    """
+
+    __slots__ = ('segments', 'lines', 'runs', 'plain_text')
+
+    def __init__(self, segments: List[Tuple[Optional[str], object]]):
+        self.segments = segments
+        self.lines = None
+        self.runs = None
+
+        texts = [text for text, _ in segments if text]
+        self.plain_text = ''.join(texts)
+        if len(texts) != len(segments) and any(text is None for text, _ in segments):
+            return
+        if '\r' in self.plain_text or '\b' in self.plain_text:
+            return
+
+        lines = []
+        runs = []
+        parts = []
+        line_runs = []
+        length = 0
+        for text, style_id in segments:
+            pieces = text.split('\n')
+            for index, piece in enumerate(pieces):
+                if index:
+                    lines.append(''.join(parts))
+                    runs.append(line_runs)
+                    parts = []
+                    line_runs = []
+                    length = 0
+                if piece:
+                    if not line_runs or line_runs[-1][1] != style_id:
+                        line_runs.append((length, style_id))
+                    parts.append(piece)
+                    length += len(piece)
+        lines.append(''.join(parts))
+        runs.append(line_runs)
+        self.lines = lines
+        self.runs = runs
+
+
+class LineStore:
+    """终端行存储与轻量VT屏幕模型
+
+    每 BLOCK_LINES 行封存为一个 LineBlock，最后一行（尚未换行）单独保存以便继续追加。
+    行号和字符位置都是绝对值，超出内存预算时从头部整块淘汰，已有位置不受影响。
+
+    最后 SCREEN_LINES 行构成可编辑的"屏幕"：光标可用 \r、\b 与光标移动序列回到这些行，
+    输出在原位覆盖，擦除行序列原位截断，因此进度条重绘不再产生新行。
+    已完成的行被原位改写且长度变化时，其后各行的字符位置整体平移（行号不变），
+    平移的起点通过 take_shifted_position() 报告，按字符位置保存的搜索结果需要据此失效。
+    """
+
+    BLOCK_LINES = 1024
+
+    SCREEN_LINES = 64
+
+    CONTROL_RE = re.compile(r'([\n\r\b])')
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes or PerformanceConfig.TERMINAL_MEMORY_BUDGET
+        self.clear()
+
+    def clear(self):
+        """清空所有内容"""
+        self.blocks: List[LineBlock] = []
+        self.block_first_lines: List[int] = []
+        self.block_offsets: List[int] = []
+        self.block_bytes = 0
+        self.first_line = 0
+        self.first_offset = 0
+
+
+        self.pending_lines: List[str] = []
+        self.pending_runs: List[list] = []
+        self.pending_starts: List[int] = []
+        self.pending_first_line = 0
+
+
+        self.tail_parts: List[str] = []
+        self.tail_runs: list = []
+        self.tail_length = 0
+        self.tail_offset = 0
+        self.max_line_length = 0
+
+
+        self.cursor_row = 0
+        self.cursor_column = 0
+        self.dirty_first = None
+        self.dirty_last = None
+        self.shifted_position = None
+
+    def append(self, text: str, style_id: int = StyleTable.DEFAULT_STYLE) -> int:
+        """在光标处写入文本（处理 \n、\r、\b），返回新完成的行数"""
+        if ('\r' in text or '\b' in text or self.cursor_row or
+                self.cursor_column != self.tail_length):
+            return self._write_at_cursor(text, style_id)
+
+        completed = 0
+        pieces = text.split('\n')
+        for index, piece in enumerate(pieces):
+            if index:
+                self._commit_tail()
+                completed += 1
+            if piece:
+                self._append_tail(piece, style_id)
+        self.cursor_column = self.tail_length
+        self._mark_dirty(self.last_line())
+        return completed
+
+    def append_segments(self, segments: List[Tuple[Optional[str], object]]):
+        """批量追加片段：不含控制字符的文本内联走快速路径，其余交给屏幕模型逐段处理"""
+        for text, style in segments:
+            if text is None:
+                self.control(*style)
+                continue
+            if not text:
+                continue
+            if ('\r' in text or '\b' in text or self.cursor_row or
+                    self.cursor_column != self.tail_length):
+                self._write_at_cursor(text, style)
+                continue
+
+            pieces = text.split('\n')
+            last = len(pieces) - 1
+            for index, piece in enumerate(pieces):
+                if piece:
+                    if not self.tail_runs or self.tail_runs[-1][1] != style:
+                        self.tail_runs.append((self.tail_length, style))
+                    self.tail_parts.append(piece)
+                    self.tail_length += len(piece)
+                if index != last:
+                    self._commit_tail()
+            self.cursor_column = self.tail_length
+        self._mark_dirty(self.last_line() - self.cursor_row)
+
+    def append_batch(self, batch: SegmentBatch):
+        """整批并入预先切分好的行，光标不在末尾或批次含控制序列时退回逐段写入"""
+        if batch.lines is None or self.cursor_row or self.cursor_column != self.tail_length:
+            self.append_segments(batch.segments)
+            return
+
+        lines = batch.lines
+        runs = batch.runs
+        for column, style_id in runs[0]:
+            if not self.tail_runs or self.tail_runs[-1][1] != style_id:
+                self.tail_runs.append((self.tail_length + column, style_id))
+        if lines[0]:
+            self.tail_parts.append(lines[0])
+            self.tail_length += len(lines[0])
+
+        if len(lines) > 1:
+            self._commit_tail()
+            middle = lines[1:-1]
+            if middle:
+                starts = list(accumulate((len(line) + 1 for line in middle[:-1]), initial=self.tail_offset))
+                self.pending_lines.extend(middle)
+                self.pending_runs.extend(runs[1:-1])
+                self.pending_starts.extend(starts)
+                self.tail_offset = starts[-1] + len(middle[-1]) + 1
+                self.max_line_length = max(self.max_line_length, max(map(len, middle)))
+                while len(self.pending_lines) >= self.BLOCK_LINES + self.SCREEN_LINES:
+                    self._seal_pending()
+
+            self.tail_parts = [lines[-1]] if lines[-1] else []
+            self.tail_runs = list(runs[-1])
+            self.tail_length = len(lines[-1])
+
+        self.cursor_column = self.tail_length
+        self._mark_dirty(self.last_line())
+
+    def _append_tail(self, piece: str, style_id: int):
+        if not self.tail_runs or self.tail_runs[-1][1] != style_id:
+            self.tail_runs.append((self.tail_length, style_id))
+        self.tail_parts.append(piece)
+        self.tail_length += len(piece)
+
+    def _write_at_cursor(self, text: str, style_id: int) -> int:
+        completed = 0
+        for piece in self.CONTROL_RE.split(text):
+            if piece == '\n':
+                if self.cursor_row:
+                    self.cursor_row -= 1
+                else:
+                    self._commit_tail()
+                    completed += 1
+                self.cursor_column = 0
+            elif piece == '\r':
+                self.cursor_column = 0
+            elif piece == '\b':
+                self.cursor_column = max(0, self.cursor_column - 1)
+            elif piece:
+                self._put(piece, style_id)
+        return completed
+
+    def _put(self, piece: str, style_id: int):
+        """在光标处覆盖写入一段不含控制字符的文本"""
+        self._mark_dirty(self.last_line() - self.cursor_row)
+        if not self.cursor_row and self.cursor_column == self.tail_length:
+            self._append_tail(piece, style_id)
+            self.cursor_column = self.tail_length
+            return
+
+        line, runs = self._screen_line(self.cursor_row)
+        column = self.cursor_column
+        if column > len(line):
+            runs = _splice_runs(runs, len(line), len(line), column, StyleTable.DEFAULT_STYLE, column)
+            line = line + ' ' * (column - len(line))
+        end = column + len(piece)
+        new_line = line[:column] + piece + line[end:]
+        runs = _splice_runs(runs, len(line), column, end, style_id, len(new_line))
+        self._set_screen_line(self.cursor_row, new_line, runs)
+        self.cursor_column = end
+
+    def control(self, command: str, params: str = ''):
+        """执行CSI光标移动与擦除序列：A/B/C/D/E/F/G 移动光标，K 擦除行，J 擦除到屏幕末尾"""
+        try:
+            value = int(params) if params else 0
+        except ValueError:
+            return
+        count = max(1, value)
+
+        if command == 'K':
+            self._erase_line(value)
+        elif command == 'J':
+            if value == 0:
+                self._erase_line(0)
+                for row in range(self.cursor_row - 1, -1, -1):
+                    self._set_screen_line(row, '', [])
+                    self._mark_dirty(self.last_line() - row)
+        elif command in 'AF':
+            self.cursor_row = min(self.cursor_row + count, self._max_cursor_row())
+            if command == 'F':
+                self.cursor_column = 0
+        elif command in 'BE':
+            self.cursor_row = max(0, self.cursor_row - count)
+            if command == 'E':
+                self.cursor_column = 0
+        elif command == 'C':
+            self.cursor_column += count
+        elif command == 'D':
+            self.cursor_column = max(0, self.cursor_column - count)
+        elif command == 'G':
+            self.cursor_column = count - 1
+
+    def _erase_line(self, mode: int):
+        line, runs = self._screen_line(self.cursor_row)
+        column = min(self.cursor_column, len(line))
+        if mode == 0:
+            new_line = line[:column]
+            runs = _splice_runs(runs, len(line), column, len(line), None, column)
+        elif mode == 1:
+            end = min(self.cursor_column + 1, len(line))
+            new_line = ' ' * end + line[end:]
+            runs = _splice_runs(runs, len(line), 0, end, StyleTable.DEFAULT_STYLE, len(new_line))
+        else:
+            new_line = ''
+            runs = []
+        if new_line != line:
+            self._set_screen_line(self.cursor_row, new_line, runs)
+        self._mark_dirty(self.last_line() - self.cursor_row)
+
+    def _max_cursor_row(self) -> int:
+        return min(self.SCREEN_LINES - 1, len(self.pending_lines))
+
+    def _screen_line(self, row: int) -> Tuple[str, list]:
+        """获取光标行（0为最后一行）的文本与游程"""
+        if row == 0:
+            return ''.join(self.tail_parts), self.tail_runs
+        index = len(self.pending_lines) - row
+        return self.pending_lines[index], self.pending_runs[index]
+
+    def _set_screen_line(self, row: int, line: str, runs: list):
+        """替换屏幕行，长度变化时平移其后各行的位置"""
+        if row == 0:
+            self.tail_parts = [line] if line else []
+            self.tail_runs = runs
+            self.tail_length = len(line)
+            return
+        index = len(self.pending_lines) - row
+        delta = len(line) - len(self.pending_lines[index])
+        self.pending_lines[index] = line
+        self.pending_runs[index] = runs
+        self.max_line_length = max(self.max_line_length, len(line))
+        if delta:
+            for k in range(index + 1, len(self.pending_starts)):
+                self.pending_starts[k] += delta
+            self.tail_offset += delta
+            position = self.pending_starts[index]
+            if self.shifted_position is None or position < self.shifted_position:
+                self.shifted_position = position
+
+    def _mark_dirty(self, line: int):
+        if self.dirty_first is None or line < self.dirty_first:
+            self.dirty_first = line
+        if self.dirty_last is None or line > self.dirty_last:
+            self.dirty_last = line
+
+    def take_dirty_lines(self):
+        """返回并清除自上次调用以来原位修改过的行范围 (首行, 末行)，无修改时返回 None"""
+        if self.dirty_first is None:
+            return None
+        dirty = (self.dirty_first, self.dirty_last)
+        self.dirty_first = self.dirty_last = None
+        return dirty
+
+    def take_shifted_position(self):
+        """返回并清除自上次调用以来最早一处位置平移的起点（被改写的已完成行的行首），没有平移时返回 None"""
+        position = self.shifted_position
+        self.shifted_position = None
+        return position
+
+    def _commit_tail(self):
+        line = ''.join(self.tail_parts)
+        self.pending_lines.append(line)
+        self.pending_runs.append(self.tail_runs)
+        self.pending_starts.append(self.tail_offset)
+        self.max_line_length = max(self.max_line_length, len(line))
+
+        self.tail_offset += len(line) + 1
+        self.tail_parts = []
+        self.tail_runs = []
+        self.tail_length = 0
+
+        if len(self.pending_lines) >= self.BLOCK_LINES + self.SCREEN_LINES:
+            self._seal_pending()
+
+    def _seal_pending(self):
+        """封存最早的 BLOCK_LINES 行，保留屏幕行继续可编辑"""
+        count = self.BLOCK_LINES
+        block = LineBlock(self.pending_first_line, self.pending_starts[0],
+                          self.pending_lines[:count], self.pending_runs[:count])
+        self.blocks.append(block)
+        self.block_first_lines.append(block.first_line)
+        self.block_offsets.append(block.offset)
+        self.block_bytes += block.nbytes
+
+        self.pending_first_line += count
+        del self.pending_lines[:count]
+        del self.pending_runs[:count]
+        del self.pending_starts[:count]
+
+        self._enforce_budget()
+
+    def _enforce_budget(self):
+        while self.block_bytes > self.max_bytes and len(self.blocks) > 1:
+            block = self.blocks.pop(0)
+            self.block_first_lines.pop(0)
+            self.block_offsets.pop(0)
+            self.block_bytes -= block.nbytes
+            self.first_line = self.blocks[0].first_line
+            self.first_offset = self.blocks[0].offset
+
+    def set_max_bytes(self, max_bytes: int):
+        """设置内存预算（字节）"""
+        self.max_bytes = max_bytes
+        self._enforce_budget()
+
+    def memory_usage(self) -> int:
+        """已封存内容占用的近似字节数"""
+        return self.block_bytes
+
+    def line_count(self) -> int:
+        """当前保存的行数（包含尚未换行的最后一行）"""
+        return self.pending_first_line + len(self.pending_lines) + 1 - self.first_line
+
+    def last_line(self) -> int:
+        """最后一行的绝对行号"""
+        return self.pending_first_line + len(self.pending_lines)
+
+    def end_position(self) -> int:
+        """文本末尾的绝对位置"""
+        return self.tail_offset + self.tail_length
+
+    def _locate(self, line: int):
+        """返回 (块, 块内行号)，待封存行返回 ('pending', 索引)，最后一行返回 ('tail', 0)"""
+        if line >= self.pending_first_line:
+            index = line - self.pending_first_line
+            if index < len(self.pending_lines):
+                return 'pending', index
+            return 'tail', 0
+        block = self.blocks[bisect_right(self.block_first_lines, line) - 1]
+        return block, line - block.first_line
+
+    def line_text(self, line: int) -> str:
+        """获取绝对行号对应的文本"""
+        block, index = self._locate(line)
+        if block == 'tail':
+            return ''.join(self.tail_parts)
+        if block == 'pending':
+            return self.pending_lines[index]
+        return block.line_text(index)
+
+    def line_runs(self, line: int) -> List[Tuple[int, int, int]]:
+        """获取绝对行号对应的样式游程"""
+        block, index = self._locate(line)
+        if block == 'tail' or block == 'pending':
+            runs = self.tail_runs if block == 'tail' else self.pending_runs[index]
+            length = self.tail_length if block == 'tail' else len(self.pending_lines[index])
+            result = []
+            for k, (column, style_id) in enumerate(runs):
+                end = runs[k + 1][0] if k + 1 < len(runs) else length
+                result.append((column, end, style_id))
+            return result
+        return block.line_runs(index)
+
+    def line_position(self, line: int) -> int:
+        """获取绝对行号对应行首的绝对位置"""
+        block, index = self._locate(line)
+        if block == 'tail':
+            return self.tail_offset
+        if block == 'pending':
+            return self.pending_starts[index]
+        return block.offset + block.starts[index]
+
+    def position_to_line(self, position: int) -> Tuple[int, int]:
+        """把绝对位置转换为 (绝对行号, 列号)"""
+        position = max(self.first_offset, min(position, self.end_position()))
+        if position >= self.tail_offset:
+            return self.last_line(), position - self.tail_offset
+        if self.pending_starts and position >= self.pending_starts[0]:
+            index = bisect_right(self.pending_starts, position) - 1
+            return self.pending_first_line + index, position - self.pending_starts[index]
+        block = self.blocks[bisect_right(self.block_offsets, position) - 1]
+        index = bisect_right(block.starts, position - block.offset) - 1
+        return block.first_line + index, position - block.offset - block.starts[index]
+
+    def line_at(self, position: int) -> Tuple[int, int, str]:
+        """返回位置所在行的 (绝对行号, 行首绝对位置, 行文本)，通过行起点数组二分查找"""
+        line, _ = self.position_to_line(position)
+        return line, self.line_position(line), self.line_text(line)
+
+    def text_chunks(self) -> List[Tuple[int, str]]:
+        """按块返回 [(起始绝对位置, 文本), ...]，未封存的行与最后一行合并为最后一块
+
+        块文本直接复用封存时拼接好的字符串，不需要物化整个文档。
+        """
+        chunks = [(block.offset, block.text) for block in self.blocks]
+        start = self.pending_starts[0] if self.pending_starts else self.tail_offset
+        chunks.append((start, '\n'.join(self.pending_lines + [''.join(self.tail_parts)])))
+        return chunks
+
+    def text_range(self, start: int, end: int) -> str:
+        """获取两个绝对位置之间的文本"""
+        start = max(start, self.first_offset)
+        end = min(end, self.end_position())
+        if start >= end:
+            return ''
+        first_line, first_column = self.position_to_line(start)
+        last_line, last_column = self.position_to_line(end)
+        if first_line == last_line:
+            return self.line_text(first_line)[first_column:last_column]
+        parts = [self.line_text(first_line)[first_column:]]
+        for line in range(first_line + 1, last_line):
+            parts.append(self.line_text(line))
+        parts.append(self.line_text(last_line)[:last_column])
+        return '\n'.join(parts)
+
+    def plain_text(self) -> str:
+        """获取全部纯文本"""
+        parts = [block.text for block in self.blocks]
+        parts.extend(self.pending_lines)
+        parts.append(''.join(self.tail_parts))
+        return '\n'.join(parts)
+
+
+class TerminalView(QAbstractScrollArea):
+    """虚拟化终端输出视图，只绘制视口内可见的行"""
+
+    selection_changed = Signal()
+    lines_completed = Signal()
+    # 已完成的行被原位改写，该位置之后的字符位置已经平移
+    positions_shifted = Signal(int)
+
+    def __init__(self, parent=None, memory_budget: int = None):
+        super().__init__(parent)
+        self.store = LineStore(memory_budget)
+        self.style_table = shared_style_table
+        self.highlight_starts = array('q')
+        self.highlight_ends = array('q')
+        self.current_highlight = -1
+        self.selection_anchor = None
+        self.selection_position = None
+        self.content_width = 0
+        self.fonts = {}
+
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.viewport().setCursor(Qt.CursorShape.IBeamCursor)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
+        self._update_metrics()
+
+    def set_memory_budget(self, max_bytes: int):
+        """设置该视图的内存预算（字节）"""
+        self.store.set_max_bytes(max_bytes)
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def append_segments(self, segments: List[Tuple[Optional[str], object]]):
+        """追加文本片段 [(文本, 样式ID), ...]
+
+        文本为 None 的片段是控制片段，样式位置为 (CSI命令, 参数)，交给行存储的屏幕模型执行。
+        """
+        at_bottom = self._is_at_bottom()
+        first_line = self.store.first_line
+        line_count = self.store.line_count()
+        self.store.append_segments(segments)
+        self._after_append(at_bottom, first_line, line_count)
+
+    def append_batch(self, batch: SegmentBatch):
+        """追加渲染线程预先切分好的片段批次"""
+        at_bottom = self._is_at_bottom()
+        first_line = self.store.first_line
+        line_count = self.store.line_count()
+        self.store.append_batch(batch)
+        self._after_append(at_bottom, first_line, line_count)
+
+    def append_text(self, text: str, format: QTextCharFormat = None):
+        """追加文本"""
+        self.append_segments([(text, self.style_table.intern_format(format))])
+
+    def _after_append(self, at_bottom: bool, first_line: int, line_count: int):
+        dirty = self.store.take_dirty_lines()
+        shifted = self.store.take_shifted_position()
+        if shifted is not None:
+            self.positions_shifted.emit(shifted)
+        if self.store.line_count() == line_count and self.store.first_line == first_line:
+
+            if dirty:
+                self._update_lines(*dirty)
+            return
+
+        self._update_scrollbars()
+        if at_bottom:
+            self.scroll_to_bottom()
+        elif self.store.first_line != first_line:
+
+            vbar = self.verticalScrollBar()
+            vbar.setValue(max(0, vbar.value() - (self.store.first_line - first_line)))
+        self.viewport().update()
+        self.lines_completed.emit()
+
+    def _update_lines(self, first: int, last: int):
+        """只重绘可见范围内的指定行"""
+        top_line = self.store.first_line + self.verticalScrollBar().value()
+        first_row = max(first - top_line, 0)
+        last_row = min(last - top_line, self._visible_rows())
+        if first_row > last_row:
+            return
+        width = self.viewport().width()
+        self.viewport().update(0, first_row * self.line_height, width,
+                               (last_row - first_row + 1) * self.line_height)
+
+    def clear(self):
+        """清空输出"""
+        self.store.clear()
+        self.highlight_starts = array('q')
+        self.highlight_ends = array('q')
+        self.current_highlight = -1
+        self.selection_anchor = None
+        self.selection_position = None
+        self.content_width = 0
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def toPlainText(self) -> str:
+        """获取全部纯文本"""
+        return self.store.plain_text()
+
+    def first_position(self) -> int:
+        """当前保存内容起点的绝对位置"""
+        return self.store.first_offset
+
+    def end_position(self) -> int:
+        """文本末尾的绝对位置"""
+        return self.store.end_position()
+
+    def line_count(self) -> int:
+        return self.store.line_count()
+
+    def line_at(self, position: int) -> Tuple[int, int, str]:
+        """返回绝对位置所在行的 (绝对行号, 行首绝对位置, 行文本)"""
+        return self.store.line_at(position)
+
+    def first_line(self) -> int:
+        """最早保留的行的绝对行号"""
+        return self.store.first_line
+
+    def last_line(self) -> int:
+        """最后一行（尚未换行）的绝对行号"""
+        return self.store.last_line()
+
+    def line_position(self, line: int) -> int:
+        """绝对行号对应行首的绝对位置"""
+        return self.store.line_position(line)
+
+    def text_chunks(self) -> List[Tuple[int, str]]:
+        """按块返回 [(起始绝对位置, 文本), ...]"""
+        return self.store.text_chunks()
+
+    def text_range(self, start: int, end: int) -> str:
+        """获取两个绝对位置之间的文本"""
+        return self.store.text_range(start, end)
+
+    def select_line(self, line: int):
+        """选中绝对行号对应的整行并滚动到可见位置，已被淘汰的行定位到最早保留的行"""
+        line = max(self.store.first_line, min(line, self.store.last_line()))
+        start = self.store.line_position(line)
+        self.select_range(start, start + len(self.store.line_text(line)))
+
+    def completed_position(self) -> int:
+        """已换行内容的末尾位置，即最后一行（尚未换行）的行首绝对位置"""
+        return self.store.tail_offset
+
+
+    def set_highlights(self, ranges, current_index: int = -1):
+        """设置搜索高亮区域，绘制时叠加在文本之上，不修改存储的样式
+
+        ranges 可以是带 starts/ends 数组的匹配列表（按引用保存，之后追加的匹配在下次绘制时生效），
+        也可以是 [(起点, 终点), ...]。区间按起点排序且互不重叠，绘制时二分查找出视口内的匹配。
+        """
+        if hasattr(ranges, 'starts') and hasattr(ranges, 'ends'):
+            self.highlight_starts = ranges.starts
+            self.highlight_ends = ranges.ends
+        else:
+            ordered = sorted(ranges)
+            self.highlight_starts = array('q', [start for start, _ in ordered])
+            self.highlight_ends = array('q', [end for _, end in ordered])
+        self.current_highlight = current_index
+        self.viewport().update()
+
+    def set_current_highlight(self, index: int):
+        """切换当前匹配，只重绘新旧当前匹配所在的行"""
+        previous = self.current_highlight
+        self.current_highlight = index
+        for current in (previous, index):
+            if 0 <= current < len(self.highlight_starts):
+                first_line = self.store.position_to_line(self.highlight_starts[current])[0]
+                last_line = self.store.position_to_line(self.highlight_ends[current])[0]
+                self._update_lines(first_line, last_line)
+
+    def clear_highlights(self):
+        """清除搜索高亮"""
+        self.set_highlights([])
+
+    def select_range(self, start: int, end: int):
+        """选中区域并滚动到可见位置"""
+        self.selection_anchor = start
+        self.selection_position = end
+        self.ensure_position_visible(start)
+        self.viewport().update()
+        self.selection_changed.emit()
+
+    def has_selection(self) -> bool:
+        return (self.selection_anchor is not None and
+                self.selection_position is not None and
+                self.selection_anchor != self.selection_position)
+
+    def selection_range(self) -> Tuple[int, int]:
+        if not self.has_selection():
+            return 0, 0
+        return (min(self.selection_anchor, self.selection_position),
+                max(self.selection_anchor, self.selection_position))
+
+    def selected_text(self) -> str:
+        """获取选中的文本"""
+        return self.store.text_range(*self.selection_range())
+
+    def copy(self):
+        """复制选中的文本到剪贴板"""
+        if self.has_selection():
+            QApplication.clipboard().setText(self.selected_text())
+
+    def select_all(self):
+        """全选"""
+        self.selection_anchor = self.store.first_offset
+        self.selection_position = self.store.end_position()
+        self.viewport().update()
+        self.selection_changed.emit()
+
+    def ensure_position_visible(self, position: int):
+        """滚动使指定位置可见"""
+        line, column = self.store.position_to_line(position)
+        row = line - self.store.first_line
+        vbar = self.verticalScrollBar()
+        visible_rows = self._visible_rows()
+        if row < vbar.value() or row >= vbar.value() + visible_rows:
+            vbar.setValue(max(0, row - visible_rows // 2))
+
+        x = self._column_x(line, column)
+        hbar = self.horizontalScrollBar()
+        width = self.viewport().width()
+        if x < hbar.value() or x > hbar.value() + width - self.char_width * 4:
+            hbar.setValue(max(0, x - width // 2))
+
+    def scroll_to_bottom(self):
+        vbar = self.verticalScrollBar()
+        vbar.setValue(vbar.maximum())
+
+    def _is_at_bottom(self) -> bool:
+        vbar = self.verticalScrollBar()
+        return vbar.value() >= vbar.maximum()
+
+
+    def _update_metrics(self):
+        metrics = QFontMetrics(self.font())
+        self.line_height = max(1, metrics.lineSpacing())
+        self.ascent = metrics.ascent()
+        self.char_width = max(1, metrics.horizontalAdvance('M'))
+        self.margin = 4
+        self.fonts = {}
+        self.content_width = 0
+        self._update_scrollbars()
+
+    def _font_for(self, style) -> Tuple[QFont, QFontMetrics]:
+        key = (style.bold, style.italic, style.underline, style.strikethrough)
+        entry = self.fonts.get(key)
+        if entry is None:
+            font = QFont(self.font())
+            font.setBold(style.bold)
+            font.setItalic(style.italic)
+            font.setUnderline(style.underline)
+            font.setStrikeOut(style.strikethrough)
+            entry = self.fonts[key] = (font, QFontMetrics(font))
+        return entry
+
+    def _visible_rows(self) -> int:
+        return max(1, self.viewport().height() // self.line_height)
+
+    def _update_scrollbars(self):
+        visible_rows = self._visible_rows()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self.store.line_count() - visible_rows))
+        vbar.setPageStep(visible_rows)
+        vbar.setSingleStep(1)
+
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, self.content_width + self.margin * 2 - self.viewport().width()))
+        hbar.setPageStep(self.viewport().width())
+        hbar.setSingleStep(self.char_width)
+
+    def _line_segments(self, line: int):
+        """生成 (起始列, 结束列, 样式, 字体, 度量, 起始x) 序列"""
+        text = self.store.line_text(line)
+        x = 0
+        segments = []
+        for start, end, style_id in self.store.line_runs(line):
+            style = self.style_table.get_style(style_id)
+            font, metrics = self._font_for(style)
+            segments.append((start, end, style, font, metrics, x))
+            x += metrics.horizontalAdvance(text[start:end])
+        return text, segments, x
+
+    def _column_x(self, line: int, column: int) -> int:
+        """列号在行内的x坐标（不含边距和滚动偏移）"""
+        text, segments, width = self._line_segments(line)
+        for start, end, style, font, metrics, x in segments:
+            if column <= end:
+                return x + metrics.horizontalAdvance(text[start:column])
+        return width
+
+    def _hit_test(self, point: QPoint) -> int:
+        """把视口坐标转换为绝对位置"""
+        row = self.verticalScrollBar().value() + max(0, point.y()) // self.line_height
+        line = min(self.store.first_line + row, self.store.last_line())
+        x = point.x() + self.horizontalScrollBar().value() - self.margin
+        text, segments, width = self._line_segments(line)
+        column = len(text)
+        for start, end, style, font, metrics, segment_x in segments:
+            if x < segment_x:
+                column = start
+                break
+            for index in range(start, end):
+                advance = metrics.horizontalAdvance(text[index])
+                if x < segment_x + advance / 2:
+                    column = index
+                    break
+                segment_x += advance
+            else:
+                continue
+            break
+        return self.store.line_position(line) + column
+
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        palette = self.palette()
+        painter.fillRect(event.rect(), palette.base())
+
+        default_foreground = palette.text().color()
+        first_row = self.verticalScrollBar().value()
+        x_offset = self.margin - self.horizontalScrollBar().value()
+        last_line = self.store.last_line()
+        selection = self.selection_range() if self.has_selection() else None
+
+        first_line = self.store.first_line + first_row
+        last_visible = min(first_line + self._visible_rows(), last_line)
+        visible_start = self.store.line_position(min(first_line, last_line))
+        visible_end = self.store.line_position(last_visible) + len(self.store.line_text(last_visible))
+        highlight = bisect_right(self.highlight_ends, visible_start)
+        highlight_end = bisect_right(self.highlight_starts, visible_end)
+
+        content_width = self.content_width
+        for row in range(self._visible_rows() + 1):
+            line = self.store.first_line + first_row + row
+            if line > last_line:
+                break
+            y = row * self.line_height
+            text, segments, width = self._line_segments(line)
+            content_width = max(content_width, width)
+
+            for start, end, style, font, metrics, x in segments:
+                segment_text = text[start:end]
+                if style.background is not None:
+                    painter.fillRect(x_offset + x, y, metrics.horizontalAdvance(segment_text),
+                                     self.line_height, style.background)
+                painter.setFont(font)
+                painter.setPen(style.foreground if style.foreground is not None else default_foreground)
+                painter.drawText(x_offset + x, y + self.ascent, segment_text)
+
+            line_start = self.store.line_position(line)
+            line_end = line_start + len(text)
+            while highlight < highlight_end and self.highlight_ends[highlight] <= line_start:
+                highlight += 1
+            index = highlight
+            while index < highlight_end and self.highlight_starts[index] <= line_end:
+                start = self.highlight_starts[index]
+                end = self.highlight_ends[index]
+                if end > line_start:
+                    if index == self.current_highlight:
+                        self._paint_overlay(painter, text, segments, x_offset, y, line_start, start, end,
+                                            QColor("#ff8c00"), QColor("#ffffff"))
+                    else:
+                        self._paint_overlay(painter, text, segments, x_offset, y, line_start, start, end,
+                                            QColor("#ffff00"), QColor("#000000"))
+                index += 1
+            if selection and selection[0] <= line_end and selection[1] > line_start:
+                self._paint_overlay(painter, text, segments, x_offset, y, line_start,
+                                    selection[0], selection[1],
+                                    palette.highlight().color(), palette.highlightedText().color(),
+                                    include_newline=selection[1] > line_end)
+        painter.end()
+
+        if content_width != self.content_width:
+            self.content_width = content_width
+            self._update_scrollbars()
+
+    def _paint_overlay(self, painter, text, segments, x_offset, y, line_start, start, end,
+                       background, foreground, include_newline=False):
+        """在行内 [start, end) 范围上叠加背景色并以前景色重绘文字"""
+        first_column = max(0, start - line_start)
+        last_column = min(len(text), end - line_start)
+        for segment_start, segment_end, style, font, metrics, x in segments:
+            column_start = max(first_column, segment_start)
+            column_end = min(last_column, segment_end)
+            if column_start >= column_end:
+                continue
+            left = x_offset + x + metrics.horizontalAdvance(text[segment_start:column_start])
+            piece = text[column_start:column_end]
+            painter.fillRect(left, y, metrics.horizontalAdvance(piece), self.line_height, background)
+            painter.setFont(font)
+            painter.setPen(foreground)
+            painter.drawText(left, y + self.ascent, piece)
+        if include_newline:
+            end_x = x_offset + (segments[-1][5] + segments[-1][4].horizontalAdvance(
+                text[segments[-1][0]:segments[-1][1]]) if segments else 0)
+            painter.fillRect(end_x, y, self.char_width // 2, self.line_height, background)
+
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        at_bottom = self._is_at_bottom()
+        self._update_scrollbars()
+        if at_bottom:
+            self.scroll_to_bottom()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() in (event.Type.FontChange, event.Type.StyleChange):
+            self._update_metrics()
+            self.viewport().update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            position = self._hit_test(event.position().toPoint())
+            if event.modifiers() & Qt.KeyboardModifier.ShiftModifier and self.selection_anchor is not None:
+                self.selection_position = position
+            else:
+                self.selection_anchor = position
+                self.selection_position = position
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.MouseButton.LeftButton and self.selection_anchor is not None:
+            point = event.position().toPoint()
+            self.selection_position = self._hit_test(point)
+            if point.y() < 0:
+                self.verticalScrollBar().triggerAction(self.verticalScrollBar().SliderAction.SliderSingleStepSub)
+            elif point.y() > self.viewport().height():
+                self.verticalScrollBar().triggerAction(self.verticalScrollBar().SliderAction.SliderSingleStepAdd)
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.selection_changed.emit()
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton:
+            position = self._hit_test(event.position().toPoint())
+            line, column = self.store.position_to_line(position)
+            text = self.store.line_text(line)
+            start = column
+            while start > 0 and (text[start - 1].isalnum() or text[start - 1] in '_-./:'):
+                start -= 1
+            end = column
+            while end < len(text) and (text[end].isalnum() or text[end] in '_-./:'):
+                end += 1
+            line_start = self.store.line_position(line)
+            self.selection_anchor = line_start + start
+            self.selection_position = line_start + end
+            self.viewport().update()
+            self.selection_changed.emit()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            self.copy()
+        elif event.matches(QKeySequence.StandardKey.SelectAll):
+            self.select_all()
+        elif event.key() == Qt.Key.Key_Home and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.verticalScrollBar().setValue(0)
+        elif event.key() == Qt.Key.Key_End and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.scroll_to_bottom()
+        else:
+            super().keyPressEvent(event)
+
+    def _show_context_menu(self, position):
+        menu = QMenu(self)
+        copy_action = menu.addAction("复制")
+        copy_action.setEnabled(self.has_selection())
+        copy_action.triggered.connect(self.copy)
+        select_all_action = menu.addAction("全选")
+        select_all_action.triggered.connect(self.select_all)
+        menu.exec(self.viewport().mapToGlobal(position))
@@ -0,0 +1,275 @@
+"""
+工具索引模块
+为工具与参数的可搜索字段建立词元倒排索引，扫描时一次建立，配置变化时按工具增量更新
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Dict, Iterable, List, Optional
+
+from .output_index import required_literals
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def query_literals(query: str, use_regex: bool) -> List[List[str]]:
+    """查询必然包含的字面子串组合，普通查询不限长度"""
+    if not use_regex:
+        return [[query]]
+    return required_literals(query, use_regex)
+
+
+class TextIndex:
+    """词元后缀的前缀索引
+
+    每个词元的所有后缀（最长 KEY_LENGTH 个字符）作为键，查询词元按前缀查找键的有序列表，
+    因此词元内部的任意子串都能命中。结果只是候选集合，调用方需要再按原有规则确认。
+    """
+
+    KEY_LENGTH = 12
+    MAX_RANGE_KEYS = 4096
+
+    def __init__(self):
+        self.postings = {}
+        self.keys = []
+        self.new_keys = []
+        self.stale_keys = 0
+        self.doc_keys = {}
+        self.doc_order = {}
+        self.order = count()
+        # 参数描述中的词元大量重复，缓存每个词元的后缀键
+        self.token_keys = {}
+
+    def add(self, doc, texts: Iterable[str]):
+        """添加或替换文档"""
+        self.remove(doc)
+        keys = set()
+        for text in texts:
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                token_keys = self.token_keys.get(token)
+                if token_keys is None:
+                    token_keys = self.token_keys[token] = tuple(
+                        {token[i:i + self.KEY_LENGTH] for i in range(len(token))})
+                keys.update(token_keys)
+
+        self.doc_keys[doc] = keys
+        self.doc_order[doc] = next(self.order)
+        for key in keys:
+            posting = self.postings.get(key)
+            if posting is None:
+                posting = self.postings[key] = set()
+                self.new_keys.append(key)
+            posting.add(doc)
+
+    def remove(self, doc):
+        keys = self.doc_keys.pop(doc, None)
+        if keys is None:
+            return
+        del self.doc_order[doc]
+        for key in keys:
+            posting = self.postings[key]
+            posting.discard(doc)
+            if not posting:
+                del self.postings[key]
+                self.stale_keys += 1
+
+    def clear(self):
+        self.postings.clear()
+        self.keys = []
+        self.new_keys = []
+        self.stale_keys = 0
+        self.doc_keys.clear()
+        self.doc_order.clear()
+        self.token_keys.clear()
+
+    def _sorted_keys(self) -> List[str]:
+        if not self.new_keys and self.stale_keys <= len(self.postings):
+            return self.keys
+        # 少量新增键逐个插入，批量建立或失效键过多时整体重排
+        if self.stale_keys > len(self.postings) or len(self.new_keys) > 1024:
+            self.keys = sorted(self.postings)
+            self.stale_keys = 0
+        else:
+            for key in self.new_keys:
+                if key in self.postings:
+                    insort(self.keys, key)
+        self.new_keys = []
+        return self.keys
+
+    def lookup(self, token: str) -> Optional[set]:
+        """包含该词元的文档，命中的键过多时返回 None 表示不值得过滤"""
+        prefix = token[:self.KEY_LENGTH]
+        keys = self._sorted_keys()
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + '\U0010ffff', start)
+        if end - start > self.MAX_RANGE_KEYS:
+            return None
+
+        result = set()
+        for i in range(start, end):
+            posting = self.postings.get(keys[i])
+            if posting:
+                result.update(posting)
+        return result
+
+    def candidates(self, alternatives: List[List[str]]) -> Optional[list]:
+        """返回满足任一备选组合的文档，按添加顺序排列；无法过滤时返回 None"""
+        if not alternatives:
+            return None
+
+        result = set()
+        for literals in alternatives:
+            tokens = set()
+            for literal in literals:
+                tokens.update(TOKEN_PATTERN.findall(literal.lower()))
+            if not tokens:
+                return None
+
+            matched = None
+            for token in sorted(tokens, key=len, reverse=True):
+                docs = self.lookup(token)
+                if docs is None:
+                    continue
+                matched = docs if matched is None else matched & docs
+                if not matched:
+                    break
+            if matched is None:
+                return None
+            result.update(matched)
+        return sorted(result, key=self.doc_order.__getitem__)
+
+
+class IndexedTools(list):
+    """工具列表，附带索引以便只取可能匹配的工具"""
+
+    def __init__(self, tools, index: 'ToolSearchIndex'):
+        super().__init__(tools)
+        self.index = index
+
+    def candidates(self, query: str, use_regex: bool = False) -> list:
+        names = self.index.tool_candidates(query, use_regex)
+        if names is None:
+            return list(self)
+        names = set(names)
+        return [tool_info for tool_info in self if tool_info.name in names]
+
+
+class IndexedParameters(dict):
+    """按工具分组的参数字典，附带索引以便只取可能匹配的参数"""
+
+    def __init__(self, parameters, index: 'ToolSearchIndex'):
+        super().__init__(parameters)
+        self.index = index
+
+    def candidates(self, query: str, use_regex: bool = False) -> dict:
+        docs = self.index.parameter_candidates(query, use_regex)
+        if docs is None:
+            return self
+        result = {}
+        for tool_name, param_name in docs:
+            params = self.get(tool_name)
+            if params and param_name in params:
+                result.setdefault(tool_name, {})[param_name] = params[param_name]
+        return result
+
+
+class ToolSearchIndex:
+    """工具与参数的搜索索引
+
+    工具按名称、显示名、描述、标签与分类建立索引，参数按名称、描述与默认值建立索引。
+    search_tools() 在候选工具上按原有的小写子串规则确认，并按字段权重排序。
+    """
+
+    TOOL_WEIGHTS = (('name', 10), ('display_name', 8), ('description', 5), ('tags', 3))
+
+    def __init__(self):
+        self.tool_index = TextIndex()
+        self.parameter_index = TextIndex()
+        self.tools = {}
+        self.tool_parameters = {}
+        self.lock = threading.Lock()
+
+    def rebuild(self, tools: Dict[str, object]):
+        with self.lock:
+            self.tool_index.clear()
+            self.parameter_index.clear()
+            self.tools.clear()
+            self.tool_parameters.clear()
+            for tool_info in tools.values():
+                self._add_tool(tool_info)
+
+    def update_tool(self, tool_info):
+        """工具配置变化后重新索引该工具及其参数"""
+        with self.lock:
+            self._remove_tool(tool_info.name)
+            self._add_tool(tool_info)
+
+    def remove_tool(self, tool_name: str):
+        with self.lock:
+            self._remove_tool(tool_name)
+
+    def _add_tool(self, tool_info):
+        self.tools[tool_info.name] = tool_info
+        self.tool_index.add(tool_info.name, [tool_info.name, tool_info.display_name or '',
+                                             tool_info.description or '', tool_info.category or '',
+                                             *tool_info.tags])
+        docs = []
+        for param_name, param_config in tool_info.parameters.items():
+            doc = (tool_info.name, param_name)
+            self.parameter_index.add(doc, [param_name, param_config.get('description', ''),
+                                           str(param_config.get('default', ''))])
+            docs.append(doc)
+        self.tool_parameters[tool_info.name] = docs
+
+    def _remove_tool(self, tool_name: str):
+        if self.tools.pop(tool_name, None) is None:
+            return
+        self.tool_index.remove(tool_name)
+        for doc in self.tool_parameters.pop(tool_name, []):
+            self.parameter_index.remove(doc)
+
+    def tool_candidates(self, query: str, use_regex: bool = False) -> Optional[list]:
+        """可能匹配的工具名称，无法过滤时返回 None"""
+        with self.lock:
+            return self.tool_index.candidates(query_literals(query, use_regex))
+
+    def parameter_candidates(self, query: str, use_regex: bool = False) -> Optional[list]:
+        """可能匹配的 (工具名称, 参数名称)，无法过滤时返回 None"""
+        with self.lock:
+            return self.parameter_index.candidates(query_literals(query, use_regex))
+
+    def search_tools(self, query: str, tools: Iterable = None) -> list:
+        """按小写子串匹配名称、显示名、描述与标签，按字段权重从高到低返回工具
+
+        tools 为空时在全部已索引的工具中搜索，否则只返回其中的工具，顺序相同时保持原有顺序。
+        """
+        query = query.lower()
+        if tools is None:
+            with self.lock:
+                tools = list(self.tools.values())
+        names = self.tool_candidates(query)
+        if names is not None:
+            names = set(names)
+            tools = [tool_info for tool_info in tools if tool_info.name in names]
+
+        ranked = []
+        for tool_info in tools:
+            score = 0
+            for field, weight in self.TOOL_WEIGHTS:
+                if field == 'tags':
+                    if any(query in tag.lower() for tag in tool_info.tags):
+                        score += weight
+                elif query in (getattr(tool_info, field) or '').lower():
+                    score += weight
+            if score:
+                ranked.append((score, tool_info))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [tool_info for _, tool_info in ranked]
+
+    def indexed_tools(self, tools) -> IndexedTools:
+        return IndexedTools(tools, self)
+
+    def indexed_parameters(self, parameters) -> IndexedParameters:
+        return IndexedParameters(parameters, self)
@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, QTimer, QMimeData, QEvent
 from PySide6.QtGui import QFont, QIcon, QPalette, QDrag, QAction
+from .parameter_document import ParameterDocument
 
 class ParameterManager:
     """参数管理器，负责统一管理参数的分类和操作规则"""
@@ -21,6 +22,8 @@ class ParameterManager:
     def __init__(self, tool_info):
         self.tool_info = tool_info
         self.config_file_path = Path(tool_info.path) / "wct_config.txt"
+        # 编辑只修改共享的内存文档，由文档延迟写回磁盘并通知受影响的段
+        self.document = ParameterDocument.for_file(self.config_file_path)
         
     def get_common_parameters(self) -> List[Dict]:
         """获取常用参数列表"""
@@ -31,92 +34,25 @@ class ParameterManager:
         return self._get_parameters_by_section('全部参数')
         
     def _get_parameters_by_section(self, section_name: str) -> List[Dict]:
-        """根据配置文件段名获取参数列表"""
-        if not self.config_file_path.exists():
+        """根据配置文件段名获取参数列表，解析结果来自内存中的参数文档"""
+        wct_config = self.document.model()
+        if wct_config is None:
             return []
+        return [parameter.to_dict() for parameter in wct_config.section(section_name)]
             
-        try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            return self._parse_section_parameters(content, section_name)
-        except Exception as e:
-            print(f"解析参数配置失败: {e}")
+    def _sections_with_parameter(self, param_name: str) -> List[str]:
+        wct_config = self.document.model()
+        if wct_config is None:
             return []
-            
-    def _parse_section_parameters(self, content: str, target_section: str) -> List[Dict]:
-        """解析指定段的参数"""
-        parameters = []
-        current_section = None
-        current_param_type = None
-        
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-
-            if line.startswith('%') and not line.startswith('%%'):
-                current_section = line[1:].strip()
-                continue
-                
-
-            if line.startswith('%%'):
-                current_param_type = line[2:].strip()
-                continue
-                
-
-            if current_section != target_section:
-                continue
-                
-
-            if '=' in line:
-                param_info = self._parse_parameter_line(line, current_param_type)
-                if param_info:
-                    parameters.append(param_info)
-                    
-        return parameters
-        
-    def _parse_parameter_line(self, line: str, param_type: str) -> Optional[Dict]:
-        """解析单个参数行"""
-        parts = line.split('=')
-        if len(parts) < 4:
-            return None
-            
-        param_name = parts[0].strip()
-        display_name = parts[1].strip()
-        description = parts[2].strip()
-        required_str = parts[3].strip()
-        
-
-        param_data_type = 'boolean' if param_type == '勾选项' else 'string'
-        
-
-        required = required_str == '1'
-        
-
-        default_value = False if param_data_type == 'boolean' else ''
-        
-        return {
-            'name': param_name,
-            'type': param_data_type,
-            'display_name': display_name,
-            'description': description,
-            'default': default_value,
-            'required': required
-        }
+        return [parameter.section for parameter in wct_config.parameters if parameter.name == param_name]
         
     def move_parameter_between_sections(self, param_name: str, from_section: str, to_section: str) -> bool:
         """在配置文件中移动参数到不同段"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-
             param_line = None
             param_type = None
             new_lines = []
@@ -170,8 +106,7 @@ class ParameterManager:
                     final_lines.append(line)
                     
 
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                f.writelines(final_lines)
+            self.document.set_lines(final_lines, [from_section, to_section])
                 
             return inserted
         except Exception as e:
@@ -180,14 +115,11 @@ class ParameterManager:
             
     def copy_parameter_to_section(self, param_name: str, from_section: str, to_section: str) -> bool:
         """复制参数到另一个段"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-
             param_line = None
             param_type = None
             current_section = None
@@ -252,8 +184,7 @@ class ParameterManager:
                     new_lines.append(line)
                     
 
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                f.writelines(new_lines)
+            self.document.set_lines(new_lines, [to_section])
                 
             return inserted
         except Exception as e:
@@ -262,13 +193,11 @@ class ParameterManager:
             
     def remove_parameter_from_section(self, param_name: str, section: str) -> bool:
         """从指定段移除参数"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
             new_lines = []
             current_section = None
             removed = False
@@ -288,8 +217,7 @@ class ParameterManager:
                     new_lines.append(line)
                     
             if removed:
-                with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(new_lines)
+                self.document.set_lines(new_lines, [section])
                     
             return removed
         except Exception as e:
@@ -298,17 +226,14 @@ class ParameterManager:
             
     def reorder_parameter_in_section(self, param_name: str, target_param_name: str, section: str, insert_position: int) -> bool:
         """在同一段内重新排序参数"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         if param_name == target_param_name:
             return True
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-
             param_line = None
             param_line_index = -1
             target_line_index = -1
@@ -348,8 +273,7 @@ class ParameterManager:
             new_lines.insert(insert_index, param_line)
             
 
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                f.writelines(new_lines)
+            self.document.set_lines(new_lines, [section])
                 
             return True
         except Exception as e:
@@ -358,14 +282,11 @@ class ParameterManager:
             
     def change_parameter_type(self, param_name: str, new_type: str) -> bool:
         """更改参数类型（boolean <-> string）"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-
             param_line = None
             param_line_index = -1
             param_section = None
@@ -423,8 +344,7 @@ class ParameterManager:
                 return False
                 
 
-            with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                f.writelines(final_lines)
+            self.document.set_lines(final_lines, [param_section])
                 
             return True
         except Exception as e:
@@ -433,13 +353,11 @@ class ParameterManager:
             
     def update_parameter_info(self, param_name: str, display_name: str, description: str) -> bool:
         """更新参数信息"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
             new_lines = []
             updated = False
             
@@ -459,8 +377,7 @@ class ParameterManager:
                     new_lines.append(line)
                     
             if updated:
-                with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(new_lines)
+                self.document.set_lines(new_lines, self._sections_with_parameter(param_name))
                     
             return updated
         except Exception as e:
@@ -469,13 +386,11 @@ class ParameterManager:
             
     def set_parameter_required(self, param_name: str, required: bool) -> bool:
         """设置参数是否必填"""
-        if not self.config_file_path.exists():
+        lines = self.document.get_lines()
+        if lines is None:
             return False
             
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
             new_lines = []
             updated = False
             
@@ -494,8 +409,7 @@ class ParameterManager:
                     new_lines.append(line)
                     
             if updated:
-                with open(self.config_file_path, 'w', encoding='utf-8') as f:
-                    f.writelines(new_lines)
+                self.document.set_lines(new_lines, self._sections_with_parameter(param_name))
                     
             return updated
         except Exception as e:
@@ -513,6 +427,7 @@ class ParameterWidget(QWidget):
         self.param_config = param_config
         self.section_name = section_name
         self.input_widget = None
+        self.label = None
         
 
         self.setAcceptDrops(True)
@@ -555,6 +470,7 @@ class ParameterWidget(QWidget):
             label.setWordWrap(True)
             if self.param_config.get('required', False):
                 label.setProperty("class", "required_param")
+            self.label = label
             
 
             tooltip_text = f"原参数: {self.param_name}\n参数名: {display_name}\n参数介绍: {self.param_config.get('description', '无描述')}"
@@ -651,6 +567,26 @@ class ParameterWidget(QWidget):
             widget = QLineEdit()
             return widget
             
+    def update_config(self, param_config):
+        """显示名、描述或必填状态变化时就地更新，输入的值保持不变；类型变化需要重新创建控件"""
+        self.param_config = param_config
+        display_name = param_config.get('display_name', self.param_name)
+        tooltip_text = f"原参数: {self.param_name}\n参数名: {display_name}\n参数介绍: {param_config.get('description', '无描述')}"
+        
+        if self.label is not None:
+            required = param_config.get('required', False)
+            self.label.setText(display_name + ' *' if required else display_name)
+            self.label.setProperty("class", "required_param" if required else "")
+            self.label.style().unpolish(self.label)
+            self.label.style().polish(self.label)
+            self.label.setToolTip(tooltip_text)
+            self.setToolTip(tooltip_text)
+        elif isinstance(self.input_widget, QPushButton):
+            self.input_widget.setText(display_name)
+            self.input_widget.setToolTip(tooltip_text)
+            
+        self.update_validation_status()
+        
     def _connect_signals(self):
         if isinstance(self.input_widget, QPushButton) and self.input_widget.isCheckable():
             self.input_widget.toggled.connect(self._emit_value_changed)
@@ -906,6 +842,8 @@ class ToolOperationWidget(QWidget):
         self.current_tool = None
         self.parameter_widgets = {}
         self.param_manager = None
+        self.document = None
+        self.section_params = {}
         self.setup_ui()
         self.connect_signals()
         
@@ -1075,6 +1013,7 @@ class ToolOperationWidget(QWidget):
         
 
         self.param_manager = ParameterManager(tool_info)
+        self._attach_document(self.param_manager.document)
         
 
         self.clear_parameters()
@@ -1094,10 +1033,57 @@ class ToolOperationWidget(QWidget):
         self.status_frame.setVisible(False)
         self._update_command_preview()
         
+    def refresh_tool(self, tool_info):
+        """当前工具的配置在磁盘上被修改后就地刷新，已填写的参数值会保留"""
+        self.current_tool = tool_info
+        self.tool_name_label.setText(tool_info.display_name)
+        
+        if not tool_info.has_required_files():
+            self.config_exec_button.setText("⚠️ 缺少执行文件，请配置")
+            self.config_exec_button.setProperty("status", "missing")
+        else:
+            self.config_exec_button.setText("✅ 执行文件已配置，点击重新配置")
+            self.config_exec_button.setProperty("status", "configured")
+            
+        # 应用自身写回配置文件也会触发刷新，此时参数文档的内容没有变化，不会重建任何控件
+        self.param_manager = ParameterManager(tool_info)
+        self._attach_document(self.param_manager.document)
+        for section_name in ("全部参数", "常用参数"):
+            self._sync_section(section_name)
+        self._update_command_preview()
+        
+    def focus_parameter(self, param_name):
+        """切换到参数所在的分页并滚动到该参数，常用参数优先，找不到时返回 False"""
+        for prefix, scroll in (('common_', self.common_params_scroll), ('all_', self.all_params_scroll)):
+            widget = self.parameter_widgets.get(prefix + param_name)
+            if widget is not None:
+                self.params_tab_widget.setCurrentWidget(scroll)
+                # 刚加载的参数控件要等布局完成后才有正确的位置
+                QTimer.singleShot(0, lambda: scroll.ensureWidgetVisible(widget))
+                widget.setFocus()
+                return True
+        return False
+        
+    def _attach_document(self, document):
+        """只接收当前工具参数文档的变化通知"""
+        if self.document is document:
+            return
+        if self.document is not None:
+            self.document.section_changed.disconnect(self._sync_section)
+            self.document.write_failed.disconnect(self._on_document_write_failed)
+        self.document = document
+        document.section_changed.connect(self._sync_section)
+        document.write_failed.connect(self._on_document_write_failed)
+        
+    def _on_document_write_failed(self, error):
+        """参数配置写回失败，编辑仍保留在内存中"""
+        QMessageBox.warning(self, "保存失败", f"{error}\n\n修改仍保留在内存中，下次修改或退出时会重新保存。")
+        
     def clear_parameters(self):
         for widget in self.parameter_widgets.values():
             widget.deleteLater()
         self.parameter_widgets.clear()
+        self.section_params.clear()
         
 
         while self.common_params_layout.count():
@@ -1146,9 +1132,14 @@ class ToolOperationWidget(QWidget):
         if not params:
             return
             
-
-        checkbox_params = [p for p in params if p.get('type') == 'boolean']
-        input_params = [p for p in params if p.get('type') != 'boolean']
+        widgets = [self._create_parameter_widget(param, section_name) for param in params]
+        self.section_params[section_name] = params
+        self._layout_params_section(widgets, target_layout)
+        
+    def _layout_params_section(self, widgets, target_layout):
+        """把参数控件按勾选项与输入项排入区域，已有的控件会被移入新的框架而不是重新创建"""
+        checkbox_widgets = [w for w in widgets if w.param_config.get('type') == 'boolean']
+        input_widgets = [w for w in widgets if w.param_config.get('type') != 'boolean']
         
 
         main_container = QWidget()
@@ -1157,18 +1148,18 @@ class ToolOperationWidget(QWidget):
         main_layout.setSpacing(10)
         
 
-        if checkbox_params:
-            checkbox_frame = self._create_checkbox_frame(checkbox_params, section_name)
+        if checkbox_widgets:
+            checkbox_frame = self._create_checkbox_frame(checkbox_widgets)
             main_layout.addWidget(checkbox_frame, 0, Qt.AlignTop)
         
 
-        if input_params:
-            input_frame = self._create_input_frame(input_params, section_name)
+        if input_widgets:
+            input_frame = self._create_input_frame(input_widgets)
             main_layout.addWidget(input_frame)
         
         target_layout.addWidget(main_container)
         
-    def _create_checkbox_frame(self, checkbox_params, section_name):
+    def _create_checkbox_frame(self, checkbox_widgets):
         """创建勾选项框架"""
         checkbox_frame = QFrame()
         checkbox_frame.setProperty("class", "checkbox_frame")
@@ -1179,8 +1170,7 @@ class ToolOperationWidget(QWidget):
         checkbox_grid.setSpacing(10)
         checkbox_grid.setVerticalSpacing(5)
         
-        for i, param in enumerate(checkbox_params):
-            param_widget = self._create_parameter_widget(param, section_name)
+        for i, param_widget in enumerate(checkbox_widgets):
             row = i // 2
             col = i % 2
             checkbox_grid.addWidget(param_widget, row, col)
@@ -1190,7 +1180,7 @@ class ToolOperationWidget(QWidget):
         
         return checkbox_frame
         
-    def _create_input_frame(self, input_params, section_name):
+    def _create_input_frame(self, input_widgets):
         """创建输入项框架"""
         input_frame = QFrame()
         input_frame.setProperty("class", "input_frame")
@@ -1199,12 +1189,65 @@ class ToolOperationWidget(QWidget):
         input_layout = QVBoxLayout(input_frame)
         input_layout.setContentsMargins(10, 10, 10, 10)
         
-        for param in input_params:
-            param_widget = self._create_parameter_widget(param, section_name)
+        for param_widget in input_widgets:
             input_layout.addWidget(param_widget)
         
         return input_frame
         
+    def _sync_section(self, section_name):
+        """参数文档的某一段变化后只更新该段
+
+        内容未变的控件原样保留（包括已填写的值），显示信息变化的控件就地更新，
+        只有新增或类型变化的参数才创建控件，已删除的参数的控件被销毁。
+        """
+        if section_name not in ("常用参数", "全部参数") or self.param_manager is None:
+            return
+        if section_name == "常用参数":
+            params = self.param_manager.get_common_parameters()
+            section_type, target_layout, empty_message = "common", self.common_params_layout, "无常用参数"
+        else:
+            params = self.param_manager.get_all_parameters()
+            section_type, target_layout, empty_message = "all", self.all_params_layout, "无全部参数"
+        if params == self.section_params.get(section_name, []):
+            return
+            
+        prefix = f"{section_type}_"
+        existing = {key[len(prefix):]: widget for key, widget in self.parameter_widgets.items()
+                    if key.startswith(prefix)}
+        widgets = []
+        for param in params:
+            widget = existing.pop(param['name'], None)
+            if widget is not None and widget.param_config.get('type') != param['type']:
+                widget.deleteLater()
+                widget = None
+            if widget is None:
+                widget = self._create_parameter_widget(param, section_name)
+            else:
+                self.parameter_widgets[prefix + param['name']] = widget
+                if widget.param_config != param:
+                    widget.update_config(param)
+            widgets.append(widget)
+            
+        for param_name, widget in existing.items():
+            if self.parameter_widgets.get(prefix + param_name) is widget:
+                del self.parameter_widgets[prefix + param_name]
+            widget.deleteLater()
+            
+        old_items = [target_layout.takeAt(0) for _ in range(target_layout.count())]
+        if widgets:
+            self._layout_params_section(widgets, target_layout)
+        else:
+            self._show_empty_section_message(target_layout, empty_message)
+        target_layout.addStretch()
+        for item in old_items:
+            if item.widget():
+                item.widget().deleteLater()
+        self.section_params[section_name] = params
+        
+        if self.param_search_edit.text():
+            self.filter_parameters(self.param_search_edit.text())
+        self._update_command_preview()
+        
     def _create_parameter_widget(self, param, section_name):
         """创建单个参数控件"""
         param_name = param['name']
@@ -1264,14 +1307,12 @@ class ToolOperationWidget(QWidget):
         if from_section == "common" and to_section == "all":
 
             if self.param_manager.remove_parameter_from_section(param_name, from_section_name):
-                self._reload_parameters()
                 QMessageBox.information(self, "成功", f"参数 '{param_name}' 已从常用参数中移除")
             else:
                 QMessageBox.warning(self, "失败", f"移除参数 '{param_name}' 失败")
         elif from_section == "all" and to_section == "common":
 
             if self.param_manager.copy_parameter_to_section(param_name, "全部参数", "常用参数"):
-                self._reload_parameters()
                 QMessageBox.information(self, "成功", f"参数 '{param_name}' 已复制到常用参数")
             else:
                 QMessageBox.information(self, "提示", f"参数 '{param_name}' 已存在于常用参数中")
@@ -1342,8 +1383,6 @@ class ToolOperationWidget(QWidget):
             
 
             if self.param_manager.reorder_parameter_in_section(param_name, target_param_name, section_name, insert_position):
-
-                self._reload_parameters()
                 QMessageBox.information(self, "成功", f"参数 '{param_name}' 已重新排序")
             else:
                 QMessageBox.warning(self, "失败", f"重新排序参数 '{param_name}' 失败")
@@ -1356,7 +1395,6 @@ class ToolOperationWidget(QWidget):
         """将参数复制到常用参数（使用新的参数管理器）"""
         try:
             if self.param_manager.copy_parameter_to_section(param_name, "全部参数", "常用参数"):
-                self._reload_parameters()
                 QMessageBox.information(self, "成功", f"参数 '{param_name}' 已复制到常用参数")
             else:
                 QMessageBox.information(self, "提示", f"参数 '{param_name}' 已存在于常用参数中，无需重复添加")
@@ -1370,7 +1408,6 @@ class ToolOperationWidget(QWidget):
         if reply == QMessageBox.Yes:
             try:
                 if self.param_manager.remove_parameter_from_section(param_name, "常用参数"):
-                    self._reload_parameters()
                     QMessageBox.information(self, "成功", f"参数 '{param_name}' 已从常用参数中删除")
                 else:
                     QMessageBox.warning(self, "失败", f"删除参数 '{param_name}' 失败")
@@ -1387,8 +1424,6 @@ class ToolOperationWidget(QWidget):
             if reply == QMessageBox.Yes:
 
                 if self.param_manager.change_parameter_type(param_name, new_type):
-
-                    self._reload_parameters()
                     QMessageBox.information(self, "成功", f"参数 '{param_name}' 类型已更改")
                 else:
                     QMessageBox.warning(self, "失败", f"更改参数 '{param_name}' 类型失败")
@@ -1406,8 +1441,6 @@ class ToolOperationWidget(QWidget):
             if reply == QMessageBox.Yes:
 
                 if self.param_manager.set_parameter_required(param_name, required):
-
-                    self._reload_parameters()
                     QMessageBox.information(self, "成功", f"参数 '{param_name}' 已设置为 {status}")
                 else:
                     QMessageBox.warning(self, "失败", f"设置参数 '{param_name}' 状态失败")
@@ -1419,7 +1452,8 @@ class ToolOperationWidget(QWidget):
         """编辑参数信息（使用新的参数管理器）"""
         try:
 
-            current_widget = self.parameter_widgets.get(param_name)
+            current_widget = (self.parameter_widgets.get(f"common_{param_name}") or
+                              self.parameter_widgets.get(f"all_{param_name}"))
             if not current_widget:
                 QMessageBox.warning(self, "错误", f"找不到参数 '{param_name}'")
                 return
@@ -1471,8 +1505,6 @@ class ToolOperationWidget(QWidget):
                 
 
                 if self.param_manager.update_parameter_info(param_name, new_display_name, new_description):
-
-                    self._reload_parameters()
                     QMessageBox.information(self, "成功", f"参数 '{param_name}' 信息已更新")
                 else:
                     QMessageBox.warning(self, "失败", f"更新参数 '{param_name}' 信息失败")
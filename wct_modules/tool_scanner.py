@@ -1,8 +1,21 @@
 import os
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Any
-from .utils import normalize_path, get_system_font
+from typing import Dict, List, Optional, Any, Tuple
+from PySide6.QtCore import QThread, Signal
+from .utils import normalize_path, get_system_font, get_cache_dir
+from .tool_index import ToolSearchIndex
+from .wct_config import WctConfig, load_wct_config
+from .terminal_performance import PerformanceConfig
+
+
+TOOL_UNCHANGED = ''
+TOOL_ADDED = 'added'
+TOOL_UPDATED = 'updated'
+TOOL_REMOVED = 'removed'
+
 
 class ToolInfo:
     def __init__(self, name: str, path: str, config_data: Dict[str, Any]):
@@ -108,12 +121,24 @@ class ToolInfo:
         return groups
         
 class ToolScanner:
+    CATALOG_CACHE_VERSION = 1
+    CATALOG_CACHE_FILE = 'tool_catalog.json'
+    
     def __init__(self, tools_directory: str = None):
         self.tools_directory = Path(tools_directory) if tools_directory else None
         self.tools: Dict[str, ToolInfo] = {}
         self.categories: Dict[str, List[str]] = {}
+        self.search_index = ToolSearchIndex()
+        self.catalog: Dict[str, Dict[str, Any]] = {}
+        self.catalog_changed = True
+        self.scan_catalog: Dict[str, Dict[str, Any]] = {}
         
     def scan_tools(self, tools_directory: str = None) -> Dict[str, ToolInfo]:
+        """扫描工具目录
+
+        配置文件的 (mtime, size, inode) 与目录缓存一致时直接使用缓存中的解析结果，
+        只有新增或修改过的配置才重新解析。catalog_changed 表示结果是否与缓存不同。
+        """
         if tools_directory:
             self.tools_directory = Path(tools_directory)
             
@@ -122,9 +147,98 @@ class ToolScanner:
         
         if not self.tools_directory or not self.tools_directory.exists():
             print(f"工具目录不存在: {self.tools_directory}")
+            self.search_index.rebuild(self.tools)
             return self.tools
         
+        tool_commands = self._load_tool_commands()
+        cache = self._load_catalog_cache()
+        self.catalog = {}
+        self.catalog_changed = False
+            
+        with ThreadPoolExecutor(max_workers=PerformanceConfig.TOOL_SCAN_WORKERS) as pool:
+            results = pool.map(lambda tool_dir: self._read_tool_directory(tool_dir, tool_commands, cache),
+                               self.list_tool_directories())
+            for result in results:
+                if result is not None:
+                    self._apply_tool_result(*result)
+                
+        if set(cache) != set(self.catalog):
+            self.catalog_changed = True
+        if self.catalog_changed:
+            self._save_catalog_cache()
+                
+        self._organize_categories()
+        self.search_index.rebuild(self.tools)
+        return self.tools
+        
+    def list_tool_directories(self) -> List[Path]:
+        """用 os.scandir 列出工具目录下的子目录，按名称排序"""
+        with os.scandir(self.tools_directory) as entries:
+            return sorted(Path(entry.path) for entry in entries if entry.is_dir())
+        
+    def begin_scan(self, tools_directory: str = None):
+        """开始渐进扫描，之后在GUI线程中由 apply_scan_results 逐批合并 ToolScanWorker 的结果"""
+        if tools_directory:
+            self.tools_directory = Path(tools_directory)
+        self.scan_catalog = {}
+        self.catalog_changed = False
+        
+    def apply_scan_results(self, results: List[Tuple[ToolInfo, Dict[str, Any], bool]]) -> List[ToolInfo]:
+        """合并一批扫描结果，返回新增或配置变化的工具；未变化的工具保留现有对象"""
+        changed = []
+        for tool_info, entry, reparsed in results:
+            self.scan_catalog[tool_info.name] = entry
+            if reparsed:
+                self.catalog_changed = True
+            elif tool_info.name in self.tools:
+                continue
+            self.tools[tool_info.name] = tool_info
+            changed.append(tool_info)
+        return changed
+        
+    def finish_scan(self) -> List[str]:
+        """渐进扫描完成：移除已不存在的工具，整理分类并按需写回目录缓存，返回被移除的工具名称"""
+        removed = [tool_name for tool_name in self.tools if tool_name not in self.scan_catalog]
+        for tool_name in removed:
+            del self.tools[tool_name]
+            self.search_index.remove_tool(tool_name)
+            
+        if set(self.catalog) != set(self.scan_catalog):
+            self.catalog_changed = True
+        self.catalog = dict(sorted(self.scan_catalog.items()))
+        self.scan_catalog = {}
+        if self.catalog_changed:
+            self._save_catalog_cache()
+            
+        self.categories.clear()
+        self._organize_categories()
+        return removed
+        
+    def load_cached_catalog(self, tools_directory: str = None) -> Dict[str, ToolInfo]:
+        """不访问各工具目录，直接从目录缓存恢复上次扫描的工具并建立搜索索引，没有可用缓存时返回空字典
 
+        索引随工具一起恢复，工具栏显示缓存的工具时搜索即可使用，随后的扫描只重新索引有变化的工具。
+        """
+        if tools_directory:
+            self.tools_directory = Path(tools_directory)
+            
+        self.tools.clear()
+        self.categories.clear()
+        cache = self._load_catalog_cache()
+        tool_commands = self._load_tool_commands() if cache else {}
+        
+        for tool_name, entry in cache.items():
+            try:
+                self.tools[tool_name] = self._make_tool_info(tool_name, entry, tool_commands)
+            except Exception as e:
+                print(f"恢复缓存的工具 {tool_name} 失败: {e}")
+        self.catalog = cache
+        
+        self._organize_categories()
+        self.search_index.rebuild(self.tools)
+        return self.tools
+        
+    def _load_tool_commands(self) -> Dict[str, Any]:
         app_config_file = self.tools_directory.parent / 'config' / 'app_config.json'
         tool_commands = {}
         if app_config_file.exists():
@@ -134,25 +248,64 @@ class ToolScanner:
                     tool_commands = app_config.get('tool_command', {})
             except Exception:
                 pass
+        return tool_commands
+        
+    def _catalog_cache_file(self) -> Path:
+        return get_cache_dir() / self.CATALOG_CACHE_FILE
+        
+    def _load_catalog_cache(self) -> Dict[str, Dict[str, Any]]:
+        """读取目录缓存，版本或工具目录不一致时视为没有缓存"""
+        try:
+            with open(self._catalog_cache_file(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
             
-        for tool_dir in self.tools_directory.iterdir():
-            if tool_dir.is_dir():
-                self._scan_tool_directory(tool_dir, tool_commands)
-                
-        self._organize_categories()
-        return self.tools
+        if (data.get('version') != self.CATALOG_CACHE_VERSION or 
+            data.get('tools_directory') != str(self.tools_directory)):
+            return {}
+        return data.get('tools', {})
+        
+    def _save_catalog_cache(self):
+        """先写临时文件再替换，避免中途退出留下损坏的缓存"""
+        try:
+            cache_file = self._catalog_cache_file()
+            temp_file = cache_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.CATALOG_CACHE_VERSION,
+                    'tools_directory': str(self.tools_directory),
+                    'tools': self.catalog
+                }, f, ensure_ascii=False)
+            os.replace(temp_file, cache_file)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"保存工具目录缓存失败: {e}")
+            
+    def _make_tool_info(self, tool_name: str, entry: Dict[str, Any], tool_commands: Dict = None) -> ToolInfo:
+        """由缓存条目创建 ToolInfo，app_config 中的命令配置每次重新叠加"""
+        config_data = dict(entry['config'])
+        
+        if tool_commands and tool_name in tool_commands:
+            tool_cmd_config = tool_commands[tool_name]
+            config_data['executable'] = tool_cmd_config.get('executable', config_data.get('executable', 'python'))
+            config_data['script_path'] = tool_cmd_config.get('script_path', config_data.get('script_path', 'main.py'))
+            
+        return ToolInfo(tool_name, entry['path'], config_data)
         
 
             
     def _parse_config_file(self, config_file: Path) -> Optional[Dict[str, Any]]:
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            wct_config = load_wct_config(config_file)
+            if wct_config is None:
+                print(f"配置文件不存在: {config_file}")
+                return None
+            content = wct_config.text.strip()
                 
             if content.startswith('{'):
                 return json.loads(content)
             elif content.startswith('%'):
-                return self._parse_wct_style_config(content)
+                return self._build_wct_style_config(wct_config)
             else:
                 return self._parse_ini_style_config(content)
                 
@@ -207,8 +360,8 @@ class ToolScanner:
                         
         return config
         
-    def _parse_wct_style_config(self, content: str) -> Dict[str, Any]:
-        """解析WCT自定义格式的配置文件"""
+    def _build_wct_style_config(self, wct_config: WctConfig) -> Dict[str, Any]:
+        """由共享解析器的模型生成工具配置，参数同时出现在多个段时以常用参数为准"""
         config = {
             'display_name': '',
             'description': '',
@@ -224,128 +377,86 @@ class ToolScanner:
             'tags': []
         }
         
-        current_group = None
-        current_section = None
-        group_param_order = {}
-        
-        lines = content.split('\n')
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-
-            if line.startswith('%') and not line.startswith('%%'):
-                current_group = line[1:].strip()
-                if current_group not in group_param_order:
-                    group_param_order[current_group] = []
-                continue
+        group_param_order = {group: [] for group in wct_config.sections}
+        for parameter in wct_config.parameters:
+            param_name = parameter.name
+            current_group = parameter.section
+            
+            if current_group and param_name not in group_param_order[current_group]:
+                group_param_order[current_group].append(param_name)
                 
-
-            if line.startswith('%%'):
-                current_section = line[2:].strip()
-                continue
+            new_param = {
+                'type': parameter.type,
+                'display_name': parameter.display_name,
+                'description': parameter.description,
+                'default': False if parameter.type == 'boolean' else '',
+                'required': parameter.required,
+                'group': current_group or '默认'
+            }
+            
+            existing_param = config['parameters'].get(param_name)
+            if existing_param is None:
+                config['parameters'][param_name] = new_param
+            elif existing_param.get('group') != '常用参数' and current_group == '常用参数':
+                existing_param['original_group'] = existing_param.get('group', '默认')
+                existing_param['group'] = current_group
+            elif existing_param.get('group') == '常用参数' and current_group != '常用参数':
+                if not existing_param.get('original_group'):
+                    existing_param['original_group'] = current_group or '默认'
+            else:
+                config['parameters'][param_name] = new_param
                 
-
-            if '=' in line:
-                parts = line.split('=')
-                if len(parts) >= 4:
-                    param_name = parts[0].strip()
-                    display_name = parts[1].strip()
-                    description = parts[2].strip()
-                    required_str = parts[3].strip()
-                    
-
-                    if current_group and current_group in group_param_order:
-                        if param_name not in group_param_order[current_group]:
-                            group_param_order[current_group].append(param_name)
-                    
-
-                    param_key = f"{param_name}_{current_group}" if current_group else param_name
-                    
-
-
-                    param_key = param_name
-                    
-
-                    param_type = 'boolean' if current_section == '勾选项' else 'string'
-                    
-
-                    required = required_str == '1'
-                    
-
-                    default_value = False if param_type == 'boolean' else ''
-                    
-
-                    if param_name in config['parameters']:
-                        existing_param = config['parameters'][param_name]
-
-                        if existing_param.get('group') != '常用参数' and current_group == '常用参数':
-
-                            existing_param['original_group'] = existing_param.get('group', '默认')
-                            existing_param['group'] = current_group or '默认'
-
-                        elif existing_param.get('group') == '常用参数' and current_group != '常用参数':
-
-                            if not existing_param.get('original_group'):
-                                existing_param['original_group'] = current_group or '默认'
-                            continue
-
-                        else:
-                            config['parameters'][param_name] = {
-                                'type': param_type,
-                                'display_name': display_name,
-                                'description': description,
-                                'default': default_value,
-                                'required': required,
-                                'group': current_group or '默认'
-                            }
-                    else:
-
-                        config['parameters'][param_name] = {
-                            'type': param_type,
-                            'display_name': display_name,
-                            'description': description,
-                            'default': default_value,
-                            'required': required,
-                            'group': current_group or '默认'
-                        }
-        
-
         config['parameter_order'] = group_param_order
         return config
     
-    def _scan_tool_directory(self, tool_dir: Path, tool_commands: Dict = None):
+    def _apply_tool_result(self, tool_info: ToolInfo, entry: Dict[str, Any], reparsed: bool):
+        self.tools[tool_info.name] = tool_info
+        self.catalog[tool_info.name] = entry
+        if reparsed:
+            self.catalog_changed = True
+        
+    def _read_tool_directory(self, tool_dir: Path, tool_commands: Dict = None,
+                             cache: Dict = None) -> Optional[Tuple[ToolInfo, Dict[str, Any], bool]]:
+        """读取一个工具目录，返回 (ToolInfo, 缓存条目, 是否重新解析)
+
+        不修改扫描器状态，可以在扫描线程池中并发调用。
+        """
         config_file = tool_dir / 'wct_config.txt'
-        if not config_file.exists():
-            return
+        try:
+            stat = config_file.stat()
+        except OSError:
+            return None
+            
+        tool_name = tool_dir.name
+        signature = [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+        entry = cache.get(tool_name) if cache else None
+        if entry and entry.get('signature') == signature and entry.get('path') == str(tool_dir):
+            try:
+                return self._make_tool_info(tool_name, entry, tool_commands), entry, False
+            except Exception:
+                pass
             
         try:
             config_data = self._parse_config_file(config_file)
             if config_data:
-                tool_name = tool_dir.name
                 
 
                 if not config_data.get('display_name'):
                     config_data['display_name'] = tool_name
                 
-
-                if tool_commands and tool_name in tool_commands:
-                    tool_cmd_config = tool_commands[tool_name]
-                    config_data['executable'] = tool_cmd_config.get('executable', config_data.get('executable', 'python'))
-                    config_data['script_path'] = tool_cmd_config.get('script_path', config_data.get('script_path', 'main.py'))
-                
-                tool_info = ToolInfo(tool_name, str(tool_dir), config_data)
+                entry = {'path': str(tool_dir), 'signature': signature, 'config': config_data}
+                tool_info = self._make_tool_info(tool_name, entry, tool_commands)
                 
 
-                self.tools[tool_name] = tool_info
                 if tool_info.has_required_files():
                     print(f"扫描到工具: {tool_info.display_name} ({tool_name})")
                 else:
                     print(f"扫描到工具: {tool_info.display_name} ({tool_name}) - 需要配置执行文件")
+                return tool_info, entry, True
                     
         except Exception as e:
             print(f"扫描工具 {tool_dir.name} 时出错: {e}")
+        return None
         
     def _organize_categories(self):
         for tool_name, tool_info in self.tools.items():
@@ -372,17 +483,8 @@ class ToolScanner:
         return list(self.categories.keys())
         
     def search_tools(self, query: str) -> List[ToolInfo]:
-        query = query.lower()
-        results = []
-        
-        for tool_info in self.tools.values():
-            if (query in tool_info.name.lower() or 
-                query in tool_info.display_name.lower() or 
-                query in tool_info.description.lower() or 
-                any(query in tag.lower() for tag in tool_info.tags)):
-                results.append(tool_info)
-                
-        return results
+        """按名称、显示名、描述与标签搜索工具，结果按匹配字段的权重排序"""
+        return self.search_index.search_tools(query, self.tools.values())
         
     def get_tools_count(self) -> int:
         return len(self.tools)
@@ -391,9 +493,40 @@ class ToolScanner:
         if tool_name not in self.tools:
             return False
             
-        tool_dir = Path(self.tools[tool_name].path)
-        self._scan_tool_directory(tool_dir)
-        return tool_name in self.tools
+        event, _ = self.apply_tool_change(tool_name)
+        return event != TOOL_REMOVED
+        
+    def apply_tool_change(self, tool_name: str) -> Tuple[str, Optional[ToolInfo]]:
+        """重新读取单个工具目录，就地更新工具表、分类、目录缓存与搜索索引
+
+        返回 (事件, ToolInfo)，事件为 TOOL_ADDED、TOOL_UPDATED、TOOL_REMOVED，没有变化时为 TOOL_UNCHANGED。
+        配置文件仍存在但解析失败时（例如编辑器正在写入）保留原有工具。
+        """
+        if not self.tools_directory:
+            return TOOL_UNCHANGED, None
+            
+        tool_dir = self.tools_directory / tool_name
+        result = self._read_tool_directory(tool_dir, self._load_tool_commands(), self.catalog)
+        if result is None:
+            if tool_name not in self.tools or (tool_dir / 'wct_config.txt').exists():
+                return TOOL_UNCHANGED, None
+            del self.tools[tool_name]
+            self.catalog.pop(tool_name, None)
+            self.search_index.remove_tool(tool_name)
+            event, tool_info = TOOL_REMOVED, None
+        else:
+            tool_info, entry, reparsed = result
+            if not reparsed and tool_name in self.tools:
+                return TOOL_UNCHANGED, None
+            event = TOOL_UPDATED if tool_name in self.tools else TOOL_ADDED
+            self.tools[tool_name] = tool_info
+            self.catalog[tool_name] = entry
+            self.search_index.update_tool(tool_info)
+            
+        self._save_catalog_cache()
+        self.categories.clear()
+        self._organize_categories()
+        return event, tool_info
         
     def validate_tool_dependencies(self, tool_name: str) -> List[str]:
         if tool_name not in self.tools:
@@ -504,4 +637,68 @@ if __name__ == '__main__':
             f.write(main_content)
             
         print(f"示例工具已创建: {tool_path}")
-        return str(tool_path)
\ No newline at end of file
+        return str(tool_path)
+
+class ToolScanWorker(QThread):
+    """后台工具扫描线程
+
+    用 os.scandir 列出工具目录，在线程池中并发读取与解析各工具的配置，
+    按 TOOL_SCAN_BATCH_INTERVAL 分批发出 tools_found，第一批尽快发出，慢速网络目录也不会阻塞界面。
+    新解析或尚未索引的工具在本线程中加入搜索索引，从缓存恢复的工具已在 load_cached_catalog 中建立索引。
+    扫描结果需要在GUI线程中交给 ToolScanner.apply_scan_results 与 finish_scan 合并。
+    """
+    
+    tools_found = Signal(list)
+    scan_finished = Signal(bool)
+    
+    def __init__(self, scanner: ToolScanner, tools_directory: str = None, parent=None):
+        super().__init__(parent)
+        self.scanner = scanner
+        self.tools_directory = Path(tools_directory) if tools_directory else scanner.tools_directory
+        
+    def run(self):
+        completed = False
+        try:
+            completed = self.scan()
+        except Exception as e:
+            print(f"扫描工具目录时出错: {e}")
+        self.scan_finished.emit(completed)
+        
+    def scan(self) -> bool:
+        scanner = self.scanner
+        if not self.tools_directory or not self.tools_directory.exists():
+            print(f"工具目录不存在: {self.tools_directory}")
+            return True
+            
+        tool_commands = scanner._load_tool_commands()
+        cache = scanner._load_catalog_cache()
+        with os.scandir(self.tools_directory) as entries:
+            tool_dirs = [Path(entry.path) for entry in entries if entry.is_dir()]
+            
+        batch = []
+        next_emit = time.monotonic() + PerformanceConfig.TOOL_SCAN_FIRST_BATCH
+        with ThreadPoolExecutor(max_workers=PerformanceConfig.TOOL_SCAN_WORKERS) as pool:
+            futures = [pool.submit(scanner._read_tool_directory, tool_dir, tool_commands, cache)
+                       for tool_dir in tool_dirs]
+            for future in as_completed(futures):
+                if self.isInterruptionRequested():
+                    for pending in futures:
+                        pending.cancel()
+                    return False
+                    
+                result = future.result()
+                if result is not None:
+                    tool_info, _, reparsed = result
+                    if reparsed or tool_info.name not in scanner.search_index.tools:
+                        scanner.search_index.update_tool(tool_info)
+                    batch.append(result)
+                    
+                now = time.monotonic()
+                if batch and now >= next_emit:
+                    self.tools_found.emit(batch)
+                    batch = []
+                    next_emit = now + PerformanceConfig.TOOL_SCAN_BATCH_INTERVAL
+                    
+        if batch:
+            self.tools_found.emit(batch)
+        return True
@@ -0,0 +1,126 @@
+"""
+工具目录监视模块
+监视工具目录、各工具子目录及其 wct_config.txt，合并短时间内的多次变化后报告需要重新读取的工具
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, Set
+
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+from .terminal_performance import PerformanceConfig
+
+
+class ToolDirectoryWatcher(QObject):
+    """工具目录监视器
+
+    工具目录的变化（新建、删除、重命名子目录）通过对比子目录列表找出涉及的工具；
+    工具子目录的变化覆盖配置文件被创建、删除或以"写临时文件再重命名"方式保存的情况，
+    wct_config.txt 本身的变化覆盖原地写入。QFileSystemWatcher 在文件被替换后会丢失该路径，
+    因此每次处理时都会重新补上仍然存在的配置文件。
+    变化在 TOOL_WATCH_DEBOUNCE 毫秒内合并，然后以工具名称列表发出 tools_changed。
+    """
+
+    tools_changed = Signal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tools_directory = None
+        self.tool_names: Set[str] = set()
+        self.pending: Set[str] = set()
+        self.directory_dirty = False
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(PerformanceConfig.TOOL_WATCH_DEBOUNCE)
+        self.debounce_timer.timeout.connect(self.flush)
+
+    def watch(self, tools_directory):
+        """开始监视工具目录，已有的监视会被替换"""
+        self.stop()
+        self.tools_directory = Path(tools_directory)
+        if not self.tools_directory.is_dir():
+            return
+
+        self.watcher.addPath(str(self.tools_directory))
+        self.tool_names = self.list_tool_names()
+        self.add_tool_paths(self.tool_names)
+
+    def stop(self):
+        self.debounce_timer.stop()
+        self.pending.clear()
+        self.directory_dirty = False
+        self.tool_names = set()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def list_tool_names(self) -> Set[str]:
+        try:
+            with os.scandir(self.tools_directory) as entries:
+                return {entry.name for entry in entries if entry.is_dir()}
+        except OSError:
+            return set()
+
+    def add_tool_paths(self, tool_names: Iterable[str]):
+        """监视工具子目录及其中存在的配置文件，已监视的路径不会重复添加"""
+        watched = set(self.watcher.files())
+        watched.update(self.watcher.directories())
+        paths = []
+        for tool_name in tool_names:
+            tool_dir = self.tools_directory / tool_name
+            config_file = tool_dir / 'wct_config.txt'
+            for path in (tool_dir, config_file):
+                if str(path) not in watched and path.exists():
+                    paths.append(str(path))
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def remove_tool_paths(self, tool_names: Iterable[str]):
+        watched = set(self.watcher.files())
+        watched.update(self.watcher.directories())
+        paths = []
+        for tool_name in tool_names:
+            tool_dir = self.tools_directory / tool_name
+            for path in (str(tool_dir), str(tool_dir / 'wct_config.txt')):
+                if path in watched:
+                    paths.append(path)
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def on_directory_changed(self, path):
+        path = Path(path)
+        if path == self.tools_directory:
+            self.directory_dirty = True
+        elif path.parent == self.tools_directory:
+            self.pending.add(path.name)
+        self.debounce_timer.start()
+
+    def on_file_changed(self, path):
+        self.pending.add(Path(path).parent.name)
+        self.debounce_timer.start()
+
+    def flush(self):
+        """合并的变化到期：同步监视路径并发出涉及的工具名称"""
+        if self.tools_directory is None:
+            return
+
+        changed = self.pending
+        self.pending = set()
+        if self.directory_dirty:
+            self.directory_dirty = False
+            tool_names = self.list_tool_names()
+            removed = self.tool_names - tool_names
+            changed |= removed | (tool_names - self.tool_names)
+            self.remove_tool_paths(removed)
+            self.tool_names = tool_names
+
+        if not changed:
+            return
+        self.add_tool_paths(changed & self.tool_names)
+        self.tools_changed.emit(sorted(changed))
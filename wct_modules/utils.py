@@ -129,6 +129,80 @@ def get_configured_python_executable(tool_info):
         
     return None
 
+def get_configured_output_encoding(tool_info):
+    """获取工具配置的输出编码（如旧工具使用的GBK），未配置时返回None"""
+    if not tool_info:
+        return None
+        
+    candidates = []
+    
+    try:
+        import json
+        import codecs
+        
+        app_config_file = get_project_root() / 'config' / 'app_config.json'
+        if app_config_file.exists():
+            with open(app_config_file, 'r', encoding='utf-8') as f:
+                app_config = json.load(f)
+                
+            tool_name = getattr(tool_info, 'name', None)
+            tool_config = app_config.get('tool_command', {}).get(tool_name)
+            if isinstance(tool_config, dict):
+                candidates.append(tool_config.get('output_encoding', ''))
+                
+        if hasattr(tool_info, 'config_data') and tool_info.config_data:
+            candidates.append(tool_info.config_data.get('output_encoding', ''))
+            
+        for candidate in candidates:
+            if candidate and candidate.strip():
+                try:
+                    return codecs.lookup(candidate.strip()).name
+                except LookupError:
+                    print(f"无效的输出编码配置: {candidate}")
+                    
+    except Exception:
+        pass
+        
+    return None
+
+def get_configured_process_limits(tool_name=None):
+    """获取进程并发限制配置，返回 (全局上限, 该工具上限)，未配置的项为None
+    
+    全局上限读取 app_config.json 中的 process_limits.max_concurrent，
+    工具上限优先读取 tool_command.<工具名>.max_concurrent，其次为 process_limits.max_per_tool。
+    """
+    max_concurrent = None
+    max_per_tool = None
+    
+    try:
+        import json
+        
+        app_config_file = get_project_root() / 'config' / 'app_config.json'
+        if app_config_file.exists():
+            with open(app_config_file, 'r', encoding='utf-8') as f:
+                app_config = json.load(f)
+                
+            limits = app_config.get('process_limits', {})
+            if isinstance(limits, dict):
+                max_concurrent = limits.get('max_concurrent')
+                max_per_tool = limits.get('max_per_tool')
+                
+            tool_config = app_config.get('tool_command', {}).get(tool_name) if tool_name else None
+            if isinstance(tool_config, dict) and tool_config.get('max_concurrent'):
+                max_per_tool = tool_config.get('max_concurrent')
+                
+    except Exception:
+        pass
+        
+    def positive_int(value):
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return None
+        return value if value > 0 else None
+        
+    return positive_int(max_concurrent), positive_int(max_per_tool)
+
 def get_system_python_executable(tool_info=None):
     configured_python = get_configured_python_executable(tool_info) if tool_info else None
     if configured_python:
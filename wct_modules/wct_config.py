@@ -0,0 +1,185 @@
+"""
+工具配置模块
+wct_config.txt 的统一解析器：解析结果是不可变的模型，并按文件的 (mtime, size, inode) 在进程内缓存
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+
+CHECKBOX_KIND = '勾选项'
+INPUT_KIND = '输入项'
+
+
+@dataclass(frozen=True)
+class ConfigParameter:
+    """配置文件中的一行参数定义
+
+    section 为所在的 % 段（如 常用参数、全部参数），位于任何段之前时为 None；
+    kind 为所在的 %% 子段（勾选项、输入项）。
+    """
+    name: str
+    display_name: str
+    description: str
+    required: bool
+    section: Optional[str]
+    kind: Optional[str]
+
+    @property
+    def type(self) -> str:
+        return 'boolean' if self.kind == CHECKBOX_KIND else 'string'
+
+    def to_dict(self) -> Dict:
+        """参数面板使用的参数字典，每次返回新的字典，调用方可以自由修改"""
+        return {
+            'name': self.name,
+            'type': self.type,
+            'display_name': self.display_name,
+            'description': self.description,
+            'default': False if self.type == 'boolean' else '',
+            'required': self.required
+        }
+
+
+@dataclass(frozen=True)
+class WctConfig:
+    """解析后的配置文件
+
+    parameters 按文件中的顺序保存全部参数行，sections 按段名分组（段的顺序与文件一致）。
+    text 保留文件原文，供需要判断文件格式的调用方使用。
+    """
+    text: str
+    parameters: Tuple[ConfigParameter, ...]
+    sections: Mapping[str, Tuple[ConfigParameter, ...]]
+
+    @property
+    def is_wct_style(self) -> bool:
+        return self.text.lstrip().startswith('%')
+
+    def section(self, name: str) -> Tuple[ConfigParameter, ...]:
+        return self.sections.get(name, ())
+
+
+def parse_parameter_line(line: str, section: Optional[str], kind: Optional[str]) -> Optional[ConfigParameter]:
+    """解析 参数=显示名=描述=是否必填 形式的参数行，字段不足时返回 None"""
+    parts = line.split('=')
+    if len(parts) < 4:
+        return None
+    return ConfigParameter(
+        name=parts[0].strip(),
+        display_name=parts[1].strip(),
+        description=parts[2].strip(),
+        required=parts[3].strip() == '1',
+        section=section,
+        kind=kind
+    )
+
+
+def parse_wct_config(text: str) -> WctConfig:
+    """解析 wct_config.txt 内容
+
+    % 开头的行开始一个段，%% 开头的行开始一个子段（子段跨段保持，直到下一个 %% 行），
+    其余包含 = 的行是参数定义。
+    """
+    parameters = []
+    sections = {}
+    current_section = None
+    current_kind = None
+
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith('%%'):
+            current_kind = line[2:].strip()
+            continue
+        if line.startswith('%'):
+            current_section = line[1:].strip()
+            sections.setdefault(current_section, [])
+            continue
+
+        if '=' in line:
+            parameter = parse_parameter_line(line, current_section, current_kind)
+            if parameter is not None:
+                parameters.append(parameter)
+                if current_section is not None:
+                    sections[current_section].append(parameter)
+
+    return WctConfig(
+        text=text,
+        parameters=tuple(parameters),
+        sections=MappingProxyType({name: tuple(items) for name, items in sections.items()})
+    )
+
+
+class WctConfigCache:
+    """进程内共享的配置解析缓存
+
+    以文件的 (mtime_ns, size, inode) 判断缓存是否有效，命中时只需一次 stat。
+    写入配置文件的代码在写入后应调用 store() 或 invalidate()，避免时间戳精度不足时读到旧模型。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """获取全局共享的配置解析缓存"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, config_file) -> Optional[WctConfig]:
+        """返回文件的解析模型，文件不存在时返回 None，读取或解码失败时抛出异常"""
+        key = os.fspath(config_file)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            self.invalidate(key)
+            return None
+
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        with open(key, 'r', encoding='utf-8') as f:
+            config = parse_wct_config(f.read())
+        with self.lock:
+            self.entries[key] = (signature, config)
+        return config
+
+    def store(self, config_file, config: WctConfig):
+        """写入配置文件后直接登记写入内容对应的模型，避免再次读取与解析"""
+        key = os.fspath(config_file)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            self.invalidate(key)
+            return
+        with self.lock:
+            self.entries[key] = ((stat.st_mtime_ns, stat.st_size, stat.st_ino), config)
+
+    def invalidate(self, config_file=None):
+        """丢弃单个文件的缓存，不指定文件时清空全部缓存"""
+        with self.lock:
+            if config_file is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(os.fspath(config_file), None)
+
+
+def load_wct_config(config_file: Path) -> Optional[WctConfig]:
+    """通过进程内缓存读取并解析配置文件"""
+    return WctConfigCache.instance().get(config_file)